@@ -0,0 +1,46 @@
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, Iterable, TypeVar
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class BatchResult(Generic[T]):
+    """Outcome of one item of a batch.
+
+    Attributes:
+        value (T | None): Result of the item, None if it failed
+        error (str | None): Error message if the item failed
+    """
+    value: T | None = None
+    error: str | None = None
+
+
+async def gather_bounded(
+    calls: Iterable[Callable[[], Awaitable[T]]],
+    concurrency: int
+) -> list[BatchResult[T]]:
+    """Run coroutines with a concurrency limit, keeping their order and isolating failures.
+
+    Args:
+        calls (Iterable[Callable[[], Awaitable[T]]]): Functions starting each item's coroutine
+        concurrency (int): Maximum number of items running at once
+
+    Returns:
+        list[BatchResult[T]]: Result or error of each item, in input order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(call: Callable[[], Awaitable[T]]) -> BatchResult[T]:
+        async with semaphore:
+            try:
+                return BatchResult(value=await call())
+            except Exception as e:
+                logger.warning("Batch item failed", extra={"error": repr(e)})
+                return BatchResult(error=str(e) or type(e).__name__)
+
+    return await asyncio.gather(*(run(call) for call in calls))
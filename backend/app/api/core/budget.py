@@ -0,0 +1,61 @@
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import time
+from app.api.core.config import settings
+
+
+class BudgetExceeded(Exception):
+    """Raised when a workflow runs out of time or steps before producing an answer"""
+
+    def __init__(self, reason: str) -> None:
+        """Initialize the error.
+
+        Args:
+            reason (str): "deadline" or "steps"
+        """
+        super().__init__(f"The workflow exceeded its {reason} budget before answering")
+        self.reason = reason
+
+
+@dataclass
+class RequestBudget:
+    """Time and step limits of one workflow run.
+
+    Attributes:
+        timeout (float): Seconds the run may take, counted from `started`
+        max_steps (int): Graph steps the run may take, passed to LangGraph as its recursion limit
+        started (float): Monotonic time at which the budget started
+    """
+    timeout: float
+    max_steps: int
+    started: float = field(default_factory=time.monotonic)
+
+    @classmethod
+    def from_settings(cls) -> "RequestBudget":
+        """Start a budget with the configured limits.
+
+        Returns:
+            RequestBudget: Budget of REQUEST_TIMEOUT_SECONDS and WORKFLOW_MAX_STEPS, starting now
+        """
+        return cls(settings.get_float("REQUEST_TIMEOUT_SECONDS", 30.0), settings.get_int("WORKFLOW_MAX_STEPS", 12))
+
+    def remaining(self) -> float:
+        """Get the seconds left before the deadline.
+
+        Returns:
+            float: Seconds left, 0 once the deadline has passed
+        """
+        return max(0.0, self.started + self.timeout - time.monotonic())
+
+
+request_budget: ContextVar[RequestBudget | None] = ContextVar("request_budget", default=None)
+
+
+def call_options() -> dict:
+    """Get the options bounding an upstream OpenAI call by the time left in the current budget.
+
+    Returns:
+        dict: {"timeout": seconds} within a budget, empty outside of one
+    """
+    budget = request_budget.get()
+    return {"timeout": budget.remaining()} if budget else {}
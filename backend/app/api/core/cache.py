@@ -0,0 +1,225 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable
+import hashlib
+import sqlite3
+import time
+import unicodedata
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys: unicode NFC, trimmed, whitespace collapsed.
+
+    Args:
+        text (str): Text to normalize
+
+    Returns:
+        str: Normalized text
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def hash_key(*parts: Any) -> str:
+    """Build a stable cache key from the given parts.
+
+    Args:
+        *parts (Any): Values identifying the cached entry
+
+    Returns:
+        str: SHA-256 hex digest of the parts
+    """
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+class TTLLRUCache:
+    """In-process LRU cache with a size bound and a per-entry time to live.
+
+    Attributes:
+        hits (int): Number of lookups answered from the cache
+        misses (int): Number of lookups that missed or found an expired entry
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float | None = None,
+        on_evict: Callable[[Hashable], None] | None = None
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept before evicting the least recently used
+            ttl (float | None): Seconds an entry stays valid, None to never expire
+            on_evict (Callable[[Hashable], None] | None): Called, outside the cache lock, with the key
+                of every entry dropped because it expired or was evicted
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self.__data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.__lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a cached value and mark it as recently used.
+
+        Args:
+            key (Hashable): Cache key
+            default (Any): Value returned on a miss
+
+        Returns:
+            Any: The cached value or default
+        """
+        with self.__lock:
+            entry = self.__data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            expired = bool(expires_at) and expires_at < time.monotonic()
+            if expired:
+                del self.__data[key]
+                self.misses += 1
+            else:
+                self.__data.move_to_end(key)
+                self.hits += 1
+
+        if expired:
+            self._evicted([key])
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entries past maxsize.
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to store
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+        evicted = []
+        with self.__lock:
+            self.__data[key] = (expires_at, value)
+            self.__data.move_to_end(key)
+            while len(self.__data) > self.maxsize:
+                evicted.append(self.__data.popitem(last=False)[0])
+        self._evicted(evicted)
+
+    def expire(self) -> int:
+        """Drop every expired entry.
+
+        Returns:
+            int: Number of dropped entries
+        """
+        now = time.monotonic()
+        with self.__lock:
+            expired = [key for key, (expires_at, _) in self.__data.items() if expires_at and expires_at < now]
+            for key in expired:
+                del self.__data[key]
+        self._evicted(expired)
+        return len(expired)
+
+    def _evicted(self, keys: list[Hashable]) -> None:
+        """Report dropped entries to the eviction callback"""
+        if self.on_evict is not None:
+            for key in keys:
+                self.on_evict(key)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry and return its value"""
+        with self.__lock:
+            entry = self.__data.pop(key, None)
+        return entry[1] if entry else default
+
+    def clear(self) -> None:
+        """Drop every entry. Counters are kept."""
+        with self.__lock:
+            self.__data.clear()
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def stats(self) -> dict:
+        """Get size and hit/miss counters.
+
+        Returns:
+            dict: Cache statistics
+        """
+        return {"size": len(self.__data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+class SQLiteStore:
+    """Persistent key-value store on a local SQLite file.
+
+    Values are raw bytes so callers choose their own serialization. Safe to share
+    between threads of a process and between processes on the same host.
+    """
+
+    def __init__(self, path: str, table: str, ttl: float | None = None, maxsize: int | None = None) -> None:
+        """Open (and create if needed) the store.
+
+        Args:
+            path (str): Path of the SQLite database file
+            table (str): Table holding this store's entries
+            ttl (float | None): Seconds an entry stays valid, None to never expire
+            maxsize (int | None): Maximum number of entries, the oldest are dropped beyond it, None for no bound
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.__table = table
+        self.__lock = Lock()
+        self.__conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self.__conn.execute("PRAGMA journal_mode=WAL")
+        self.__conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        if maxsize is not None:
+            self.__conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_created_at ON {table} (created_at)")
+        self.__conn.commit()
+
+    def get(self, key: str) -> bytes | None:
+        """Get the stored bytes for a key, or None if missing or expired"""
+        with self.__lock:
+            row = self.__conn.execute(
+                f"SELECT value, created_at FROM {self.__table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        if self.ttl and row[1] + self.ttl < time.time():
+            self.delete(key)
+            return None
+        return row[0]
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store bytes under a key, replacing any previous value"""
+        with self.__lock:
+            self.__conn.execute(
+                f"INSERT OR REPLACE INTO {self.__table} (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+            if self.maxsize is not None:
+                self.__conn.execute(
+                    f"DELETE FROM {self.__table} WHERE key IN "
+                    f"(SELECT key FROM {self.__table} ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.maxsize,)
+                )
+            self.__conn.commit()
+
+    def delete(self, key: str) -> None:
+        """Remove a key if present"""
+        with self.__lock:
+            self.__conn.execute(f"DELETE FROM {self.__table} WHERE key = ?", (key,))
+            self.__conn.commit()
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        with self.__lock:
+            self.__conn.execute(f"DELETE FROM {self.__table}")
+            self.__conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying connection"""
+        with self.__lock:
+            self.__conn.close()
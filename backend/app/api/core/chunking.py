@@ -0,0 +1,241 @@
+from dataclasses import dataclass
+from typing import Iterator
+import re
+from app.api.core.tokens import CHARS_PER_TOKEN, count_tokens, get_encoding
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+_HEADING_PREFIX = re.compile(r"^(#+\s|cap[ií]tulo\b|parte\b|secci[oó]n\b|chapter\b|part\b)", re.IGNORECASE)
+_TERMINAL_PUNCTUATION = ".,;:!?…\"'»)"
+# Longest run of heading-like lines still treated as a heading
+_MAX_HEADING_LINES = 2
+
+
+@dataclass
+class Chunk:
+    """A piece of a document sized for embedding.
+
+    Attributes:
+        text (str): Chunk content, prefixed with its section heading
+        section (str | None): Heading of the section the chunk belongs to
+        tokens (int): Number of tokens of the content
+    """
+    text: str
+    section: str | None
+    tokens: int
+
+
+@dataclass
+class _Unit:
+    """Sentence or sentence fragment packed into chunks"""
+    text: str
+    tokens: int
+    starts_paragraph: bool
+
+
+def iter_paragraphs(text: str) -> Iterator[str]:
+    """Lazily split text on blank lines into trimmed, non-empty paragraphs.
+
+    Args:
+        text (str): Document text
+
+    Yields:
+        str: Paragraphs in order
+    """
+    start = 0
+    for match in _PARAGRAPH_BREAK.finditer(text):
+        paragraph = text[start:match.start()].strip()
+        if paragraph:
+            yield paragraph
+        start = match.end()
+    paragraph = text[start:].strip()
+    if paragraph:
+        yield paragraph
+
+
+def is_heading(paragraph: str, max_words: int = 12) -> bool:
+    """Check whether a paragraph looks like a title or section heading.
+
+    Headings are single short lines without closing punctuation, Markdown headings,
+    or lines starting with "Capítulo", "Parte", "Sección" and the like.
+
+    Args:
+        paragraph (str): Trimmed paragraph
+        max_words (int): Longest heading in words
+
+    Returns:
+        bool: True if the paragraph is a heading
+    """
+    if "\n" in paragraph or len(paragraph.split()) > max_words:
+        return False
+    if _HEADING_PREFIX.match(paragraph):
+        return True
+    return paragraph[-1] not in _TERMINAL_PUNCTUATION
+
+
+class TokenChunker:
+    """Split documents into chunks of a bounded number of tokens.
+
+    Paragraphs are packed together until the token budget is reached, and split into
+    sentences (or, for run-on sentences, token windows) when they do not fit on their
+    own. Consecutive chunks of a section share a tail of `overlap_tokens`. Headings
+    start a new section and are prepended to every chunk in it, so each chunk keeps
+    the context of the story or chapter it comes from.
+    """
+
+    def __init__(self, max_tokens: int = 400, overlap_tokens: int = 50, model: str | None = None) -> None:
+        """Initialize the chunker.
+
+        Args:
+            max_tokens (int): Token budget of a chunk, excluding the heading
+            overlap_tokens (int): Tokens repeated from the end of the previous chunk
+            model (str | None): Model whose tokenizer measures the budget
+        """
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self._model = model
+
+    def _count(self, text: str) -> int:
+        """Count tokens with the chunker's model"""
+        return count_tokens(text, self._model)
+
+    def _split_long(self, sentence: str) -> Iterator[str]:
+        """Split a sentence longer than the budget into token windows"""
+        encoding = get_encoding(self._model)
+        if encoding is not None:
+            tokens = encoding.encode(sentence, disallowed_special=())
+            for start in range(0, len(tokens), self.max_tokens):
+                yield encoding.decode(tokens[start:start + self.max_tokens])
+            return
+
+        # Without an encoding tokens are estimated from characters, so windows are measured in characters
+        max_chars = self.max_tokens * CHARS_PER_TOKEN
+        window = ""
+        for word in sentence.split():
+            candidate = f"{window} {word}" if window else word
+            if len(candidate) <= max_chars:
+                window = candidate
+                continue
+            if window:
+                yield window
+            # A word longer than the whole budget, such as a URL or a base64 blob, is cut by characters
+            while len(word) > max_chars:
+                yield word[:max_chars]
+                word = word[max_chars:]
+            window = word
+        if window:
+            yield window
+
+    def _units(self, paragraph: str) -> Iterator[_Unit]:
+        """Break a paragraph into units that each fit the budget"""
+        tokens = self._count(paragraph)
+        if tokens <= self.max_tokens:
+            yield _Unit(paragraph, tokens, True)
+            return
+
+        first = True
+        for sentence in _SENTENCE_END.split(paragraph):
+            tokens = self._count(sentence)
+            pieces = [(sentence, tokens)] if tokens <= self.max_tokens else [
+                (piece, self._count(piece)) for piece in self._split_long(sentence)
+            ]
+            for piece, piece_tokens in pieces:
+                yield _Unit(piece, piece_tokens, first)
+                first = False
+
+    def _chunk(self, units: list[_Unit], section: str | None) -> Chunk:
+        """Join units into a chunk, keeping paragraph breaks"""
+        body = ""
+        for unit in units:
+            if body:
+                body += "\n\n" if unit.starts_paragraph else " "
+            body += unit.text
+        text = f"{section}\n\n{body}" if section else body
+        return Chunk(text=text, section=section, tokens=sum(unit.tokens for unit in units))
+
+    def _overlap(self, units: list[_Unit]) -> list[_Unit]:
+        """Trailing units of a chunk that fit in the overlap budget"""
+        tail: list[_Unit] = []
+        tokens = 0
+        for unit in reversed(units):
+            if tokens + unit.tokens <= self.overlap_tokens:
+                tail.insert(0, unit)
+                tokens += unit.tokens
+                continue
+
+            # Units are often whole paragraphs, so fall back to their last sentences
+            sentences: list[str] = []
+            for sentence in reversed(_SENTENCE_END.split(unit.text)):
+                sentence_tokens = self._count(sentence)
+                if tokens + sentence_tokens > self.overlap_tokens:
+                    break
+                sentences.insert(0, sentence)
+                tokens += sentence_tokens
+            if sentences:
+                text = " ".join(sentences)
+                tail.insert(0, _Unit(text, self._count(text), True))
+            break
+        return tail
+
+    def split(self, text: str) -> Iterator[Chunk]:
+        """Lazily split a document into chunks.
+
+        Args:
+            text (str): Document text
+
+        Yields:
+            Chunk: Chunks in document order
+        """
+        section: str | None = None
+        units: list[_Unit] = []
+        tokens = 0
+        # Units carried over from the previous chunk only, nothing new yet
+        carried = 0
+        # Heading-like lines waiting for a body paragraph to confirm them
+        pending: list[str] = []
+        # Inside a run of short lines (a list, verses, dialogue) that are not headings
+        in_run = False
+
+        def add(paragraph: str) -> Iterator[Chunk]:
+            nonlocal units, tokens, carried
+            for unit in self._units(paragraph):
+                if units and tokens + unit.tokens > self.max_tokens:
+                    yield self._chunk(units, section)
+                    units = self._overlap(units)
+                    # Drop the overlap when it leaves no room for the next unit
+                    while units and sum(u.tokens for u in units) + unit.tokens > self.max_tokens:
+                        units.pop(0)
+                    tokens = sum(u.tokens for u in units)
+                    carried = len(units)
+                units.append(unit)
+                tokens += unit.tokens
+
+        for paragraph in iter_paragraphs(text):
+            if is_heading(paragraph):
+                if in_run:
+                    yield from add(paragraph)
+                    continue
+                pending.append(paragraph)
+                if len(pending) > _MAX_HEADING_LINES:
+                    in_run = True
+                    for line in pending:
+                        yield from add(line)
+                    pending = []
+                continue
+
+            if pending:
+                # A title and its first chapter form one section heading
+                if len(units) > carried:
+                    yield self._chunk(units, section)
+                section = "\n".join(pending)
+                units, tokens, carried, pending = [], 0, 0, []
+            in_run = False
+            yield from add(paragraph)
+
+        # Short closing lines such as "Fin" belong to the last section
+        for line in pending:
+            yield from add(line)
+        if len(units) > carried:
+            yield self._chunk(units, section)
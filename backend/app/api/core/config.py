@@ -1,13 +1,14 @@
 from dotenv import dotenv_values
 from typing import Dict, Any
+import os
 
 
 class Settings:
     """Settings class to manage environment variables and configuration"""
     
     def __init__(self) -> None:
-        """Initialize Settings by loading environment variables from .env file"""
-        self._config: Dict[str, Any] = dotenv_values()
+        """Initialize Settings from the .env file, overridden by process environment variables"""
+        self._config: Dict[str, Any] = {**dotenv_values(), **os.environ}
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get a configuration value by key.
@@ -20,6 +21,47 @@ class Settings:
             The configuration value or default if not found
         """
         return self._config.get(key, default)
+
+    def get_int(self, key: str, default: int) -> int:
+        """Get a configuration value parsed as an integer.
+
+        Args:
+            key: The configuration key to look up
+            default: Value to return if key is not found or empty
+
+        Returns:
+            The configuration value as an int
+        """
+        value = self.get(key)
+        return int(value) if value not in (None, "") else default
+
+    def get_float(self, key: str, default: float) -> float:
+        """Get a configuration value parsed as a float.
+
+        Args:
+            key: The configuration key to look up
+            default: Value to return if key is not found or empty
+
+        Returns:
+            The configuration value as a float
+        """
+        value = self.get(key)
+        return float(value) if value not in (None, "") else default
+
+    def get_bool(self, key: str, default: bool) -> bool:
+        """Get a configuration value parsed as a boolean.
+
+        Args:
+            key: The configuration key to look up
+            default: Value to return if key is not found or empty
+
+        Returns:
+            True for "true", "1", "yes" or "on" (case insensitive), False otherwise
+        """
+        value = self.get(key)
+        if value in (None, ""):
+            return default
+        return str(value).strip().lower() in ("true", "1", "yes", "on")
     
     def __getattr__(self, name: str) -> Any:
         """Allow accessing config values as attributes.
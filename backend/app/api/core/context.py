@@ -0,0 +1,27 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+
+@dataclass
+class RequestContext:
+    """State of the HTTP request being served, shared by every task it spawns.
+
+    Attributes:
+        request_id (str): Identifier of the request, echoed in the X-Request-ID header and in logs
+        llm_calls (int): Number of LLM calls made while serving the request
+    """
+    request_id: str
+    llm_calls: int = 0
+
+
+request_context: ContextVar[RequestContext | None] = ContextVar("request_context", default=None)
+
+
+def current_request_id() -> str | None:
+    """Get the ID of the request being served.
+
+    Returns:
+        str | None: Request ID, or None outside of a request
+    """
+    context = request_context.get()
+    return context.request_id if context else None
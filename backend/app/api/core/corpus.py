@@ -0,0 +1,32 @@
+from threading import Lock
+
+
+class CorpusVersion:
+    """Monotonic version of the document corpus held in the vector store.
+
+    Every write to the corpus bumps the version so caches derived from retrieval
+    results can tell their entries are stale.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the version at zero"""
+        self.__version = 0
+        self.__lock = Lock()
+
+    @property
+    def version(self) -> int:
+        """Current corpus version"""
+        return self.__version
+
+    def bump(self) -> int:
+        """Record a corpus change.
+
+        Returns:
+            int: The new corpus version
+        """
+        with self.__lock:
+            self.__version += 1
+            return self.__version
+
+
+corpus_version = CorpusVersion()
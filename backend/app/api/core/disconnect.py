@@ -0,0 +1,54 @@
+from typing import Awaitable, TypeVar
+import asyncio
+import logging
+from starlette.requests import Request
+from app.api.core.metrics import CLIENT_DISCONNECTS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client went away before its response was ready"""
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    """Return once the client has closed the connection"""
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def cancel_on_disconnect(request: Request, work: Awaitable[T]) -> T:
+    """Await some work on behalf of a request, cancelling it if the client disconnects.
+
+    Cancelling the work cancels the upstream calls it is awaiting, so an abandoned
+    request stops using LLM tokens and workers. Streamed responses do not need this,
+    since Starlette already cancels them on disconnect.
+
+    Args:
+        request (Request): Request being served, whose body has already been read
+        work (Awaitable[T]): Work producing the response
+
+    Returns:
+        T: Result of the work
+
+    Raises:
+        ClientDisconnected: The client disconnected before the work finished
+    """
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+
+    if task.done() and not task.cancelled():
+        return task.result()
+    CLIENT_DISCONNECTS.inc()
+    logger.info("Client disconnected, cancelled its request")
+    raise ClientDisconnected()
@@ -0,0 +1,107 @@
+import re
+
+SPANISH = "Spanish"
+
+# Frequent function words that are distinctive for each language
+_STOPWORDS: dict[str, frozenset[str]] = {
+    "Spanish": frozenset(
+        "el la los las un una unos unas de del al en y o pero porque que qué quién quien cuál cual cómo como "
+        "cuándo cuando dónde donde por para con sin sobre entre es son está están fue fueron ser hay "
+        "su sus lo le les se mi mis tu tus yo él ella ellos nosotros muy más también este esta estos "
+        "estas ese esa hace tiene tienen puede qué cuáles".split()
+    ),
+    "English": frozenset(
+        "the a an and or but because what who whom which how when where why of to in on for with without "
+        "about between is are was were be been being has have had do does did this that these those it "
+        "its his her their they he she we you i my your can could would should will not from by".split()
+    ),
+    "Portuguese": frozenset(
+        "o os as um uma uns umas de do da dos das em no na nos nas ao e ou mas porque que quem qual como quando "
+        "onde por para com sem sobre entre é são está estão foi foram ser há seu sua seus suas ele ela "
+        "eles elas nós você muito mais também isso isto essa esse tem têm pode não".split()
+    ),
+    "French": frozenset(
+        "le la les un une de des du au aux et ou mais parce que qui quoi quel quelle comment quand où pour "
+        "avec sans sur entre est sont était être a ont son sa ses il elle ils elles nous vous je très "
+        "plus aussi ce cette ces ne pas dans".split()
+    ),
+    "Italian": frozenset(
+        "il lo la gli le un una uno del della dei delle e o ma perché che chi quale come quando dove per "
+        "con senza su tra fra è sono era essere ha hanno suo sua suoi lui lei loro noi voi io molto più "
+        "anche questo questa non nel nella".split()
+    ),
+    "German": frozenset(
+        "der die das ein eine einen dem den des und oder aber weil was wer welche wie wann wo warum für "
+        "mit ohne über zwischen ist sind war waren sein hat haben sein seine ihr ihre er sie wir ich "
+        "sehr mehr auch dieser diese nicht von zu im".split()
+    ),
+}
+
+# Words that carry no topic in any supported language
+FUNCTION_WORDS: frozenset[str] = frozenset().union(*_STOPWORDS.values())
+
+# Characters that only appear in one of the supported languages
+_MARKERS: dict[str, re.Pattern] = {
+    "Spanish": re.compile(r"[ñ¿¡]", re.IGNORECASE),
+    "Portuguese": re.compile(r"[ãõ]", re.IGNORECASE),
+}
+_WORDS = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+_ALIASES: dict[str, str] = {
+    "spanish": "Spanish", "español": "Spanish", "espanol": "Spanish", "castellano": "Spanish", "es": "Spanish",
+    "english": "English", "inglés": "English", "ingles": "English", "en": "English",
+    "portuguese": "Portuguese", "portugués": "Portuguese", "portugues": "Portuguese", "português": "Portuguese", "pt": "Portuguese",
+    "french": "French", "francés": "French", "frances": "French", "français": "French", "fr": "French",
+    "italian": "Italian", "italiano": "Italian", "it": "Italian",
+    "german": "German", "alemán": "German", "aleman": "German", "deutsch": "German", "de": "German",
+}
+
+
+def canonical_language(name: str | None) -> str | None:
+    """Map a language name or code in English or Spanish to its canonical English name.
+
+    Args:
+        name (str | None): Language name such as "english", "Inglés" or "en"
+
+    Returns:
+        str | None: Canonical name such as "English", or None if unknown
+    """
+    if not name:
+        return None
+    return _ALIASES.get(name.strip().strip(".").lower())
+
+
+def detect_language(text: str, min_hits: int = 2, min_margin: float = 1.5) -> str | None:
+    """Detect the language of a text offline using stopword frequencies.
+
+    Detection is deliberately conservative: when the text is too short or two
+    languages score closely, None is returned so callers can fall back to an LLM.
+
+    Args:
+        text (str): Text to classify
+        min_hits (int): Minimum stopword hits required for a decision
+        min_margin (float): Minimum ratio between the best and second best scores
+
+    Returns:
+        str | None: Canonical language name, or None when ambiguous
+    """
+    words = [word.lower() for word in _WORDS.findall(text)]
+    if not words:
+        return None
+
+    scores = {language: 0.0 for language in _STOPWORDS}
+    for word in words:
+        for language, stopwords in _STOPWORDS.items():
+            if word in stopwords:
+                scores[language] += 1
+
+    # Marker characters such as ñ, ¿ or ã are strong evidence
+    for language, markers in _MARKERS.items():
+        scores[language] += 2 * len(markers.findall(text))
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best, best_score), (_, second_score) = ranked[0], ranked[1]
+
+    if best_score < min_hits or best_score < min_margin * second_score:
+        return None
+    return best
@@ -0,0 +1,96 @@
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+import copy
+import json
+import logging
+import sys
+import time
+from app.api.core.config import settings
+from app.api.core.context import current_request_id
+
+# Attributes every LogRecord has, anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+_listener: QueueListener | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including `extra` fields and the request ID"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Render a record as JSON"""
+        payload = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None)
+        }
+        payload.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request ID in the thread that logs them"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Attach the request ID and keep the record"""
+        record.request_id = current_request_id()
+        return True
+
+
+class _RawQueueHandler(QueueHandler):
+    """Queue handler that leaves formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Resolve the message and traceback, which may reference objects that change later"""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging() -> None:
+    """Send application logs to stdout through a background thread.
+
+    Records are put on a queue by the calling thread and written by a listener
+    thread, so logging never blocks the event loop on a slow stdout. The format is
+    JSON lines (LOG_FORMAT=json, the default) or plain text (LOG_FORMAT=text), at
+    LOG_LEVEL (INFO by default). Calling it again is a no-op.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    handler = logging.StreamHandler(sys.stdout)
+    if settings.get("LOG_FORMAT", "json").lower() == "text":
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"))
+    else:
+        handler.setFormatter(JsonFormatter())
+
+    queue: SimpleQueue = SimpleQueue()
+    queue_handler = _RawQueueHandler(queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    logger = logging.getLogger("app")
+    logger.setLevel(settings.get("LOG_LEVEL", "INFO").upper())
+    logger.handlers = [queue_handler]
+    logger.propagate = False
+
+    _listener = QueueListener(queue, handler)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,169 @@
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Iterator
+from uuid import UUID
+import logging
+import os
+import time
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, multiprocess
+)
+from app.api.core.context import request_context
+
+logger = logging.getLogger(__name__)
+
+# Seconds, from a cache hit to a slow streamed answer
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "rag_http_request_duration_seconds", "Duration of HTTP requests, including streamed bodies",
+    ["method", "route", "status"], buckets=_LATENCY_BUCKETS
+)
+NODE_DURATION = Histogram(
+    "rag_node_duration_seconds", "Duration of LangGraph node executions",
+    ["node", "status"], buckets=_LATENCY_BUCKETS
+)
+LLM_CALL_DURATION = Histogram(
+    "rag_llm_call_duration_seconds", "Duration of chat model calls",
+    ["model", "status"], buckets=_LATENCY_BUCKETS
+)
+LLM_TOKENS = Counter("rag_llm_tokens_total", "Tokens used by chat model calls", ["model", "type"])
+LLM_CALLS_PER_REQUEST = Histogram(
+    "rag_llm_calls_per_request", "Chat model calls made while serving an HTTP request",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+)
+EMBEDDING_CALL_DURATION = Histogram(
+    "rag_embedding_call_duration_seconds", "Duration of embedding API calls",
+    ["operation", "status"], buckets=_LATENCY_BUCKETS
+)
+EMBEDDING_TEXTS = Counter("rag_embedding_texts_total", "Texts sent to the embedding API", ["operation"])
+VECTOR_STORE_CALL_DURATION = Histogram(
+    "rag_vector_store_call_duration_seconds", "Duration of vector store and lexical index calls",
+    ["store", "operation", "status"], buckets=_LATENCY_BUCKETS
+)
+CACHE_REQUESTS = Counter("rag_cache_requests_total", "Cache lookups", ["cache", "result"])
+COALESCED_REQUESTS = Counter(
+    "rag_coalesced_requests_total", "Calls that started a computation (leader) or joined one in flight (collapsed)",
+    ["group", "role"]
+)
+PROMPT_CONTEXT_TOKENS = Histogram(
+    "rag_prompt_context_tokens", "Tokens of retrieved context packed into answer prompts",
+    buckets=(0, 250, 500, 1000, 2000, 3000, 4000, 6000, 8000, 16000)
+)
+PROMPT_CONTEXT_CHUNKS = Counter(
+    "rag_prompt_context_chunks_total", "Retrieved chunks kept whole, truncated or dropped to fit the context budget",
+    ["result"]
+)
+ROUTING_DECISIONS = Counter("rag_routing_decisions_total", "Supervisor routing decisions", ["source", "route"])
+BUDGET_EXHAUSTED = Counter(
+    "rag_budget_exhausted_total", "Workflows stopped by their deadline or step budget, answered with the best answer so far or failed",
+    ["reason", "outcome"]
+)
+CLIENT_DISCONNECTS = Counter("rag_client_disconnects_total", "Requests whose work was cancelled because the client disconnected")
+ERRORS = Counter("rag_errors_total", "Errors raised by instrumented components", ["component"])
+
+
+@contextmanager
+def timed(histogram: Histogram, component: str, **labels: str) -> Iterator[None]:
+    """Observe the duration of a block with an ok or error status and count its errors.
+
+    Args:
+        histogram (Histogram): Histogram with a "status" label besides `labels`
+        component (str): Component name used for the error counter
+        **labels (str): Remaining label values of the histogram
+    """
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException as e:
+        # Cancellation is not a failure of the component
+        if isinstance(e, Exception):
+            status = "error"
+            ERRORS.labels(component).inc()
+        else:
+            status = "cancelled"
+        raise
+    finally:
+        histogram.labels(status=status, **labels).observe(time.perf_counter() - started)
+
+
+class LLMMetricsCallbackHandler(BaseCallbackHandler):
+    """LangChain callback recording the duration, tokens and errors of chat model calls.
+
+    Every call is also counted against the HTTP request being served, which the
+    request middleware reports as LLM calls per request.
+    """
+
+    # Run in the caller's context so the request context is visible
+    run_inline = True
+
+    def __init__(self) -> None:
+        """Initialize the handler with no call in flight"""
+        self._started: dict[UUID, tuple[float, str]] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def _model(kwargs: dict) -> str:
+        """Model name from the invocation parameters of a call"""
+        params = kwargs.get("invocation_params") or {}
+        return params.get("model") or params.get("model_name") or "unknown"
+
+    def on_chat_model_start(self, serialized: dict, messages: list, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record the start of a call"""
+        with self._lock:
+            self._started[run_id] = (time.perf_counter(), self._model(kwargs))
+        context = request_context.get()
+        if context is not None:
+            context.llm_calls += 1
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record the duration and token usage of a finished call"""
+        with self._lock:
+            started, model = self._started.pop(run_id, (None, "unknown"))
+        if started is not None:
+            LLM_CALL_DURATION.labels(model=model, status="ok").observe(time.perf_counter() - started)
+
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens, completion_tokens = usage.get("prompt_tokens"), usage.get("completion_tokens")
+        if prompt_tokens is None:
+            # Streamed calls report usage on the message, when the provider sends it
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens = (prompt_tokens or 0) + metadata.get("input_tokens", 0)
+                    completion_tokens = (completion_tokens or 0) + metadata.get("output_tokens", 0)
+        if prompt_tokens:
+            LLM_TOKENS.labels(model=model, type="prompt").inc(prompt_tokens)
+        if completion_tokens:
+            LLM_TOKENS.labels(model=model, type="completion").inc(completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record a failed call"""
+        with self._lock:
+            started, model = self._started.pop(run_id, (None, "unknown"))
+        if started is not None:
+            LLM_CALL_DURATION.labels(model=model, status="error").observe(time.perf_counter() - started)
+        ERRORS.labels("llm").inc()
+        logger.warning("LLM call failed", extra={"model": model, "error": repr(error)})
+
+
+llm_metrics_handler = LLMMetricsCallbackHandler()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Render the metrics in the Prometheus text format.
+
+    With PROMETHEUS_MULTIPROC_DIR set (required with several uvicorn workers), the
+    metrics of every worker process are aggregated.
+
+    Returns:
+        tuple[bytes, str]: Exposition body and its content type
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
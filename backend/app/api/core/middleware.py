@@ -0,0 +1,70 @@
+import logging
+import re
+import time
+import uuid
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.api.core.context import RequestContext, request_context
+from app.api.core.metrics import HTTP_REQUEST_DURATION, LLM_CALLS_PER_REQUEST
+
+logger = logging.getLogger(__name__)
+
+_REQUEST_ID = re.compile(r"^[\w.-]{1,64}$")
+
+
+class RequestContextMiddleware:
+    """Give every HTTP request an ID and record its duration and LLM calls.
+
+    The ID is taken from a valid incoming X-Request-ID header or generated, stored in
+    the request context for logs, and returned in the X-Request-ID response header.
+    Written as plain ASGI middleware so streamed responses are timed until their last
+    byte and run in the same context as the endpoint.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Wrap an ASGI application.
+
+        Args:
+            app (ASGIApp): Application to wrap
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Serve a request within its request context"""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")
+        if not _REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        context = RequestContext(request_id)
+        token = request_context.set(context)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            duration = time.perf_counter() - started
+            # Route templates keep the label cardinality bounded, unmatched paths share one label
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(method=scope["method"], route=route, status=str(status)).observe(duration)
+            if context.llm_calls:
+                LLM_CALLS_PER_REQUEST.observe(context.llm_calls)
+            logger.info("Request finished", extra={
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "duration_ms": round(duration * 1000, 2),
+                "llm_calls": context.llm_calls
+            })
+            request_context.reset(token)
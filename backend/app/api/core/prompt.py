@@ -1,91 +1,254 @@
+from dataclasses import dataclass
+from functools import lru_cache
+import logging
 from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage
+from app.api.core.metrics import PROMPT_CONTEXT_CHUNKS, PROMPT_CONTEXT_TOKENS
+from app.api.core.tokens import count_tokens, truncate_tokens
 
+logger = logging.getLogger(__name__)
+
+# A chunk cut shorter than this carries too little to be worth its tokens
+MIN_TRUNCATED_CHUNK_TOKENS = 50
+
+# Static instructions come first and never contain request data, so every request
+# shares the same prompt prefix and provider-side prompt caching can reuse it.
+ANSWER_INSTRUCTIONS = """# INTENT
+You are an AI assistant tasked with answering the USER QUERY using only the CONTEXT provided to you. You ALWAYS NEED TO ANSWER IN THE ANSWER LANGUAGE.
+
+## STEPS TO ANSWER
+1. Read the **USER QUERY** and **CONTEXT** to generate an appropriate response.
+2. Use the CONTEXT only if it is related to the USER QUERY, and the CONVERSATION SO FAR, when given, to understand follow-up questions.
+3. Ensure the final answer is one paragraph and includes emojis.
+4. ALWAYS answer in the ANSWER LANGUAGE.
+"""
+
+
+@dataclass
+class PackedContext:
+    """Retrieved context fitted into a token budget.
+
+    Attributes:
+        text (str): Rendered context
+        tokens (int): Tokens of the rendered context
+        kept (int): Chunks included, whole or truncated
+        truncated (bool): Whether the last included chunk was cut
+        dropped (int): Lowest-ranked chunks left out
+    """
+    text: str
+    tokens: int
+    kept: int
+    truncated: bool
+    dropped: int
+
+
+def pack_context(context: list[Document], max_tokens: int, model: str | None = None) -> PackedContext:
+    """Pack ranked chunks into a token budget, best ranked first.
+
+    Chunks are added whole while they fit. The first one that does not fit is cut to
+    the remaining budget if at least MIN_TRUNCATED_CHUNK_TOKENS remain, and it and
+    every lower-ranked chunk are dropped otherwise.
+
+    Args:
+        context (list[Document]): Retrieved chunks, best ranked first
+        max_tokens (int): Token budget of the context
+        model (str | None): Model whose tokenizer to use
+
+    Returns:
+        PackedContext: Rendered context and what was kept
+    """
+    parts: list[str] = []
+    used = 0
+    truncated = False
+    for doc in context:
+        part = f"Content: {doc.page_content}"
+        tokens = count_tokens(part, model)
+        if used + tokens <= max_tokens:
+            parts.append(part)
+            used += tokens
+            continue
+
+        remaining = max_tokens - used
+        if remaining >= MIN_TRUNCATED_CHUNK_TOKENS:
+            part = truncate_tokens(part, remaining, model)
+            parts.append(part)
+            used += count_tokens(part, model)
+            truncated = True
+        break
+
+    return PackedContext(
+        text="\n".join(parts) if parts else "No sources",
+        tokens=used,
+        kept=len(parts),
+        truncated=truncated,
+        dropped=len(context) - len(parts)
+    )
+
+
+@lru_cache(maxsize=None)
+def supervisor_instructions(members: tuple[str, ...]) -> str:
+    """Render the static part of the supervisor prompt, once per set of workers.
 
-def generate_supervisor_prompt(members: list[str], user_request: str) -> str:
-    """Generate prompt for supervisor node that manages workflow execution.
-    
     Args:
-        members (list[str]): List of worker node names in the workflow
-        user_request (str): Original user request
-        
+        members (tuple[str, ...]): Worker node names in the workflow
+
     Returns:
-        str: Formatted supervisor prompt
+        str: Supervisor instructions
     """
-    print(f"Generating supervisor prompt for workers: {members}")
-    workflow_history = "\n".join([f"{user_request[i].additional_kwargs.get('node', '')}: {user_request[i].content};" for i in range(1, len(user_request))])
-    
-    supervisor_prompt = f"""#INTENT
+    return f"""#INTENT
 You are a supervisor agent responsible for orchestrating a multi-step chat workflow by coordinating worker nodes.
 
 #GOAL
 Determine the next appropriate worker node to execute based on the user request and workflow state.
 
 #GUIDELINES
-1. Available workers: {members}
+1. Available workers: {list(members)}
 2. Workflow steps:
    - If the user request is not in Spanish, ALWAYS use the TRANSLATE worker first
    - Use RETRIEVAL worker to gather context to answer the user request
    - Use ANSWER worker to generate the final response
-   - If the response of the node ANSWER is in a different language than the user request, use the TRANSLATE worker.
-   
-- USER REQUESTS: {user_request[0].content}
-
-# WORKFLOW HISTORY
-{workflow_history}
+   - Once the ANSWER worker has responded, FINISH. Never translate or retrieve again after it.
 """
-    return supervisor_prompt
 
 
-def generate_llm_prompt(member: str, context: list[Document], user_request: str, answer_language: str) -> str:
-    """Generate prompt for LLM worker node that processes user requests.
-    
+@lru_cache(maxsize=1024)
+def _history_entry(node: str, content: str, max_tokens: int) -> str:
+    """Render one workflow step, rendered once and reused by the following supervisor steps"""
+    return f"{node}: {truncate_tokens(content, max_tokens)};"
+
+
+def build_supervisor_messages(members: list[str], messages: list[BaseMessage], history_entry_tokens: int) -> list[dict]:
+    """Build the messages of the supervisor node that manages workflow execution.
+
+    Args:
+        members (list[str]): Worker node names in the workflow
+        messages (list[BaseMessage]): Workflow messages, starting with the user request
+        history_entry_tokens (int): Tokens kept from each workflow step, enough to tell its language
+
+    Returns:
+        list[dict]: Static supervisor instructions followed by the user request and workflow history
+    """
+    logger.debug("Generating supervisor prompt", extra={"members": members})
+    workflow_history = "\n".join(
+        _history_entry(message.additional_kwargs.get("node", ""), message.content, history_entry_tokens)
+        for message in messages[1:]
+    )
+    return [
+        {"role": "system", "content": supervisor_instructions(tuple(members))},
+        {"role": "user", "content": f"# USER REQUEST\n{messages[0].content}\n\n# WORKFLOW HISTORY\n{workflow_history}"}
+    ]
+
+
+def build_answer_messages(context: list[Document], user_request: str, answer_language: str,
+                          max_context_tokens: int, model: str | None = None,
+                          conversation: list[tuple[str, str]] | None = None,
+                          history_entry_tokens: int = 200) -> list[dict]:
+    """Build the messages of the LLM worker node that answers user requests.
+
     Args:
-        member (str): Name of the worker node
-        context (list[Document]): Retrieved context for answering
+        context (list[Document]): Retrieved context for answering, best ranked first
         user_request (str): Original user question
-        
+        answer_language (str): Language of the answer
+        max_context_tokens (int): Token budget of the retrieved context
+        model (str | None): Model whose tokenizer to use
+        conversation (list[tuple[str, str]] | None): Earlier questions and answers of the session, oldest first
+        history_entry_tokens (int): Tokens kept from each earlier question and answer
+
     Returns:
-        str: Formatted LLM prompt
+        list[dict]: Static answer instructions followed by the conversation, context, query and answer language
     """
-    print(f"Generating LLM prompt for worker {member}")
-    
-    context_text = "\n".join([f"Content: {doc.page_content}" for doc in context]) if context else "No sources"
-    
-    llm_prompt = f"""# INTENT
-You are an AI assistant tasked with answering the USER REQUEST using only the CONTEXT provided to you. You ALWAYS NEED TO ANSWER IN {answer_language}.
+    packed = pack_context(context, max_context_tokens, model)
+    PROMPT_CONTEXT_TOKENS.observe(packed.tokens)
+    PROMPT_CONTEXT_CHUNKS.labels("kept").inc(packed.kept - packed.truncated)
+    PROMPT_CONTEXT_CHUNKS.labels("truncated").inc(packed.truncated)
+    PROMPT_CONTEXT_CHUNKS.labels("dropped").inc(packed.dropped)
+    logger.debug("Generating LLM prompt", extra={
+        "context_tokens": packed.tokens, "kept": packed.kept, "truncated": packed.truncated, "dropped": packed.dropped
+    })
 
-## STEPS TO ANSWER
-1. Read the **USER QUERY** and **CONTEXT** to generate an appropriate response.
-2. Ensure the final answer is one paragraph and includes emojis.
-3. ALWAYS answer in {answer_language}.
+    history = ""
+    if conversation:
+        history = "# CONVERSATION SO FAR\n" + "\n".join(
+            f"User: {truncate_tokens(question, history_entry_tokens, model)}\n"
+            f"Assistant: {truncate_tokens(answer, history_entry_tokens, model)}"
+            for question, answer in conversation
+        ) + "\n\n"
 
-# CONTEXT TO ANSWER (ONLY IF RELATED TO THE USER REQUEST)
-{context_text}
+    return [
+        {"role": "system", "content": ANSWER_INSTRUCTIONS},
+        {"role": "user", "content": f"""{history}# CONTEXT TO ANSWER (ONLY IF RELATED TO THE USER QUERY)
+{packed.text}
 
 # USER QUERY
 {user_request}
-"""
 
-    return llm_prompt
+# ANSWER LANGUAGE
+{answer_language}"""}
+    ]
+
+
+@lru_cache(maxsize=None)
+def translate_instructions(language: str) -> str:
+    """Render the static part of the translation prompt, once per target language.
 
-def generate_translate_prompt(user_request: str, language: str) -> str:
-    """Generate prompt for translation worker node.
-    
     Args:
-        user_request (str): Text to translate
         language (str): Target language for translation
-        
+
     Returns:
-        str: Formatted translation prompt
+        str: Translation instructions
     """
-    print(f"Generating translation prompt for the user query...")
-    
-    translate_prompt = f"""#INTENT
+    return f"""#INTENT
 1. You are a translation assistant tasked with translating the text in the TEXT section to {language}
-2. Only answer with the translated text and the language of the original text in the format: Translated text, Language
+2. Answer with the translated text and the language the original text is written in, named in English (e.g. English, Portuguese)
 3. Maintain the original format and emojis
+"""
 
-#TEXT
-{user_request}
+
+@lru_cache(maxsize=None)
+def translate_output_instructions(language: str) -> str:
+    """Render the static part of the answer translation prompt, once per target language.
+
+    Args:
+        language (str): Language of the user request
+
+    Returns:
+        str: Answer translation instructions
+    """
+    return f"""#INTENT
+1. You are a translation assistant tasked with translating the answer in the TEXT section to {language}
+2. Answer with the translated text only, without notes or quotes
+3. Maintain the original format and emojis
 """
-    return translate_prompt
+
+
+def build_translate_output_messages(answer: str, language: str) -> list[dict]:
+    """Build the messages of the output translation node, answered with plain text so it can be streamed.
+
+    Args:
+        answer (str): Answer to translate
+        language (str): Language of the user request
+
+    Returns:
+        list[dict]: Static translation instructions followed by the answer
+    """
+    return [
+        {"role": "system", "content": translate_output_instructions(language)},
+        {"role": "user", "content": f"#TEXT\n{answer}"}
+    ]
+
+
+def build_translate_messages(user_request: str, language: str) -> list[dict]:
+    """Build the messages of the translation worker node.
+
+    Args:
+        user_request (str): Text to translate
+        language (str): Target language for translation
+
+    Returns:
+        list[dict]: Static translation instructions followed by the text
+    """
+    logger.debug("Generating translation prompt")
+    return [
+        {"role": "system", "content": translate_instructions(language)},
+        {"role": "user", "content": f"#TEXT\n{user_request}"}
+    ]
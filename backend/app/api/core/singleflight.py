@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+import asyncio
+from app.api.core.metrics import COALESCED_REQUESTS
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Flight:
+    """A shared in-flight call and the number of callers awaiting it"""
+    task: asyncio.Future
+    waiters: int = 0
+
+
+class SingleFlight(Generic[T]):
+    """Collapse concurrent calls with the same key into one execution.
+
+    The first caller of a key starts the call, and callers arriving while it runs
+    await the same result (or exception) instead of starting their own. The key is
+    forgotten as soon as the call finishes, so nothing is cached beyond its
+    lifetime. A caller being cancelled does not cancel the shared call while others
+    still await it; the call is only cancelled when its last caller goes away.
+
+    Attributes:
+        name (str): Name of the group, used as the metric label
+    """
+
+    def __init__(self, name: str, enabled: bool = True) -> None:
+        """Initialize an empty group.
+
+        Args:
+            name (str): Name of the group, e.g. "retrieval"
+            enabled (bool): False to run every call on its own
+        """
+        self.name = name
+        self._enabled = enabled
+        self._flights: dict[Hashable, _Flight] = {}
+        self.leaders = 0
+        self.collapsed = 0
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        """Drop a key unless a newer call already replaced it"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Run a call, or join the identical call already in flight.
+
+        The result is shared by every caller of the flight, so it must not be
+        mutated by them.
+
+        Args:
+            key (Hashable): Identity of the call, equal for calls that can share a result
+            call (Callable[[], Awaitable[T]]): Starts the call when no identical one is running
+
+        Returns:
+            T: Result of the shared call
+        """
+        if not self._enabled:
+            return await call()
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, key=key, flight=flight: self._forget(key, flight))
+            self.leaders += 1
+            COALESCED_REQUESTS.labels(group=self.name, role="leader").inc()
+        else:
+            self.collapsed += 1
+            COALESCED_REQUESTS.labels(group=self.name, role="collapsed").inc()
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Nobody else needs the result, stop paying for it
+                self._forget(key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def stats(self) -> dict:
+        """Get how many calls ran and how many were collapsed into them.
+
+        Returns:
+            dict: Coalescing statistics
+        """
+        total = self.leaders + self.collapsed
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "collapsed": self.collapsed,
+            "collapse_rate": self.collapsed / total if total else 0.0
+        }
@@ -0,0 +1,194 @@
+from collections import deque
+from functools import lru_cache
+import json
+import unicodedata
+from app.api.core.config import settings
+
+UNKNOWN_SOURCE = "Unknown"
+# Taxonomies with at least this many rules are matched in a single pass. Below it, one
+# substring search in C per rule is faster than stepping an automaton in Python.
+AUTOMATON_MIN_RULES = 256
+
+# Keyword and source of each category, in priority order
+DEFAULT_TAXONOMY: list[tuple[str, str]] = [
+    ("Ficción Espacial", "Ficcion Espacial"),
+    ("Ficción Tecnológica", "Ficcion Tecnologica"),
+    ("Naturaleza", "Naturaleza"),
+    ("Cuento Corto", "Cuento Corto"),
+    ("Héroe", "Características del Héroe Olvidado"),
+]
+
+
+def fold(text: str) -> str:
+    """Lowercase text and strip its accents, so "Ficción" and "ficcion" compare equal.
+
+    Args:
+        text (str): Text to fold
+
+    Returns:
+        str: Folded text
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton finding the highest-priority keyword of a text in one pass.
+
+    Every state knows the best priority of the keywords ending there, including the
+    ones reached through its failure links, so scanning a text costs one transition
+    per character however many keywords there are.
+    """
+
+    def __init__(self, keywords: list[str]) -> None:
+        """Build the automaton.
+
+        Args:
+            keywords (list[str]): Keywords in priority order, the first one highest
+        """
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail = [0]
+        self._best: list[int | None] = [None]
+        for priority, keyword in enumerate(keywords):
+            state = 0
+            for char in keyword:
+                following = self._goto[state].get(char)
+                if following is None:
+                    following = self._goto[state][char] = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                state = following
+            if self._best[state] is None:
+                self._best[state] = priority
+
+        # Breadth-first, so the failure target of a state is always complete before it
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, following in self._goto[state].items():
+                queue.append(following)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0) if state else 0
+                self._fail[following] = target
+                inherited = self._best[target]
+                if inherited is not None and (self._best[following] is None or inherited < self._best[following]):
+                    self._best[following] = inherited
+
+    def first(self, text: str) -> int | None:
+        """Find the highest-priority keyword contained in a text.
+
+        Args:
+            text (str): Text to scan
+
+        Returns:
+            int | None: Index of the keyword, or None if the text contains none
+        """
+        goto, fail, best = self._goto, self._fail, self._best
+        state = 0
+        found: int | None = None
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            priority = best[state]
+            if priority is not None and (found is None or priority < found):
+                found = priority
+                if found == 0:
+                    break
+        return found
+
+
+class SourceClassifier:
+    """Classify text into a source category with a configurable keyword taxonomy.
+
+    The highest-priority rule whose keyword the text contains wins. Large taxonomies
+    are matched in a single pass with a `KeywordAutomaton`. Small ones, like the
+    built-in taxonomy, are checked rule by rule in priority order, since each check is
+    a substring search in C that stops at the first rule found.
+    """
+
+    def __init__(self, taxonomy: list[tuple[str, str]], default: str = UNKNOWN_SOURCE) -> None:
+        """Compile the taxonomy.
+
+        Args:
+            taxonomy (list[tuple[str, str]]): (keyword, source) rules in priority order
+            default (str): Source of text that matches no rule
+        """
+        self.default = default
+        self._rules = list(taxonomy)
+        self._folded_rules = [(fold(keyword), source) for keyword, source in taxonomy]
+        self._automaton: KeywordAutomaton | None = None
+        self._folded_automaton: KeywordAutomaton | None = None
+        if len(self._rules) >= AUTOMATON_MIN_RULES:
+            self._automaton = KeywordAutomaton([keyword for keyword, _ in self._rules])
+            self._folded_automaton = KeywordAutomaton([keyword for keyword, _ in self._folded_rules])
+
+    @property
+    def sources(self) -> list[str]:
+        """Distinct sources of the taxonomy in priority order"""
+        return list(dict.fromkeys(source for _, source in self._rules))
+
+    def classify(self, text: str) -> str:
+        """Get the source of a document chunk from the exact keywords it contains.
+
+        Args:
+            text (str): Text to classify
+
+        Returns:
+            str: Source of the highest-priority matching rule, or the default source
+        """
+        if self._automaton is not None:
+            rule = self._automaton.first(text)
+            return self._rules[rule][1] if rule is not None else self.default
+        for keyword, source in self._rules:
+            if keyword in text:
+                return source
+        return self.default
+
+    def predict(self, query: str) -> str | None:
+        """Predict the source a query asks about, ignoring case and accents.
+
+        Args:
+            query (str): User query, e.g. "¿qué pasa en la ficcion espacial?"
+
+        Returns:
+            str | None: Source of the highest-priority matching rule, or None
+        """
+        folded = " ".join(fold(query).split())
+        if self._folded_automaton is not None:
+            rule = self._folded_automaton.first(folded)
+            return self._folded_rules[rule][1] if rule is not None else None
+        for keyword, source in self._folded_rules:
+            if keyword in folded:
+                return source
+        return None
+
+
+def load_taxonomy(path: str | None = None) -> list[tuple[str, str]]:
+    """Load the source taxonomy from a JSON file.
+
+    The file holds a list of {"keyword": ..., "source": ...} objects in priority order.
+
+    Args:
+        path (str | None): Path of the JSON file, None for the built-in taxonomy
+
+    Returns:
+        list[tuple[str, str]]: (keyword, source) rules in priority order
+    """
+    if not path:
+        return DEFAULT_TAXONOMY
+    with open(path, encoding="utf-8") as taxonomy_file:
+        return [(rule["keyword"], rule["source"]) for rule in json.load(taxonomy_file)]
+
+
+@lru_cache(maxsize=1)
+def get_source_classifier() -> SourceClassifier:
+    """Get the application-scoped classifier built from SOURCE_TAXONOMY_PATH.
+
+    Returns:
+        SourceClassifier: Shared classifier
+    """
+    return SourceClassifier(load_taxonomy(settings.get("SOURCE_TAXONOMY_PATH")))
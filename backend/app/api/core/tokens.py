@@ -0,0 +1,73 @@
+from functools import lru_cache
+import logging
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "cl100k_base"
+# Characters per token of the estimate used when no encoding is available
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str | None = None) -> tiktoken.Encoding | None:
+    """Get the tiktoken encoding of a model, loaded once per process.
+
+    Args:
+        model (str | None): Model name such as "gpt-4o" or "text-embedding-3-large"
+
+    Returns:
+        tiktoken.Encoding | None: The encoding, or None if it could not be loaded (e.g. offline)
+    """
+    try:
+        name = tiktoken.encoding_name_for_model(model) if model else DEFAULT_ENCODING
+    except KeyError:
+        name = DEFAULT_ENCODING
+
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning("Could not load tiktoken encoding, estimating token counts", extra={"encoding": name, "error": repr(e)})
+        return None
+
+
+def count_tokens(text: str, model: str | None = None) -> int:
+    """Count the tokens of a text for a model.
+
+    Falls back to an estimate of four characters per token when the encoding is unavailable.
+
+    Args:
+        text (str): Text to count
+        model (str | None): Model whose tokenizer to use
+
+    Returns:
+        int: Number of tokens
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str | None = None) -> str:
+    """Cut a text down to a number of tokens for a model.
+
+    Falls back to four characters per token when the encoding is unavailable.
+
+    Args:
+        text (str): Text to truncate
+        max_tokens (int): Maximum number of tokens to keep
+        model (str | None): Model whose tokenizer to use
+
+    Returns:
+        str: The text itself if it fits, otherwise its leading tokens
+    """
+    if max_tokens <= 0:
+        return ""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,117 @@
+import logging
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, Response
+from app.api.services.answer_cache import get_answer_cache
+from app.api.services.clients import client_pool
+from app.api.services.langgraph.graph_registry import graph_registry
+from app.api.services.langgraph.routing import routing_metrics
+from app.api.services.langgraph_service import get_answer_flights
+from app.api.services.rag_service import get_rag_service
+from app.api.services.session_store import get_session_store
+
+logger = logging.getLogger(__name__)
+
+# Create FastAPI router instance
+router = APIRouter()
+
+@router.get("/graphs", response_model=list[str])
+async def list_graphs():
+    """
+    Endpoint to list the registered LangGraph workflows.
+
+    Returns:
+        list[str]: Names of the registered graphs
+    """
+    return graph_registry.names()
+
+@router.get("/graphs/{name}/mermaid", response_class=PlainTextResponse)
+async def graph_mermaid(name: str):
+    """
+    Endpoint to get the Mermaid definition of a compiled graph. Rendered locally.
+
+    Args:
+        name (str): Name of the registered graph
+
+    Returns:
+        PlainTextResponse: Mermaid diagram source
+    """
+    try:
+        graph = graph_registry.get(name)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return graph.get_graph().draw_mermaid()
+
+@router.post("/graphs/{name}/render")
+async def render_graph(name: str):
+    """
+    Endpoint to render a compiled graph as a PNG through the Mermaid service.
+
+    The remote rendering is a blocking HTTP call, so it runs in the threadpool.
+
+    Args:
+        name (str): Name of the registered graph
+
+    Returns:
+        Response: PNG image of the graph
+
+    Raises:
+        HTTPException: 404 if the graph is not registered, 502 if the Mermaid service fails
+    """
+    try:
+        graph = graph_registry.get(name)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    try:
+        png = await run_in_threadpool(graph.get_graph().draw_mermaid_png)
+    except Exception as e:
+        logger.warning("Mermaid rendering failed", extra={"graph": name, "error": repr(e)})
+        raise HTTPException(status_code=502, detail="The Mermaid rendering service failed") from e
+    return Response(content=png, media_type="image/png")
+
+@router.get("/cache_stats", response_model=dict)
+async def cache_stats():
+    """
+    Endpoint to get hit/miss counters of the application caches.
+
+    Returns:
+        dict: Statistics per cache
+    """
+    answer_cache = get_answer_cache()
+    return {
+        "query_embeddings": client_pool.embeddings.stats(),
+        "answers": answer_cache.stats() if answer_cache else None
+    }
+
+@router.get("/routing_stats", response_model=dict)
+async def routing_stats():
+    """
+    Endpoint to get how often the supervisor routed by rules or fell back to the LLM.
+
+    Returns:
+        dict: Routing statistics
+    """
+    return routing_metrics.stats()
+
+@router.get("/coalescing_stats", response_model=dict)
+async def coalescing_stats():
+    """
+    Endpoint to get how many identical in-flight requests were collapsed into one computation.
+
+    Returns:
+        dict: Statistics for answers and retrieval
+    """
+    return {
+        "answers": get_answer_flights().stats(),
+        "retrieval": get_rag_service().coalescing_stats()
+    }
+
+@router.get("/session_stats", response_model=dict)
+async def session_stats():
+    """
+    Endpoint to get the number of stored conversation sessions and checkpoints.
+
+    Returns:
+        dict: Session statistics
+    """
+    return await get_session_store().stats()
@@ -1,27 +1,145 @@
-from fastapi import APIRouter, Depends
-from app.schemas.message import MessageRequest, MessageResponse
-from app.api.services.langgraph_service import LangGraphService
+import json
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from app.api.core.budget import BudgetExceeded
+from app.api.core.disconnect import ClientDisconnected, cancel_on_disconnect
+from app.schemas.message import MessageBatchRequest, MessageBatchResponse, MessageRequest, MessageResponse
+from app.api.services.langgraph_service import LangGraphService, get_langgraph_service
+
+logger = logging.getLogger(__name__)
 
 # Create FastAPI router instance
 router = APIRouter()
 
+# Not a standard status, the de facto one for work dropped because the client went away
+CLIENT_CLOSED_REQUEST = 499
+
 @router.post("/generate_message", response_model=MessageResponse)
-async def generate_message(request: MessageRequest, service: LangGraphService = Depends()):
+async def generate_message(
+    request: MessageRequest,
+    http_request: Request,
+    service: LangGraphService = Depends(get_langgraph_service)
+):
     """
     Endpoint to generate a message response using the LangGraph service.
     
+    Generation is bounded by REQUEST_TIMEOUT_SECONDS and WORKFLOW_MAX_STEPS and is
+    cancelled if the client disconnects. Questions with a `session_id` continue the
+    user's conversation session.
+    
     Args:
         request (MessageRequest): The incoming message request containing the question
+        http_request (Request): Raw request, used to detect client disconnects
         service (LangGraphService): Injected LangGraph service instance
         
     Returns:
         MessageResponse: The generated message response
     """
-    print(f"Received message generation request with question")
+    logger.info("Received message generation request", extra={"user_name": request.user_name})
     
     # Call LangGraph service to generate response
-    response = await service.generate_message(request.question)
+    try:
+        response = await cancel_on_disconnect(
+            http_request,
+            service.generate_message(
+                request.question, source=request.source, user_name=request.user_name, session_id=request.session_id
+            )
+        )
+    except BudgetExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ClientDisconnected:
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
     
     return response
 
+@router.post("/generate_message_batch", response_model=MessageBatchResponse)
+async def generate_message_batch(
+    request: MessageBatchRequest,
+    http_request: Request,
+    service: LangGraphService = Depends(get_langgraph_service)
+):
+    """
+    Endpoint to answer many questions in one request.
+    
+    Questions are embedded together and answered concurrently with a bounded
+    concurrency, each within its own time and step budget. A failing question does
+    not fail the others. Every question is cancelled if the client disconnects.
+    
+    Args:
+        request (MessageBatchRequest): The questions to answer
+        http_request (Request): Raw request, used to detect client disconnects
+        service (LangGraphService): Injected LangGraph service instance
+        
+    Returns:
+        MessageBatchResponse: Answer or error of every question, in request order
+    """
+    logger.info("Received batch message generation request", extra={"user_name": request.user_name, "questions": len(request.questions)})
+    try:
+        results = await cancel_on_disconnect(
+            http_request, service.generate_messages(request.questions, source=request.source)
+        )
+    except ClientDisconnected:
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    return {"results": [
+        {
+            "answer": result.value["answer"] if result.value else None,
+            "degraded": result.value["degraded"] if result.value else False,
+            "error": result.error
+        }
+        for result in results
+    ]}
+
+@router.post("/generate_message_stream")
+async def generate_message_stream(
+    request: MessageRequest,
+    http_request: Request,
+    service: LangGraphService = Depends(get_langgraph_service)
+):
+    """
+    Endpoint to generate a message response streamed as Server-Sent Events.
+    
+    Emits node progress events, the ANSWER and TRANSLATE_OUTPUT tokens as they are
+    generated and the final answer. Generation stops as soon as the client disconnects.
+    
+    Args:
+        request (MessageRequest): The incoming message request containing the question
+        http_request (Request): Raw request, used to detect client disconnects
+        service (LangGraphService): Injected LangGraph service instance
+        
+    Returns:
+        StreamingResponse: text/event-stream response
+    """
+    logger.info("Received streaming message generation request", extra={"user_name": request.user_name})
+
+    async def event_stream():
+        events = service.stream_message(
+            request.question, source=request.source, user_name=request.user_name, session_id=request.session_id
+        )
+        try:
+            async for event in events:
+                if await http_request.is_disconnected():
+                    logger.info("Client disconnected, cancelling generation")
+                    break
+                yield f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
+@router.delete("/sessions/{session_id}", status_code=204)
+async def delete_session(session_id: str, user_name: str, service: LangGraphService = Depends(get_langgraph_service)):
+    """
+    Endpoint to delete a conversation session and its stored state.
+    
+    Args:
+        session_id (str): Session to delete
+        user_name (str): Name of the user owning the session
+        service (LangGraphService): Injected LangGraph service instance
+    """
+    if not await service.delete_session(user_name, session_id):
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
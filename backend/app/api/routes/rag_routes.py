@@ -1,42 +1,122 @@
-from fastapi import APIRouter, UploadFile, File, Depends, Query
-from app.schemas.document import DocumentResponse, DocumentRetrievalResponse, Qna
-from app.api.services.rag_service import RAGService
+import logging
+from fastapi import APIRouter, UploadFile, File, Depends, Form, HTTPException, Query
+from app.schemas.document import DocumentBatchRequest, DocumentBatchResponse, DocumentRetrievalResponse, Qna
+from app.schemas.ingestion import IngestionJobResponse, IngestionJobStatus
+from app.api.services.ingestion_service import IngestionQueueFull, IngestionService, get_ingestion_service
+from app.api.services.rag_service import RAGService, get_rag_service
+
+logger = logging.getLogger(__name__)
 
 # Create FastAPI router instance
 router = APIRouter()
 
-@router.post("/upload_document", response_model=DocumentResponse)
-async def upload_document(file: UploadFile = File(...), service: RAGService = Depends()):
+async def _enqueue(files: list[UploadFile], collection: str | None, service: IngestionService) -> IngestionJobResponse:
+    """Enqueue uploaded files as an ingestion job, mapping failures to HTTP errors"""
+    try:
+        job = await service.submit(files, collection=collection)
+    except IngestionQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"job_id": job.job_id, "status": job.status, "files": [file.filename for file in job.files]}
+
+@router.post("/upload_document", response_model=IngestionJobResponse, status_code=202)
+async def upload_document(
+    file: UploadFile = File(...),
+    collection: str | None = Form(None),
+    service: IngestionService = Depends(get_ingestion_service)
+):
     """
-    Endpoint to upload a document for RAG processing.
+    Endpoint to upload a document for RAG processing in the background.
     
     Args:
         file (UploadFile): The document file to upload
-        service (RAGService): Injected RAG service instance
+        collection (str | None): Collection the document belongs to, e.g. a user or project
+        service (IngestionService): Injected ingestion service instance
+        
+    Returns:
+        IngestionJobResponse: ID of the ingestion job to poll at /rag/jobs/{job_id}
+    """
+    logger.info("Received document upload request", extra={"document": file.filename})
+    return await _enqueue([file], collection, service)
+
+@router.post("/upload_documents", response_model=IngestionJobResponse, status_code=202)
+async def upload_documents(
+    files: list[UploadFile] = File(...),
+    collection: str | None = Form(None),
+    service: IngestionService = Depends(get_ingestion_service)
+):
+    """
+    Endpoint to upload many documents, or zip archives of documents, as one ingestion job.
+    
+    Args:
+        files (list[UploadFile]): The .docx documents or .zip archives to upload
+        collection (str | None): Collection the documents belong to, e.g. a user or project
+        service (IngestionService): Injected ingestion service instance
+        
+    Returns:
+        IngestionJobResponse: ID of the ingestion job to poll at /rag/jobs/{job_id}
+    """
+    logger.info("Received bulk document upload request", extra={"files": len(files)})
+    return await _enqueue(files, collection, service)
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobStatus)
+async def get_job(job_id: str, service: IngestionService = Depends(get_ingestion_service)):
+    """
+    Endpoint to get the progress of an ingestion job.
+    
+    Args:
+        job_id (str): Identifier returned by the upload endpoints
+        service (IngestionService): Injected ingestion service instance
         
     Returns:
-        DocumentResponse: Response containing upload status and document info
+        IngestionJobStatus: Status, chunk counts and failures per file
     """
-    print(f"Received document upload request for file: {file.filename}")
-    return await service.upload_document(file)
+    job = service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
 
 @router.post("/query_document", response_model=DocumentRetrievalResponse) 
-async def query_document(query: str = Query(...), service: RAGService = Depends()):
+async def query_document(
+    query: str = Query(...),
+    source: list[str] | None = Query(None),
+    service: RAGService = Depends(get_rag_service)
+):
     """
     Endpoint to query uploaded documents using RAG.
     
     Args:
         query (str): The query string to search for
+        source (list[str] | None): Only search documents of these sources, e.g. "QnA" or "Naturaleza"
         service (RAGService): Injected RAG service instance
         
     Returns:
         DocumentRetrievalResponse: Retrieved document chunks and generated response
     """
-    print(f"Received document query request: {query}")
-    return await service.query_document(query)
+    logger.info("Received document query request", extra={"query": query})
+    documents = await service.query_document(query, source=source)
+    return {"documents": documents}
+
+@router.post("/query_document_batch", response_model=DocumentBatchResponse)
+async def query_document_batch(request: DocumentBatchRequest, service: RAGService = Depends(get_rag_service)):
+    """
+    Endpoint to query uploaded documents for many queries in one request.
+    
+    Args:
+        request (DocumentBatchRequest): Queries, results per query and optional source filter
+        service (RAGService): Injected RAG service instance
+        
+    Returns:
+        DocumentBatchResponse: Documents or error of every query, in request order
+    """
+    logger.info("Received batch document query request", extra={"queries": len(request.queries)})
+    results = await service.query_documents(request.queries, k=request.k, source=request.source)
+    return {"results": [{"documents": result.value or [], "error": result.error} for result in results]}
 
 @router.post("/upload_qna", response_model=dict)
-async def upload_qna(qna: Qna, service: RAGService = Depends()):
+async def upload_qna(qna: Qna, service: RAGService = Depends(get_rag_service)):
     """
     Endpoint to upload Q&A pairs for RAG.
     
@@ -47,5 +127,5 @@ async def upload_qna(qna: Qna, service: RAGService = Depends()):
     Returns:
         DocumentRetrievalResponse: Response containing upload status
     """
-    print(f"Received Q&A upload request")
+    logger.info("Received Q&A upload request")
     return await service.upload_qna(qna)
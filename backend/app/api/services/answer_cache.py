@@ -0,0 +1,219 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from threading import Lock
+from langchain_core.embeddings import Embeddings
+import numpy as np
+from app.api.core.cache import TTLLRUCache, hash_key, normalize_text
+from app.api.core.config import settings
+from app.api.core.corpus import corpus_version
+from app.api.core.metrics import CACHE_REQUESTS
+from app.api.services.clients import client_pool
+
+
+@dataclass
+class CachedAnswer:
+    """Answer stored in the answer cache.
+
+    Attributes:
+        answer (str): Final answer returned by the workflow
+        document_ids (list[str]): IDs of the documents retrieved to build the answer
+    """
+    answer: str
+    document_ids: list[str] = field(default_factory=list)
+
+
+class AnswerCache:
+    """Cache of final answers matching exact and near-duplicate questions.
+
+    Exact matches are found by hashing the normalized question. Near duplicates are
+    found by cosine similarity between question embeddings, kept in a matrix of
+    `maxsize` rows allocated once and reused as answers leave the cache. Every entry
+    belongs to a corpus version and the whole cache is dropped once the corpus changes.
+
+    Attributes:
+        exact_hits (int): Lookups answered by an exact question match
+        semantic_hits (int): Lookups answered by a near-duplicate question
+        misses (int): Lookups that reached the workflow
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings | None,
+        threshold: float = 0.95,
+        maxsize: int = 1000,
+        ttl: float | None = 86400
+    ) -> None:
+        """Initialize the answer cache.
+
+        Args:
+            embeddings (Embeddings | None): Embeddings used for near-duplicate matching, None for exact only
+            threshold (float): Minimum cosine similarity for a near-duplicate hit
+            maxsize (int): Maximum number of cached answers
+            ttl (float | None): Seconds an answer stays valid
+        """
+        self._embeddings = embeddings
+        self._threshold = threshold
+        self._maxsize = maxsize
+        self._answers = TTLLRUCache(maxsize=maxsize, ttl=ttl, on_evict=self._forget)
+        # Row holding the question vector of every key, and the key held by every row
+        self._slots: dict[str, int] = {}
+        self._slot_keys: list[str | None] = [None] * maxsize
+        self._free = list(range(maxsize - 1, -1, -1))
+        self._used = np.zeros(maxsize, dtype=bool)
+        self._vectors: np.ndarray | None = None
+        self._version = corpus_version.version
+        self._lock = Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @property
+    def semantic(self) -> bool:
+        """Whether questions are embedded to find similar cached ones"""
+        return self._embeddings is not None
+
+    @staticmethod
+    def _key(question: str) -> str:
+        """Cache key of a question, insensitive to case and whitespace"""
+        return hash_key(normalize_text(question).casefold())
+
+    @staticmethod
+    def _unit(vector: list[float]) -> np.ndarray:
+        """Normalize a vector to unit length so dot products are cosine similarities"""
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def _check_version(self) -> None:
+        """Drop every entry if the corpus changed since they were stored"""
+        with self._lock:
+            if self._version != corpus_version.version:
+                self._reset()
+
+    def _forget(self, key: str) -> None:
+        """Free the vector row of an answer that left the cache"""
+        with self._lock:
+            slot = self._slots.pop(key, None)
+            if slot is not None:
+                self._used[slot] = False
+                self._slot_keys[slot] = None
+                self._free.append(slot)
+
+    async def lookup(self, question: str) -> CachedAnswer | None:
+        """Find a cached answer for a question.
+
+        Args:
+            question (str): Question asked by the user
+
+        Returns:
+            CachedAnswer | None: The cached answer or None on a miss
+        """
+        self._check_version()
+
+        cached = self._answers.get(self._key(question))
+        if cached is not None:
+            self.exact_hits += 1
+            CACHE_REQUESTS.labels(cache="answers", result="exact_hit").inc()
+            return cached
+
+        if self._embeddings is not None and self._slots:
+            query = self._unit(await self._embeddings.aembed_query(question))
+            with self._lock:
+                # Free rows keep stale vectors, so they are masked out of the search
+                similarities = np.where(self._used, self._vectors @ query, -np.inf)
+                candidates = np.flatnonzero(similarities >= self._threshold)
+                # Best match first, falling back to the next one when an answer has expired
+                keys = [self._slot_keys[slot] for slot in candidates[np.argsort(-similarities[candidates])]]
+            for key in keys:
+                cached = self._answers.get(key)
+                if cached is not None:
+                    self.semantic_hits += 1
+                    CACHE_REQUESTS.labels(cache="answers", result="semantic_hit").inc()
+                    return cached
+                self._forget(key)
+
+        self.misses += 1
+        CACHE_REQUESTS.labels(cache="answers", result="miss").inc()
+        return None
+
+    async def store(self, question: str, answer: str, document_ids: list[str], version: int) -> None:
+        """Store the answer produced for a question.
+
+        Args:
+            question (str): Question asked by the user
+            answer (str): Final answer of the workflow
+            document_ids (list[str]): IDs of the documents used to answer
+            version (int): Corpus version the answer was computed against
+        """
+        self._check_version()
+        if version != self._version:
+            # The corpus changed while the answer was being generated
+            return
+
+        key = self._key(question)
+        self._answers.expire()
+        self._answers.set(key, CachedAnswer(answer=answer, document_ids=document_ids))
+
+        if self._embeddings is None:
+            return
+
+        vector = self._unit(await self._embeddings.aembed_query(question))
+        with self._lock:
+            # Evicted answers free their rows, so there are as many rows as answers to index
+            if key in self._slots or self._version != version or not self._free:
+                return
+            if self._vectors is None or self._vectors.shape[1] != len(vector):
+                self._vectors = np.zeros((self._maxsize, len(vector)), dtype=np.float32)
+            slot = self._free.pop()
+            self._vectors[slot] = vector
+            self._used[slot] = True
+            self._slot_keys[slot] = key
+            self._slots[key] = slot
+
+    def invalidate(self) -> None:
+        """Drop every cached answer and adopt the current corpus version"""
+        with self._lock:
+            self._reset()
+
+    def _reset(self) -> None:
+        """Drop every cached answer and adopt the current corpus version, inside the lock"""
+        self._answers.clear()
+        self._slots = {}
+        self._slot_keys = [None] * self._maxsize
+        self._free = list(range(self._maxsize - 1, -1, -1))
+        self._used[:] = False
+        self._version = corpus_version.version
+
+    def stats(self) -> dict:
+        """Get hit/miss counters.
+
+        Returns:
+            dict: Cache statistics
+        """
+        return {
+            "size": len(self._answers),
+            "maxsize": self._maxsize,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "corpus_version": self._version
+        }
+
+
+@lru_cache(maxsize=1)
+def get_answer_cache() -> AnswerCache | None:
+    """Get the application-scoped answer cache, or None when disabled in settings.
+
+    Returns:
+        AnswerCache | None: Shared answer cache
+    """
+    if not settings.get_bool("ANSWER_CACHE_ENABLED", True):
+        return None
+
+    threshold = settings.get_float("ANSWER_CACHE_SIMILARITY_THRESHOLD", 0.95)
+    return AnswerCache(
+        client_pool.embeddings if threshold < 1 else None,
+        threshold=threshold,
+        maxsize=settings.get_int("ANSWER_CACHE_SIZE", 1000),
+        ttl=settings.get_float("ANSWER_CACHE_TTL", 86400)
+    )
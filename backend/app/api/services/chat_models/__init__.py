@@ -0,0 +1,3 @@
+from app.api.services.chat_models.stub import StubChatModel
+
+__all__ = ["StubChatModel"]
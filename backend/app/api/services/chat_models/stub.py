@@ -0,0 +1,171 @@
+from typing import Any, AsyncIterator, Callable, Iterator, Sequence
+import json
+import re
+import uuid
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field
+from app.api.core.language import detect_language
+from app.api.core.tokens import count_tokens
+
+_TRANSLATE_TEXT = re.compile(r"#TEXT\n(.*)", re.DOTALL)
+_ANSWER_WORDS = (
+    "Según el contexto recuperado la historia describe a sus protagonistas y los desafíos que enfrentan "
+    "en un mundo lejano donde la tecnología y la naturaleza conviven en un equilibrio frágil"
+).split()
+
+
+class StubChatModel(BaseChatModel):
+    """Local chat model with deterministic replies, for tests and offline benchmarks.
+
+    It makes no network call. Plain calls answer with a fixed Spanish paragraph of
+    `answer_tokens` words, or echo the `#TEXT` section of translation prompts, streamed
+    word by word. Structured output calls fill the
+    schema the way the workflow expects: route fields go to RETRIEVAL until the
+    history holds an answer and to FINISH after, text fields echo the `#TEXT` section
+    and language fields hold the locally detected language.
+
+    Attributes:
+        model_name (str): Name reported to callbacks and metrics
+        answer_tokens (int): Words of a plain reply
+    """
+    model_name: str = Field(default="stub", alias="model")
+    answer_tokens: int = 60
+
+    @property
+    def _llm_type(self) -> str:
+        """Type of the chat model"""
+        return "stub"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        """Parameters identifying the model"""
+        return {"model_name": self.model_name, "answer_tokens": self.answer_tokens}
+
+    def bind_tools(
+        self, tools: Sequence[dict[str, Any] | type | Callable | BaseTool], **kwargs: Any
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        """Bind tools, of which the first one is always called.
+
+        Args:
+            tools (Sequence[dict[str, Any] | type | Callable | BaseTool]): Tools the model may call
+            **kwargs (Any): Ignored tool choice and other options
+
+        Returns:
+            Runnable[LanguageModelInput, BaseMessage]: This model bound to the tools
+        """
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools])
+
+    @staticmethod
+    def _arguments(function: dict, prompt: str) -> dict:
+        """Fill the parameters of a tool from the prompt"""
+        match = _TRANSLATE_TEXT.search(prompt)
+        text = match.group(1).strip() if match else prompt
+        arguments = {}
+        for name, schema in function["parameters"].get("properties", {}).items():
+            options = schema.get("enum")
+            if options:
+                # Mirror the supervisor prompt: finish once the workflow has an answer
+                route = "FINISH" if "ANSWER:" in prompt else "RETRIEVAL"
+                arguments[name] = route if route in options else options[0]
+            elif name == "language":
+                arguments[name] = detect_language(text) or "English"
+            else:
+                arguments[name] = text
+        return arguments
+
+    def _reply(self, messages: list[BaseMessage], tools: list[dict] | None) -> AIMessage:
+        """Build the reply to a conversation"""
+        prompt = "\n".join(str(message.content) for message in messages)
+        usage = {"input_tokens": count_tokens(prompt, self.model_name)}
+        if tools:
+            function = tools[0]["function"]
+            arguments = self._arguments(function, prompt)
+            usage["output_tokens"] = count_tokens(json.dumps(arguments), self.model_name)
+            usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+            return AIMessage(
+                content="",
+                tool_calls=[{"name": function["name"], "args": arguments, "id": f"call_{uuid.uuid4().hex[:24]}"}],
+                usage_metadata=usage
+            )
+
+        match = _TRANSLATE_TEXT.search(prompt)
+        if match:
+            content = match.group(1).strip()
+        else:
+            content = " ".join(_ANSWER_WORDS[i % len(_ANSWER_WORDS)] for i in range(self.answer_tokens)) + "."
+        usage["output_tokens"] = len(content.split())
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return AIMessage(content=content, usage_metadata=usage)
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        """Reply to a conversation"""
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages, kwargs.get("tools")))])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        """Reply to a conversation without leaving the event loop"""
+        return self._generate(messages, stop, **kwargs)
+
+    def _chunks(self, messages: list[BaseMessage], tools: list[dict] | None) -> Iterator[ChatGenerationChunk]:
+        """Split the reply to a conversation into word chunks, with the usage on the last one"""
+        reply = self._reply(messages, tools)
+        if reply.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[{
+                    "name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": 0
+                } for call in reply.tool_calls],
+                usage_metadata=reply.usage_metadata
+            ))
+            return
+
+        words = reply.content.split(" ")
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content=word if last else word + " ",
+                usage_metadata=reply.usage_metadata if last else None
+            ))
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        """Stream the reply to a conversation word by word"""
+        for chunk in self._chunks(messages, kwargs.get("tools")):
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """Stream the reply to a conversation word by word without leaving the event loop"""
+        for chunk in self._chunks(messages, kwargs.get("tools")):
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
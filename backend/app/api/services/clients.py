@@ -0,0 +1,190 @@
+from contextlib import ExitStack
+import os
+import httpx
+from pinecone import Pinecone
+from langchain_core.vectorstores import VectorStore
+from langchain_openai import OpenAIEmbeddings
+from app.api.core.cache import SQLiteStore
+from app.api.core.config import settings
+from app.api.services.embedding_cache import CachedEmbeddings
+from app.api.services.llm_service import ROLES, LLMService, model_profile
+from app.api.services.vectorstores import LocalMmapVectorStore, PooledPineconeVectorStore
+
+
+class ClientPool:
+    """Process-wide pool of upstream clients shared by routes and LangGraph nodes.
+
+    Clients are created lazily on first use (or eagerly by `startup`) and reuse
+    pooled keep-alive HTTP connections, so requests never pay for new TLS or
+    index handshakes.
+
+    Attributes:
+        _http_client (httpx.Client): Pooled sync HTTP client for OpenAI calls
+        _http_async_client (httpx.AsyncClient): Pooled async HTTP client for OpenAI calls
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty pool. No connection is opened until a client is requested."""
+        self._http_client: httpx.Client | None = None
+        self._http_async_client: httpx.AsyncClient | None = None
+        self._embeddings: CachedEmbeddings | None = None
+        self._vector_store: VectorStore | None = None
+        self._chat_models: dict[tuple[str, str], LLMService] = {}
+        self._exit_stack = ExitStack()
+
+    def _limits(self) -> httpx.Limits:
+        """Build the HTTP connection pool limits from settings"""
+        return httpx.Limits(
+            max_connections=settings.get_int("HTTP_MAX_CONNECTIONS", 100),
+            max_keepalive_connections=settings.get_int("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20),
+            keepalive_expiry=settings.get_float("HTTP_KEEPALIVE_EXPIRY", 30.0),
+        )
+
+    def _timeout(self) -> httpx.Timeout:
+        """Build the HTTP timeout from settings"""
+        return httpx.Timeout(settings.get_float("HTTP_TIMEOUT", 60.0), connect=5.0)
+
+    @property
+    def http_client(self) -> httpx.Client:
+        """Pooled synchronous HTTP client"""
+        if self._http_client is None:
+            self._http_client = httpx.Client(limits=self._limits(), timeout=self._timeout())
+        return self._http_client
+
+    @property
+    def http_async_client(self) -> httpx.AsyncClient:
+        """Pooled asynchronous HTTP client"""
+        if self._http_async_client is None:
+            self._http_async_client = httpx.AsyncClient(limits=self._limits(), timeout=self._timeout())
+        return self._http_async_client
+
+    @property
+    def embeddings(self) -> CachedEmbeddings:
+        """Shared OpenAI embeddings client behind the query embedding cache"""
+        if self._embeddings is None:
+            model = settings.get("EMBEDDING_MODEL", "text-embedding-3-large")
+            embeddings = OpenAIEmbeddings(
+                model=model,
+                api_key=settings.get("OPENAI_API_KEY"),
+                base_url=settings.get("OPENAI_BASE_URL") or None,
+                check_embedding_ctx_length=settings.get_bool("EMBEDDING_CHECK_CTX_LENGTH", True),
+                http_client=self.http_client,
+                http_async_client=self.http_async_client
+            )
+
+            ttl = settings.get_float("EMBEDDING_CACHE_TTL", 3600) or None
+            path = settings.get("EMBEDDING_CACHE_PATH")
+            store = None
+            if path:
+                if os.path.dirname(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                store = SQLiteStore(
+                    path,
+                    "query_embeddings",
+                    ttl=ttl,
+                    maxsize=settings.get_int("EMBEDDING_CACHE_DISK_SIZE", 100000)
+                )
+                self._exit_stack.callback(store.close)
+
+            self._embeddings = CachedEmbeddings(
+                embeddings,
+                model=model,
+                dimensions=embeddings.dimensions,
+                maxsize=settings.get_int("EMBEDDING_CACHE_SIZE", 10000),
+                ttl=ttl,
+                store=store
+            )
+        return self._embeddings
+
+    def _pinecone_vector_store(self) -> PooledPineconeVectorStore:
+        """Pinecone vector store bound to a single pooled index connection"""
+        pool_threads = settings.get_int("PINECONE_POOL_THREADS", 4)
+        client = Pinecone(api_key=settings.get("PINECONE_API_KEY"), pool_threads=pool_threads)
+        index = client.Index(
+            name=settings.get("PINECONE_INDEX_NAME", "piconsulting"),
+            host=settings.get("PINECONE_INDEX_HOST", ""),
+            pool_threads=pool_threads
+        )
+        self._exit_stack.enter_context(index)
+        return PooledPineconeVectorStore(index, self.embeddings)
+
+    def _local_vector_store(self) -> LocalMmapVectorStore:
+        """Memory-mapped vector store on the local disk"""
+        store = LocalMmapVectorStore(
+            settings.get("LOCAL_VECTOR_STORE_PATH", "data/vector_index"),
+            self.embeddings,
+            dtype=settings.get("LOCAL_VECTOR_STORE_DTYPE", "float32"),
+            read_only=settings.get_bool("LOCAL_VECTOR_STORE_READ_ONLY", False)
+        )
+        self._exit_stack.callback(store.close)
+        return store
+
+    @property
+    def vector_store(self) -> VectorStore:
+        """Shared vector store, Pinecone or the local memory-mapped index per VECTOR_STORE_BACKEND"""
+        if self._vector_store is None:
+            backend = settings.get("VECTOR_STORE_BACKEND", "pinecone")
+            if backend == "local":
+                self._vector_store = self._local_vector_store()
+            elif backend == "pinecone":
+                self._vector_store = self._pinecone_vector_store()
+            else:
+                raise ValueError(f"Unsupported vector store backend {backend}, expected pinecone or local")
+        return self._vector_store
+
+    def chat(self, model: str, provider: str = "openai") -> LLMService:
+        """Get the shared LLM service for a provider and model.
+
+        Args:
+            model (str): Name of the model to use
+            provider (str): LLM provider name
+
+        Returns:
+            LLMService: Shared LLM service using the pooled HTTP clients
+        """
+        key = (provider, model)
+        if key not in self._chat_models:
+            self._chat_models[key] = LLMService(
+                provider,
+                model,
+                http_client=self.http_client,
+                http_async_client=self.http_async_client
+            )
+        return self._chat_models[key]
+
+    def for_role(self, role: str) -> LLMService:
+        """Get the shared LLM service of a workflow role's model profile.
+
+        Args:
+            role (str): "supervisor", "translator" or "answer"
+
+        Returns:
+            LLMService: Shared LLM service, the same one for roles with the same profile
+        """
+        provider, model = model_profile(role)
+        return self.chat(model, provider)
+
+    def startup(self) -> None:
+        """Eagerly create the embeddings, vector store and the chat clients of every role"""
+        self.embeddings
+        self.vector_store
+        for role in ROLES:
+            self.for_role(role)
+
+    async def shutdown(self) -> None:
+        """Close pooled connections and drop every client"""
+        self._exit_stack.close()
+        if self._http_async_client is not None:
+            await self._http_async_client.aclose()
+        if self._http_client is not None:
+            self._http_client.close()
+
+        self._http_client = None
+        self._http_async_client = None
+        self._embeddings = None
+        self._vector_store = None
+        self._chat_models.clear()
+        self._exit_stack = ExitStack()
+
+
+client_pool = ClientPool()
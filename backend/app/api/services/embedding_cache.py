@@ -0,0 +1,180 @@
+from fastapi.concurrency import run_in_threadpool
+from langchain_core.embeddings import Embeddings
+import numpy as np
+from app.api.core.cache import SQLiteStore, TTLLRUCache, hash_key, normalize_text
+from app.api.core.metrics import CACHE_REQUESTS, EMBEDDING_CALL_DURATION, EMBEDDING_TEXTS, timed
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper caching query vectors in memory and optionally on disk.
+
+    Lookups go to the in-process LRU first, then to the persistent store, and only
+    reach the wrapped embeddings client on a miss in both. Document embeddings are
+    passed through untouched since they are computed once per ingestion.
+
+    Attributes:
+        disk_hits (int): Number of query lookups answered by the persistent store
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: str,
+        dimensions: int | None = None,
+        maxsize: int = 10000,
+        ttl: float | None = 3600,
+        store: SQLiteStore | None = None
+    ) -> None:
+        """Wrap an embeddings client with a two-tier query cache.
+
+        Args:
+            embeddings (Embeddings): Embeddings client to wrap
+            model (str): Embedding model name, part of the cache key
+            dimensions (int | None): Requested vector dimensions, part of the cache key
+            maxsize (int): Maximum entries of the in-process LRU
+            ttl (float | None): Seconds an in-process entry stays valid
+            store (SQLiteStore | None): Optional persistent second tier
+        """
+        self._embeddings = embeddings
+        self._model = model
+        self._dimensions = dimensions
+        self._memory = TTLLRUCache(maxsize=maxsize, ttl=ttl)
+        self._store = store
+        self.disk_hits = 0
+
+    @property
+    def embeddings(self) -> Embeddings:
+        """The wrapped embeddings client"""
+        return self._embeddings
+
+    def _key(self, text: str) -> str:
+        """Cache key for a query text under the configured model and dimensions"""
+        return hash_key(self._model, self._dimensions, normalize_text(text))
+
+    def _load(self, key: str) -> list[float] | None:
+        """Load a vector from the persistent store, promoting hits to memory"""
+        raw = self._store.get(key)
+        if raw is None:
+            return None
+
+        self.disk_hits += 1
+        CACHE_REQUESTS.labels(cache="query_embeddings", result="disk_hit").inc()
+        vector = np.frombuffer(raw, dtype=np.float32).tolist()
+        self._memory.set(key, vector)
+        return vector
+
+    def _save(self, key: str, vector: list[float]) -> None:
+        """Store a vector in both tiers"""
+        self._memory.set(key, vector)
+        if self._store is not None:
+            self._store.set(key, np.asarray(vector, dtype=np.float32).tobytes())
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a query, answering from the cache when possible"""
+        key = self._key(text)
+        vector = self._memory.get(key)
+        if vector is not None:
+            CACHE_REQUESTS.labels(cache="query_embeddings", result="memory_hit").inc()
+            return vector
+        if self._store is not None:
+            vector = self._load(key)
+        if vector is None:
+            CACHE_REQUESTS.labels(cache="query_embeddings", result="miss").inc()
+            with self._embedding_call("query", 1):
+                vector = self._embeddings.embed_query(text)
+            self._save(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> list[float]:
+        """Embed a query asynchronously, answering from the cache when possible"""
+        key = self._key(text)
+        vector = self._memory.get(key)
+        if vector is not None:
+            CACHE_REQUESTS.labels(cache="query_embeddings", result="memory_hit").inc()
+            return vector
+        if self._store is not None:
+            vector = await run_in_threadpool(self._load, key)
+        if vector is None:
+            CACHE_REQUESTS.labels(cache="query_embeddings", result="miss").inc()
+            with self._embedding_call("query", 1):
+                vector = await self._embeddings.aembed_query(text)
+            if self._store is None:
+                self._memory.set(key, vector)
+            else:
+                await run_in_threadpool(self._save, key, vector)
+        return vector
+
+    async def aembed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Embed many queries, sending every cache miss in a single batched request.
+
+        The vectors are cached, so later `aembed_query` calls for the same texts are
+        answered without another round trip.
+
+        Args:
+            texts (list[str]): Query texts
+
+        Returns:
+            list[list[float]]: Vector of each text, in order
+        """
+        keys = [self._key(text) for text in texts]
+        vectors: dict[str, list[float]] = {}
+        for key in dict.fromkeys(keys):
+            vector = self._memory.get(key)
+            if vector is not None:
+                CACHE_REQUESTS.labels(cache="query_embeddings", result="memory_hit").inc()
+            elif self._store is not None:
+                vector = await run_in_threadpool(self._load, key)
+            if vector is not None:
+                vectors[key] = vector
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            CACHE_REQUESTS.labels(cache="query_embeddings", result="miss").inc(len(missing))
+            # Query and document embeddings are the same vectors for the OpenAI models
+            with self._embedding_call("query_batch", len(missing)):
+                embedded = await self._embeddings.aembed_documents(list(missing.values()))
+            for key, vector in zip(missing, embedded):
+                vectors[key] = vector
+                if self._store is None:
+                    self._memory.set(key, vector)
+                else:
+                    await run_in_threadpool(self._save, key, vector)
+        return [vectors[key] for key in keys]
+
+    def _embedding_call(self, operation: str, texts: int):
+        """Time a call to the wrapped client and count the texts it embeds"""
+        EMBEDDING_TEXTS.labels(operation).inc(texts)
+        return timed(EMBEDDING_CALL_DURATION, "embeddings", operation=operation)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed documents through the wrapped client"""
+        with self._embedding_call("documents", len(texts)):
+            return self._embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed documents asynchronously through the wrapped client"""
+        with self._embedding_call("documents", len(texts)):
+            return await self._embeddings.aembed_documents(texts)
+
+    def clear(self) -> None:
+        """Drop every cached vector from both tiers"""
+        self._memory.clear()
+        if self._store is not None:
+            self._store.clear()
+
+    def stats(self) -> dict:
+        """Get hit/miss counters for both tiers.
+
+        Returns:
+            dict: Cache statistics
+        """
+        memory = self._memory.stats()
+        return {
+            "model": self._model,
+            "size": memory["size"],
+            "maxsize": memory["maxsize"],
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": memory["misses"] - self.disk_hits,
+            "persistent": self._store is not None
+        }
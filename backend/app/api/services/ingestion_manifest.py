@@ -0,0 +1,131 @@
+from threading import Lock
+from typing import Iterable
+import os
+import sqlite3
+import time
+from app.api.core.cache import hash_key, normalize_text
+
+
+def chunk_id(text: str) -> str:
+    """Deterministic ID of a chunk derived from its normalized content.
+
+    Args:
+        text (str): Chunk content
+
+    Returns:
+        str: SHA-256 hex digest of the normalized content
+    """
+    return hash_key(normalize_text(text))
+
+
+class IngestionManifest:
+    """Local record of the chunk IDs indexed for every ingested document.
+
+    Chunk IDs are content hashes shared across documents, so a chunk is only
+    embedded while no document references it and only deleted from the indexes
+    once no document references it anymore.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Open (and create if needed) the manifest.
+
+        Args:
+            path (str): Path of the SQLite database file
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.__lock = Lock()
+        self.__conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self.__conn.execute("PRAGMA journal_mode=WAL")
+        self.__conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "document TEXT NOT NULL, chunk_id TEXT NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (document, chunk_id))"
+        )
+        self.__conn.execute("CREATE INDEX IF NOT EXISTS chunks_chunk_id ON chunks (chunk_id)")
+        self.__conn.commit()
+
+    def chunk_ids(self, document: str) -> set[str]:
+        """Get the chunk IDs recorded for a document.
+
+        Args:
+            document (str): Document key, e.g. the uploaded filename
+
+        Returns:
+            set[str]: IDs of the document's chunks
+        """
+        with self.__lock:
+            rows = self.__conn.execute("SELECT chunk_id FROM chunks WHERE document = ?", (document,)).fetchall()
+        return {row[0] for row in rows}
+
+    def referenced(self, chunk_ids: Iterable[str]) -> set[str]:
+        """Get which of the given chunk IDs are recorded for any document.
+
+        Args:
+            chunk_ids (Iterable[str]): Chunk IDs to look up
+
+        Returns:
+            set[str]: The IDs that are already indexed
+        """
+        chunk_ids = list(chunk_ids)
+        found: set[str] = set()
+        with self.__lock:
+            # Stay below SQLite's limit on bound parameters
+            for start in range(0, len(chunk_ids), 500):
+                batch = chunk_ids[start:start + 500]
+                rows = self.__conn.execute(
+                    f"SELECT DISTINCT chunk_id FROM chunks WHERE chunk_id IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def add(self, document: str, chunk_ids: Iterable[str]) -> None:
+        """Record chunk IDs for a document, keeping the ones already recorded.
+
+        Args:
+            document (str): Document key
+            chunk_ids (Iterable[str]): IDs of the chunks to record
+        """
+        now = time.time()
+        with self.__lock:
+            self.__conn.executemany(
+                "INSERT OR REPLACE INTO chunks (document, chunk_id, updated_at) VALUES (?, ?, ?)",
+                [(document, id_, now) for id_ in chunk_ids]
+            )
+            self.__conn.commit()
+
+    def replace(self, document: str, chunk_ids: Iterable[str]) -> None:
+        """Record exactly the given chunk IDs for a document.
+
+        Args:
+            document (str): Document key
+            chunk_ids (Iterable[str]): IDs of all the document's chunks
+        """
+        now = time.time()
+        with self.__lock:
+            self.__conn.execute("DELETE FROM chunks WHERE document = ?", (document,))
+            self.__conn.executemany(
+                "INSERT OR REPLACE INTO chunks (document, chunk_id, updated_at) VALUES (?, ?, ?)",
+                [(document, id_, now) for id_ in chunk_ids]
+            )
+            self.__conn.commit()
+
+    def remove(self, document: str, chunk_ids: Iterable[str]) -> None:
+        """Forget chunk IDs recorded for a document.
+
+        Args:
+            document (str): Document key
+            chunk_ids (Iterable[str]): IDs of the chunks to forget
+        """
+        with self.__lock:
+            self.__conn.executemany(
+                "DELETE FROM chunks WHERE document = ? AND chunk_id = ?",
+                [(document, id_) for id_ in chunk_ids]
+            )
+            self.__conn.commit()
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self.__lock:
+            self.__conn.close()
@@ -0,0 +1,337 @@
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Iterable, Iterator, Sized, TypeVar
+import asyncio
+import logging
+import random
+import time
+import uuid
+from fastapi.concurrency import run_in_threadpool
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from app.api.core.metrics import VECTOR_STORE_CALL_DURATION, timed
+from app.api.core.tokens import count_tokens
+from app.api.services.vectorstores import LocalMmapVectorStore, PooledPineconeVectorStore
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PipelineStats:
+    """Throughput of an ingestion pipeline run.
+
+    Attributes:
+        chunks (int): Number of chunks embedded and upserted
+        skipped (int): Number of chunks left untouched because they were already indexed
+        deleted (int): Number of chunks removed because the document no longer contains them
+        tokens (int): Number of tokens embedded
+        batches (int): Number of embedding batches
+        retries (int): Number of calls retried after a rate limit or server error
+        elapsed (float): Wall-clock seconds of the run
+    """
+    chunks: int = 0
+    skipped: int = 0
+    deleted: int = 0
+    tokens: int = 0
+    batches: int = 0
+    retries: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        """Chunks processed per second"""
+        return self.chunks / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Tokens embedded per second"""
+        return self.tokens / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> dict:
+        """Get the statistics as a dictionary including throughput"""
+        return {
+            "chunks": self.chunks,
+            "skipped": self.skipped,
+            "deleted": self.deleted,
+            "tokens": self.tokens,
+            "batches": self.batches,
+            "retries": self.retries,
+            "elapsed": round(self.elapsed, 3),
+            "chunks_per_second": round(self.chunks_per_second, 2),
+            "tokens_per_second": round(self.tokens_per_second, 2)
+        }
+
+
+@dataclass
+class _Batch:
+    """Chunks embedded together in one request"""
+    documents: list[Document]
+    ids: list[str]
+    tokens: int
+    vectors: list[list[float]] = field(default_factory=list)
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that halves on rate limits and grows back on success (AIMD)."""
+
+    def __init__(self, maximum: int, minimum: int = 1, increase_every: int = 5) -> None:
+        """Initialize the limiter at its maximum concurrency.
+
+        Args:
+            maximum (int): Highest allowed concurrency
+            minimum (int): Lowest allowed concurrency
+            increase_every (int): Consecutive successes needed to allow one more call
+        """
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = maximum
+        self._increase_every = increase_every
+        self._successes = 0
+        self._active = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self) -> "AdaptiveLimiter":
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        async with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        """Record a successful call, raising the limit after enough of them"""
+        self._successes += 1
+        if self._successes >= self._increase_every and self.limit < self.maximum:
+            self.limit += 1
+            self._successes = 0
+
+    def on_rate_limit(self) -> None:
+        """Record a rate-limited call, halving the limit"""
+        self._successes = 0
+        self.limit = max(self.minimum, self.limit // 2)
+
+
+def _status_code(error: Exception) -> int | None:
+    """Extract the HTTP status code from OpenAI, Pinecone or httpx errors"""
+    for attribute in ("status_code", "status"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Check whether an upstream error is a rate limit (HTTP 429)"""
+    return _status_code(error) == 429 or "rate limit" in str(error).lower()
+
+
+def is_retryable(error: Exception) -> bool:
+    """Check whether an upstream error is worth retrying: rate limits and server errors"""
+    status = _status_code(error)
+    return is_rate_limited(error) or (status is not None and status >= 500)
+
+
+async def upsert_embeddings(
+    vector_store: VectorStore,
+    documents: list[Document],
+    vectors: list[list[float]],
+    ids: list[str]
+) -> None:
+    """Write documents with precomputed embeddings to a vector store.
+
+    Args:
+        vector_store (VectorStore): Target vector store
+        documents (list[Document]): Documents to write
+        vectors (list[list[float]]): Embedding of each document
+        ids (list[str]): ID of each document
+    """
+    with timed(VECTOR_STORE_CALL_DURATION, "vector_store", store=type(vector_store).__name__, operation="upsert"):
+        if isinstance(vector_store, (LocalMmapVectorStore, PooledPineconeVectorStore)):
+            await vector_store.aadd_embeddings(documents, vectors, ids)
+        else:
+            # Stores without a precomputed-embeddings API embed the documents again
+            await vector_store.aadd_documents(documents, ids=ids)
+
+
+class EmbeddingPipeline:
+    """Batched, pipelined embedding and upsert of document chunks.
+
+    Chunks are grouped into batches by token budget. Embedding and upsert run as two
+    overlapping stages connected by bounded queues, each with its own adaptive
+    concurrency limit that backs off on rate limits with jittered exponential delays.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        vector_store: VectorStore,
+        model: str | None = None,
+        max_batch_tokens: int = 20000,
+        max_batch_size: int = 128,
+        embed_concurrency: int = 4,
+        upsert_concurrency: int = 4,
+        queue_size: int = 8,
+        max_retries: int = 6,
+        base_delay: float = 0.5
+    ) -> None:
+        """Initialize the pipeline.
+
+        Args:
+            embeddings (Embeddings): Embeddings client
+            vector_store (VectorStore): Target vector store
+            model (str | None): Embedding model name, used to count tokens
+            max_batch_tokens (int): Maximum tokens per embedding request
+            max_batch_size (int): Maximum chunks per embedding request
+            embed_concurrency (int): Maximum concurrent embedding requests
+            upsert_concurrency (int): Maximum concurrent upserts
+            queue_size (int): Capacity of the queues between stages
+            max_retries (int): Retries of a rate-limited or failing call before giving up
+            base_delay (float): Base seconds of the exponential backoff
+        """
+        self._embeddings = embeddings
+        self._vector_store = vector_store
+        self._model = model
+        self._max_batch_tokens = max_batch_tokens
+        self._max_batch_size = max_batch_size
+        self._embed_concurrency = embed_concurrency
+        self._upsert_concurrency = upsert_concurrency
+        self._queue_size = queue_size
+        self._max_retries = max_retries
+        self._base_delay = base_delay
+
+    def batches(self, documents: Iterable[Document]) -> Iterator[_Batch]:
+        """Group chunks into batches that fit the token and size budgets.
+
+        Args:
+            documents (Iterable[Document]): Chunks to embed, IDs taken from `Document.id`
+                or generated when missing
+
+        Yields:
+            _Batch: Batches of chunks
+        """
+        batch = _Batch(documents=[], ids=[], tokens=0)
+        for document in documents:
+            tokens = count_tokens(document.page_content, self._model)
+            full = batch.tokens + tokens > self._max_batch_tokens or len(batch.documents) >= self._max_batch_size
+            if batch.documents and full:
+                yield batch
+                batch = _Batch(documents=[], ids=[], tokens=0)
+            batch.documents.append(document)
+            batch.ids.append(document.id or str(uuid.uuid4()))
+            batch.tokens += tokens
+        if batch.documents:
+            yield batch
+
+    async def _call(self, limiter: AdaptiveLimiter, stats: PipelineStats, call: Callable[[], Awaitable[T]]) -> T:
+        """Run an upstream call under a limiter, retrying rate limits with jittered backoff"""
+        for attempt in range(self._max_retries + 1):
+            try:
+                async with limiter:
+                    result = await call()
+                limiter.on_success()
+                return result
+            except Exception as e:
+                if not is_retryable(e) or attempt == self._max_retries:
+                    raise
+                if is_rate_limited(e):
+                    limiter.on_rate_limit()
+                stats.retries += 1
+                delay = random.uniform(0, self._base_delay * 2 ** attempt)
+                logger.warning("Upstream call failed, retrying", extra={
+                    "error": repr(e), "attempt": attempt + 1, "delay_s": round(delay, 2), "concurrency": limiter.limit
+                })
+                await asyncio.sleep(delay)
+
+    async def run(
+        self,
+        documents: Iterable[Document],
+        total: int | None = None,
+        on_progress: Callable[[int, int], None] | None = None,
+        on_batch: Callable[[list[Document], list[str]], Awaitable[None]] | None = None
+    ) -> PipelineStats:
+        """Embed and upsert documents.
+
+        Documents are consumed lazily, so a generator never has to be materialized, and
+        batches are pulled in a worker thread, so chunking and token counting never block
+        the event loop.
+
+        Args:
+            documents (Iterable[Document]): Chunks to index, IDs taken from `Document.id`
+                or generated when missing
+            total (int | None): Number of chunks reported to on_progress, defaults to len(documents)
+            on_progress (Callable[[int, int], None] | None): Called with (upserted, total) chunks after each batch
+            on_batch (Callable[[list[Document], list[str]], Awaitable[None]] | None): Awaited with the
+                documents and IDs of each upserted batch
+
+        Returns:
+            PipelineStats: Throughput of the run
+
+        Raises:
+            Exception: The first error of a stage, once its retries are exhausted
+        """
+        if total is None:
+            total = len(documents) if isinstance(documents, Sized) else 0
+        stats = PipelineStats()
+        started = time.perf_counter()
+
+        embed_limiter = AdaptiveLimiter(self._embed_concurrency)
+        upsert_limiter = AdaptiveLimiter(self._upsert_concurrency)
+        to_embed: asyncio.Queue[_Batch | None] = asyncio.Queue(maxsize=self._queue_size)
+        to_upsert: asyncio.Queue[_Batch | None] = asyncio.Queue(maxsize=self._queue_size)
+
+        async def produce() -> None:
+            batches = self.batches(documents)
+            while (batch := await run_in_threadpool(next, batches, None)) is not None:
+                await to_embed.put(batch)
+            for _ in range(self._embed_concurrency):
+                await to_embed.put(None)
+
+        async def embed() -> None:
+            while (batch := await to_embed.get()) is not None:
+                texts = [document.page_content for document in batch.documents]
+                batch.vectors = await self._call(
+                    embed_limiter, stats, lambda: self._embeddings.aembed_documents(texts)
+                )
+                stats.batches += 1
+                stats.tokens += batch.tokens
+                await to_upsert.put(batch)
+
+        async def upsert() -> None:
+            while (batch := await to_upsert.get()) is not None:
+                await self._call(
+                    upsert_limiter,
+                    stats,
+                    lambda: upsert_embeddings(self._vector_store, batch.documents, batch.vectors, batch.ids)
+                )
+                stats.chunks += len(batch.documents)
+                if on_batch:
+                    await on_batch(batch.documents, batch.ids)
+                if on_progress:
+                    on_progress(stats.chunks, total)
+
+        async def embed_stage() -> None:
+            await asyncio.gather(*(embed() for _ in range(self._embed_concurrency)))
+            for _ in range(self._upsert_concurrency):
+                await to_upsert.put(None)
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(produce())
+                group.create_task(embed_stage())
+                for _ in range(self._upsert_concurrency):
+                    group.create_task(upsert())
+        except ExceptionGroup as e:
+            # Report the upstream failure itself, not the task group wrapping it
+            error = e
+            while isinstance(error, ExceptionGroup):
+                error = error.exceptions[0]
+            raise error from e
+
+        stats.elapsed = time.perf_counter() - started
+        return stats
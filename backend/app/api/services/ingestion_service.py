@@ -0,0 +1,314 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+import asyncio
+import logging
+import os
+import posixpath
+import tempfile
+import uuid
+import zipfile
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from app.api.core.config import settings
+from app.api.services.rag_service import RAGService, get_rag_service
+from app.schemas.ingestion import IngestionFileStatus, IngestionJobStatus
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (".docx",)
+
+
+def archive_member_path(name: str) -> str:
+    """Relative path of an archive member, without absolute or parent components.
+
+    Args:
+        name (str): Member name as stored in the archive, e.g. "cuentos/../a/b.docx"
+
+    Returns:
+        str: Normalized POSIX path, e.g. "a/b.docx"
+    """
+    parts = posixpath.normpath(name.replace("\\", "/")).split("/")
+    return "/".join(part for part in parts if part not in ("", ".", ".."))
+
+
+def document_key(path: str, collection: str | None = None) -> str:
+    """Manifest key identifying a document across uploads.
+
+    A document is identified by its relative path, inside the collection it was uploaded
+    to, so re-uploading it replaces its previous version while same-named documents of
+    other folders or collections stay distinct.
+
+    Args:
+        path (str): Filename or relative path of the document
+        collection (str | None): Collection the document belongs to, e.g. a user or project
+
+    Returns:
+        str: Normalized key, e.g. "ana/cuentos/emma.docx"
+    """
+    key = archive_member_path(path)
+    collection = archive_member_path(collection or "")
+    return f"{collection}/{key}" if collection else key
+
+
+class IngestionQueueFull(Exception):
+    """Raised when the ingestion queue cannot accept more jobs"""
+
+
+class IngestionService:
+    """Background ingestion of uploaded documents through a bounded worker pool.
+
+    Uploads are spooled to disk in fixed-size chunks, enqueued as jobs and processed
+    by a fixed number of worker tasks, so requests return immediately with a job ID.
+
+    Attributes:
+        _jobs (OrderedDict[str, IngestionJobStatus]): Most recent jobs by ID
+    """
+
+    def __init__(
+        self,
+        rag_service: RAGService,
+        workers: int = 2,
+        queue_size: int = 100,
+        spool_dir: str | None = None,
+        history: int = 1000
+    ) -> None:
+        """Initialize the ingestion service. Workers start with `start`.
+
+        Args:
+            rag_service (RAGService): Service that parses and indexes each document
+            workers (int): Number of concurrent ingestion workers
+            queue_size (int): Maximum number of pending jobs
+            spool_dir (str | None): Directory for spooled uploads, defaults to a temp directory
+            history (int): Number of finished jobs kept for status queries
+        """
+        self._rag_service = rag_service
+        self._workers = workers
+        self._queue: asyncio.Queue[tuple[IngestionJobStatus, list[str]]] = asyncio.Queue(maxsize=queue_size)
+        self._spool_dir = spool_dir or os.path.join(tempfile.gettempdir(), "piconsulting-ingestion")
+        self._history = history
+        self._jobs: OrderedDict[str, IngestionJobStatus] = OrderedDict()
+        self._tasks: list[asyncio.Task] = []
+        self._chunk_size = settings.get_int("INGESTION_SPOOL_CHUNK_SIZE", 1024 * 1024)
+        self._archive_max_files = settings.get_int("INGESTION_ARCHIVE_MAX_FILES", 1000)
+        self._archive_max_bytes = settings.get_int("INGESTION_ARCHIVE_MAX_BYTES", 500 * 1024 * 1024)
+        os.makedirs(self._spool_dir, exist_ok=True)
+
+    def start(self) -> None:
+        """Start the worker tasks"""
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self._workers)]
+
+    async def stop(self) -> None:
+        """Cancel the worker tasks and wait for them to exit"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def spool(self, file: UploadFile) -> tuple[str, int]:
+        """Copy an upload to the spool directory in fixed-size chunks.
+
+        Args:
+            file (UploadFile): Uploaded file
+
+        Returns:
+            tuple[str, int]: Path of the spooled file and its size in bytes
+        """
+        suffix = os.path.splitext(file.filename or "")[1]
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=self._spool_dir)
+        size = 0
+        with os.fdopen(fd, "wb") as spool_file:
+            while chunk := await file.read(self._chunk_size):
+                await run_in_threadpool(spool_file.write, chunk)
+                size += len(chunk)
+        return path, size
+
+    def _extract_archive(self, archive_path: str) -> list[tuple[str, str, int]]:
+        """Extract the supported documents of a zip archive into the spool directory.
+
+        Documents are named by their path inside the archive, so same-named files in
+        different folders stay distinct. Archives with more than INGESTION_ARCHIVE_MAX_FILES
+        documents or more than INGESTION_ARCHIVE_MAX_BYTES of them uncompressed are rejected,
+        checking both the declared sizes and the bytes actually extracted.
+
+        Args:
+            archive_path (str): Path of the spooled zip archive
+
+        Returns:
+            list[tuple[str, str, int]]: Relative path, spooled path and size of every extracted document
+
+        Raises:
+            ValueError: If the archive exceeds the document count or size limit
+        """
+        extracted = []
+        try:
+            with zipfile.ZipFile(archive_path) as archive:
+                members = [
+                    member for member in archive.infolist()
+                    if not member.is_dir() and member.filename.lower().endswith(SUPPORTED_EXTENSIONS)
+                ]
+                if len(members) > self._archive_max_files:
+                    raise ValueError(f"Archive holds more than {self._archive_max_files} documents")
+                if sum(member.file_size for member in members) > self._archive_max_bytes:
+                    raise ValueError(f"Archive documents exceed {self._archive_max_bytes} bytes uncompressed")
+
+                total = 0
+                for member in members:
+                    filename = archive_member_path(member.filename)
+                    fd, path = tempfile.mkstemp(suffix=os.path.splitext(filename)[1], dir=self._spool_dir)
+                    extracted.append((filename, path, 0))
+                    size = 0
+                    with os.fdopen(fd, "wb") as target, archive.open(member) as source:
+                        # Declared sizes can lie, so the extracted bytes are counted too
+                        while chunk := source.read(self._chunk_size):
+                            size += len(chunk)
+                            total += len(chunk)
+                            if size > member.file_size or total > self._archive_max_bytes:
+                                raise ValueError(f"Archive documents exceed {self._archive_max_bytes} bytes uncompressed")
+                            target.write(chunk)
+                    extracted[-1] = (filename, path, size)
+        except BaseException:
+            for _, path, _ in extracted:
+                os.unlink(path)
+            raise
+        return extracted
+
+    async def submit(self, files: list[UploadFile], collection: str | None = None) -> IngestionJobStatus:
+        """Spool uploaded documents or zip archives and enqueue them as one job.
+
+        Args:
+            files (list[UploadFile]): Uploaded .docx documents or .zip archives of them
+            collection (str | None): Collection the documents belong to, so documents with the
+                same path in different collections are indexed separately
+
+        Returns:
+            IngestionJobStatus: The enqueued job
+
+        Raises:
+            IngestionQueueFull: If the queue is at capacity
+            ValueError: If a file is not supported or no document was uploaded
+        """
+        if self._queue.full():
+            raise IngestionQueueFull("Ingestion queue is full, retry later")
+
+        spooled: list[tuple[str, str, int]] = []
+        try:
+            for file in files:
+                filename = file.filename or "document"
+                if not filename.lower().endswith(SUPPORTED_EXTENSIONS + (".zip",)):
+                    raise ValueError(f"Unsupported file {filename}, expected {', '.join(SUPPORTED_EXTENSIONS)} or .zip")
+                path, size = await self.spool(file)
+                if filename.lower().endswith(".zip"):
+                    try:
+                        spooled.extend(await run_in_threadpool(self._extract_archive, path))
+                    finally:
+                        os.unlink(path)
+                else:
+                    spooled.append((filename, path, size))
+
+            if not spooled:
+                raise ValueError(f"No supported documents found, expected {', '.join(SUPPORTED_EXTENSIONS)} or .zip")
+
+            job = IngestionJobStatus(
+                job_id=uuid.uuid4().hex,
+                files=[
+                    IngestionFileStatus(filename=name, document=document_key(name, collection), size=size)
+                    for name, _, size in spooled
+                ],
+                created_at=datetime.now(timezone.utc)
+            )
+            self._remember(job)
+            self._queue.put_nowait((job, [path for _, path, _ in spooled]))
+        except asyncio.QueueFull:
+            self._jobs.pop(job.job_id, None)
+            for _, path, _ in spooled:
+                os.unlink(path)
+            raise IngestionQueueFull("Ingestion queue is full, retry later")
+        except BaseException:
+            for _, path, _ in spooled:
+                os.unlink(path)
+            raise
+
+        return job
+
+    def get_job(self, job_id: str) -> IngestionJobStatus | None:
+        """Get the status of a job.
+
+        Args:
+            job_id (str): Identifier of the job
+
+        Returns:
+            IngestionJobStatus | None: The job, or None if unknown or expired
+        """
+        return self._jobs.get(job_id)
+
+    def _remember(self, job: IngestionJobStatus) -> None:
+        """Track a job, forgetting the oldest ones past the history limit"""
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self._history:
+            self._jobs.popitem(last=False)
+
+    async def _worker(self, worker_id: int) -> None:
+        """Process queued jobs until cancelled"""
+        while True:
+            job, paths = await self._queue.get()
+            try:
+                await self._process(job, paths)
+            except Exception:
+                logger.exception("Ingestion worker failed", extra={"worker": worker_id, "job_id": job.job_id})
+            finally:
+                for path in paths:
+                    if os.path.exists(path):
+                        os.unlink(path)
+                self._queue.task_done()
+
+    async def _process(self, job: IngestionJobStatus, paths: list[str]) -> None:
+        """Index every file of a job, recording progress and failures per file"""
+        job.status = "processing"
+
+        for file_status, path in zip(job.files, paths):
+            file_status.status = "processing"
+
+            def on_progress(processed: int, total: int, file_status=file_status) -> None:
+                file_status.chunks_processed = processed
+                file_status.chunks_total = total
+
+            try:
+                stats = await self._rag_service.upload_document(
+                    path, file_status.filename, document=file_status.document, on_progress=on_progress
+                )
+                file_status.chunks_total = stats.chunks + stats.skipped
+                file_status.chunks_skipped = stats.skipped
+                file_status.chunks_deleted = stats.deleted
+                file_status.tokens = stats.tokens
+                file_status.chunks_per_second = stats.chunks_per_second
+                file_status.tokens_per_second = stats.tokens_per_second
+                file_status.status = "completed"
+            except Exception as e:
+                file_status.status = "failed"
+                file_status.error = str(e)
+                logger.warning("Failed to ingest document", extra={"document": file_status.filename, "job_id": job.job_id, "error": repr(e)})
+
+        failed = sum(1 for file_status in job.files if file_status.status == "failed")
+        if failed == 0:
+            job.status = "completed"
+        elif failed == len(job.files):
+            job.status = "failed"
+        else:
+            job.status = "completed_with_errors"
+        job.finished_at = datetime.now(timezone.utc)
+
+
+@lru_cache(maxsize=1)
+def get_ingestion_service() -> IngestionService:
+    """Get the application-scoped ingestion service.
+
+    Returns:
+        IngestionService: Shared ingestion service
+    """
+    return IngestionService(
+        get_rag_service(),
+        workers=settings.get_int("INGESTION_WORKERS", 2),
+        queue_size=settings.get_int("INGESTION_QUEUE_SIZE", 100),
+        spool_dir=settings.get("INGESTION_SPOOL_DIR")
+    )
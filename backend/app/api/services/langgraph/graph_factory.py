@@ -1,11 +1,47 @@
+import functools
+import hashlib
+import inspect
 from langgraph.graph import END, StateGraph, START
+from langgraph.graph.state import CompiledStateGraph
+from app.api.core.metrics import NODE_DURATION, timed
 from app.api.services.langgraph.state import AgentState
 from app.schemas.langgraph import Node, Edge, SupervisorNode
 
 
+def _qualified_name(obj) -> str:
+    """Return a stable, import-path based name for a node callable or routing condition"""
+    if obj is None:
+        return ""
+    return f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', repr(obj))}"
+
+
+def instrument_node(name: str, business_logic):
+    """Wrap a node callable so every execution records its duration and errors.
+
+    Args:
+        name (str): Node name, used as the metric label
+        business_logic: Sync or async node callable
+
+    Returns:
+        Callable of the same kind that forwards every argument to the original
+    """
+    if inspect.iscoroutinefunction(business_logic):
+        @functools.wraps(business_logic)
+        async def async_node(*args, **kwargs):
+            with timed(NODE_DURATION, "node", node=name):
+                return await business_logic(*args, **kwargs)
+        return async_node
+
+    @functools.wraps(business_logic)
+    def node(*args, **kwargs):
+        with timed(NODE_DURATION, "node", node=name):
+            return business_logic(*args, **kwargs)
+    return node
+
+
 class GraphFactory:
     """Factory class for building and configuring LangGraph workflows"""
-    
+
     def __init__(self, state: AgentState):
         """Initialize GraphFactory with a state type"""
         self.__state = state
@@ -20,22 +56,53 @@ class GraphFactory:
     def set_edges(self, edges: list[Edge]):
         """Set the edges between nodes in the graph"""
         self.__edges = edges
-    
+
     def set_supervisor_node(self, node: SupervisorNode):
         """Set the supervisor node that will orchestrate the graph flow"""
         self.__supervisor_node = node
 
-    def build_graph(self):
-        """Build and compile the graph with all configured components"""
+    def definition_hash(self) -> str:
+        """Hash the configured nodes, edges and supervisor into a stable key.
+
+        Two factories configured with the same state, node callables, edges and
+        supervisor produce the same key, so the compiled graph can be shared.
+
+        Returns:
+            str: Hex digest identifying the graph definition
+        """
+        parts = [f"state:{_qualified_name(self.__state)}"]
+
+        for node in self.__nodes:
+            parts.append(f"node:{node['name']}:{_qualified_name(node['business_logic'])}")
+
+        if self.__supervisor_node:
+            parts.append(
+                f"supervisor:{self.__supervisor_node['name']}:"
+                f"{_qualified_name(self.__supervisor_node['business_logic'])}:"
+                f"{','.join(self.__supervisor_node['members'])}"
+            )
+
+        for edge in self.__edges:
+            parts.append(
+                f"edge:{edge['source']}:{edge['target']}:{_qualified_name(edge['condition'])}"
+            )
+
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def build_graph(self) -> CompiledStateGraph:
+        """Build and compile the graph with all configured components, instrumenting every node"""
         graph = StateGraph(self.__state)
 
         # Add worker nodes
         for node in self.__nodes:
-            graph.add_node(node["name"], node["business_logic"])
+            graph.add_node(node["name"], instrument_node(node["name"], node["business_logic"]))
 
         # Configure supervisor if present
         if self.__supervisor_node:
-            graph.add_node(self.__supervisor_node["name"], self.__supervisor_node["business_logic"])
+            graph.add_node(
+                self.__supervisor_node["name"],
+                instrument_node(self.__supervisor_node["name"], self.__supervisor_node["business_logic"])
+            )
 
             # Connect members to supervisor
             for member in self.__supervisor_node["members"]:
@@ -48,11 +115,27 @@ class GraphFactory:
         # Add edges between nodes
         for edge in self.__edges:
             if edge["condition"]:
-                graph.add_conditional_edges(edge["source"], edge["condition"])
+                # A list of targets lets the graph know (and draw) where the condition can lead
+                path_map = edge["target"] if isinstance(edge["target"], list) else None
+                graph.add_conditional_edges(edge["source"], edge["condition"], path_map)
             else:
                 graph.add_edge(edge["source"], edge["target"])
 
-        graph = graph.compile()
-        graph.get_graph().draw_mermaid_png(output_file_path="graph.png")
+        return graph.compile()
+
+
+def draw_graph(graph: CompiledStateGraph, output_file_path: str = "graph.png") -> str:
+    """Render a compiled graph as a Mermaid PNG.
+
+    Rendering goes through the Mermaid web service by default, so it must never
+    run on the request path. Use the CLI or the admin endpoint instead.
+
+    Args:
+        graph (CompiledStateGraph): Compiled graph to render
+        output_file_path (str): Path of the PNG file to write
 
-        return graph
+    Returns:
+        str: Path of the written file
+    """
+    graph.get_graph().draw_mermaid_png(output_file_path=output_file_path)
+    return output_file_path
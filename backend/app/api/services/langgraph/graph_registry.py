@@ -0,0 +1,85 @@
+from typing import Callable
+import logging
+from langgraph.graph.state import CompiledStateGraph
+from app.api.services.langgraph.graph_factory import GraphFactory
+
+logger = logging.getLogger(__name__)
+
+
+class GraphRegistry:
+    """Registry that compiles each graph definition once and shares it across requests.
+
+    Compiled graphs are keyed by the definition hash of their factory, so registering
+    the same definition under several names only compiles it once.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry"""
+        self.__definitions: dict[str, Callable[[], GraphFactory]] = {}
+        self.__compiled: dict[str, CompiledStateGraph] = {}
+        self.__keys: dict[str, str] = {}
+
+    def register(self, name: str, definition: Callable[[], GraphFactory]) -> None:
+        """Register a graph definition under a name without compiling it yet.
+
+        Args:
+            name (str): Name used by services to look the graph up
+            definition (Callable[[], GraphFactory]): Function returning a configured factory
+        """
+        self.__definitions[name] = definition
+        self.__keys.pop(name, None)
+
+    def compile(self, name: str) -> CompiledStateGraph:
+        """Compile a registered graph, reusing an existing compilation of the same definition.
+
+        Args:
+            name (str): Name of the registered graph
+
+        Returns:
+            CompiledStateGraph: The shared compiled graph
+
+        Raises:
+            KeyError: If no graph is registered under the given name
+        """
+        if name not in self.__definitions:
+            raise KeyError(f"Graph {name} is not registered")
+
+        factory = self.__definitions[name]()
+        key = factory.definition_hash()
+        if key not in self.__compiled:
+            logger.info("Compiling graph", extra={"graph": name, "definition": key[:12]})
+            self.__compiled[key] = factory.build_graph()
+        self.__keys[name] = key
+
+        return self.__compiled[key]
+
+    def compile_all(self) -> None:
+        """Compile every registered graph. Meant to run once at application startup."""
+        for name in self.__definitions:
+            self.compile(name)
+
+    def get(self, name: str) -> CompiledStateGraph:
+        """Get the compiled graph for a name, compiling it on first use if needed.
+
+        Args:
+            name (str): Name of the registered graph
+
+        Returns:
+            CompiledStateGraph: The shared compiled graph
+        """
+        key = self.__keys.get(name)
+        if key is None:
+            return self.compile(name)
+        return self.__compiled[key]
+
+    def names(self) -> list[str]:
+        """List the registered graph names"""
+        return list(self.__definitions)
+
+    def clear(self) -> None:
+        """Drop every compiled graph, keeping the registered definitions"""
+        self.__compiled.clear()
+        self.__keys.clear()
+
+
+graph_registry = GraphRegistry()
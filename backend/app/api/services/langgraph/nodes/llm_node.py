@@ -1,36 +1,66 @@
 from typing import Literal, TypedDict
 from langgraph.graph import END
+from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import HumanMessage
-from app.api.services.llm_service import LLMService
-from app.api.services.langgraph.state import RetrievalAgentState
-from app.api.core.prompt import generate_supervisor_prompt, generate_llm_prompt, generate_translate_prompt
+from app.api.core.budget import call_options
+from app.api.core.config import settings
+from app.api.core.language import SPANISH, canonical_language, detect_language
+from app.api.services.clients import client_pool
+from app.api.services.langgraph.routing import route_by_rules, routing_metrics
+from app.api.services.llm_service import model_profile
+from app.api.services.langgraph.state import RetrievalAgentState, current_turn, latest_answer, previous_turns
+from app.api.services.translation_cache import Translation, get_translation_cache
+from app.api.core.prompt import (
+    build_answer_messages, build_supervisor_messages, build_translate_messages, build_translate_output_messages
+)
 
-# Initialize LLM service
-llm = LLMService("openai", "gpt-4o").get_llm()
+def get_llm(role: str = "answer") -> BaseChatModel:
+    """Get the shared chat model of a workflow role from the client pool"""
+    return client_pool.for_role(role).get_llm()
 
 class Router(TypedDict):
     """Worker to route to next. If no workers needed, route to FINISH."""
     next: Literal["RETRIEVAL", "ANSWER", "TRANSLATE", "FINISH"]
+
+class TranslationResult(TypedDict):
+    """Translation of the text and the English name of the language it was written in."""
+    translation: str
+    language: str
            
-def supervisor_node(state: RetrievalAgentState) -> RetrievalAgentState:
+async def supervisor_node(state: RetrievalAgentState) -> RetrievalAgentState:
     """
     Supervisor node that determines the next worker to execute in the workflow.
     
+    With SUPERVISOR_MODE=rules (default) the fixed workflow rules decide and the LLM
+    is only asked for ambiguous cases. With SUPERVISOR_MODE=llm every step asks the LLM.
+    
     Args:
         state (RetrievalAgentState): Current workflow state
         
     Returns:
         RetrievalAgentState: Updated state with next worker to execute
     """
-    supervisor_system_prompt = generate_supervisor_prompt(["RETRIEVAL", "ANSWER", "TRANSLATE"], state["messages"])
-    messages = [{"role": "system", "content": supervisor_system_prompt}]
-    
-    response = llm.with_structured_output(Router).invoke(messages)
-    next_ = END if response["next"] == "FINISH" else response["next"]
+    mode = settings.get("SUPERVISOR_MODE", "rules").lower()
+    route = route_by_rules(state) if mode == "rules" else None
+
+    if route:
+        source = "rules"
+    else:
+        source = "llm_fallback" if mode == "rules" else "llm"
+        messages = build_supervisor_messages(
+            ["RETRIEVAL", "ANSWER", "TRANSLATE"], current_turn(state["messages"]),
+            settings.get_int("PROMPT_HISTORY_ENTRY_TOKENS", 200)
+        )
+        
+        response = await get_llm("supervisor").with_structured_output(Router).ainvoke(messages, **call_options())
+        route = response["next"]
+
+    routing_metrics.record(source, route)
+    next_ = END if route == "FINISH" else route
 
     return {"next": next_}
 
-def llm_node(state: RetrievalAgentState) -> RetrievalAgentState:
+async def llm_node(state: RetrievalAgentState) -> RetrievalAgentState:
     """
     LLM node that generates responses based on retrieved context.
     
@@ -40,44 +70,81 @@ def llm_node(state: RetrievalAgentState) -> RetrievalAgentState:
     Returns:
         RetrievalAgentState: Updated state with generated response
     """
-    user_query = state["messages"][0].content
-    if "original_language" in state:
-        answer_language = state["original_language"]
-    else:
-        answer_language = "Spanish" 
+    user_query = current_turn(state["messages"])[0].content
+    answer_language = state.get("original_language") or "Spanish"
     context = state.get("retrieval_context", [])
-    llm_system_prompt = generate_llm_prompt("ANSWER", context, user_query, answer_language)
-    messages = [{"role": "system", "content": llm_system_prompt}]
+    messages = build_answer_messages(
+        context, user_query, answer_language,
+        max_context_tokens=settings.get_int("PROMPT_CONTEXT_TOKENS", 3000),
+        model=model_profile("answer")[1],
+        conversation=previous_turns(state["messages"], settings.get_int("SESSION_HISTORY_TURNS", 2)),
+        history_entry_tokens=settings.get_int("PROMPT_HISTORY_ENTRY_TOKENS", 200)
+    )
     
-    response = llm.invoke(messages)
+    response = await get_llm("answer").ainvoke(messages, **call_options())
     return {"messages": [{"role": "assistant", "content": response.content, "node": "ANSWER"}]}
 
-def translate_node(state: RetrievalAgentState) -> RetrievalAgentState:
+async def translate_node(state: RetrievalAgentState) -> RetrievalAgentState:
     """
     Translation node that converts user queries to Spanish.
     
+    Queries detected locally as Spanish are passed through, and translations are
+    served from the translation cache when the query was translated before. Only
+    the remaining queries are sent to the LLM, which returns the translation and
+    the original language as structured output.
+    
     Args:
         state (RetrievalAgentState): Current workflow state
         
     Returns:
         RetrievalAgentState: Updated state with translated content
     """
-    if isinstance(state["messages"][-1], HumanMessage):
-        user_query = state["messages"][-1].content
-        translate_prompt = generate_translate_prompt(user_query, "Spanish")
-        response = llm.invoke([{"role": "system", "content": translate_prompt}]).content
+    if not isinstance(state["messages"][-1], HumanMessage):
+        return {"next": "RETRIEVAL"}
+
+    user_query = state["messages"][-1].content
+    detected = detect_language(user_query)
+    if detected == SPANISH:
+        return {"translated_context": user_query, "original_language": SPANISH, "next": "RETRIEVAL"}
 
-        # Start Generation Here
-        array_response = response.split('\n')
-         
+    translation_cache = get_translation_cache()
+    translation = await translation_cache.get(user_query, SPANISH)
+    if translation is None:
+        response = await get_llm("translator").with_structured_output(TranslationResult).ainvoke(
+            build_translate_messages(user_query, SPANISH), **call_options()
+        )
+        language = canonical_language(response["language"]) or detected or response["language"].strip()
+        translation = Translation(response["translation"].strip(), language)
+        await translation_cache.set(user_query, SPANISH, translation)
+
+    return {
+        "messages": [{"role": "assistant", "content": translation.text, "node": "TRANSLATE"}],
+        "translated_context": translation.text,
+        "original_language": translation.language,
+        "next": "RETRIEVAL"
+    }
+
+async def translate_output_node(state: RetrievalAgentState) -> RetrievalAgentState:
+    """
+    Output translation node that translates the answer into the language of the user request.
+    
+    It runs after ANSWER when the answer came out in the wrong language and only
+    translates it, without retrieving or answering again. The translation is plain
+    text, so it streams token by token like the answer it replaces.
+    
+    Args:
+        state (RetrievalAgentState): Current workflow state holding the answer
         
-        return {
-            "messages": [{"role": "assistant", "content": response, "node": "TRANSLATE"}],
-            "translated_context": array_response[0],
-            "original_language": array_response[-1],
-            "next": "RETRIEVAL"
-        }
-    else:
-        return {"next": "RETRIEVAL"}
+    Returns:
+        RetrievalAgentState: Updated state with the translated answer
+    """
+    answer = latest_answer(current_turn(state["messages"]))
+    if answer is None:
+        return {}
+
+    response = await get_llm("translator").ainvoke(
+        build_translate_output_messages(answer, state.get("original_language") or SPANISH), **call_options()
+    )
+    return {"messages": [{"role": "assistant", "content": response.content.strip(), "node": "TRANSLATE_OUTPUT"}]}
 
 
@@ -1,23 +1,109 @@
-from app.api.services.langgraph.state import RetrievalAgentState
-from app.api.services.rag_service import RAGService
+from langchain_core.documents import Document
+from app.api.core.config import settings
+from app.api.core.language import FUNCTION_WORDS
+from app.api.core.cache import normalize_text
+from app.api.core.metrics import CACHE_REQUESTS
+from app.api.services.langgraph.state import RetrievalAgentState, current_turn
+from app.api.services.lexical_index import tokenize
+from app.api.services.rag_service import get_rag_service, reciprocal_rank_fusion
+
+# Function words in the accent-free form produced by tokenize
+_FUNCTION_TERMS = frozenset(tokenize(" ".join(FUNCTION_WORDS)))
+
+
+def context_coverage(query: str, context: list[Document]) -> float:
+    """Share of the topic terms of a query found in already retrieved chunks.
+
+    Args:
+        query (str): Question to answer
+        context (list[Document]): Chunks retrieved for an earlier question
+
+    Returns:
+        float: Between 0 and 1, 1 when the query has no topic terms at all (e.g. "¿y por qué?")
+    """
+    terms = {term for term in tokenize(query) if term not in _FUNCTION_TERMS and len(term) > 2}
+    if not terms:
+        return 1.0
+    found = set()
+    for doc in context:
+        found.update(terms.intersection(tokenize(doc.page_content)))
+    return len(found) / len(terms)
+
+
+async def _retrieve(state: RetrievalAgentState, query: str) -> list[Document]:
+    """Retrieve the chunks of a query, reusing the previous turn's when they cover it"""
+    previous_context = state.get("previous_context")
+    if previous_context:
+        threshold = settings.get_float("SESSION_CONTEXT_REUSE_THRESHOLD", 0.6)
+        if context_coverage(query, previous_context) >= threshold:
+            CACHE_REQUESTS.labels(cache="session_context", result="hit").inc()
+            return previous_context
+        CACHE_REQUESTS.labels(cache="session_context", result="miss").inc()
+
+    return await get_rag_service().query_document(query, k=2, source=state.get("source"))
 
 
 async def retriever_node(state: RetrievalAgentState) -> RetrievalAgentState:
     """
     Retriever node that fetches relevant context from the RAG service.
     
+    In a conversation session, the chunks of the previous turn are reused without
+    searching again when they contain at least SESSION_CONTEXT_REUSE_THRESHOLD of the
+    topic terms of the follow-up question. Chunks already retrieved speculatively for
+    the untranslated question are merged in, without duplicates.
+    
     Args:
         state (RetrievalAgentState): Current workflow state
         
     Returns:
         RetrievalAgentState: Updated state with retrieved context
     """
-    rag_service = RAGService()
-    
     user_query = (state["translated_context"] 
                  if "translated_context" in state and state["translated_context"]
                  else state["messages"][-1].content)
+
+    retrieval_context = await _retrieve(state, user_query)
+    if state.get("speculative_context"):
+        retrieval_context = reciprocal_rank_fusion([retrieval_context, state["speculative_context"]])
     
-    retrieval_context = await rag_service.query_document(user_query, k=2)
+    return {"retrieval_context": retrieval_context}
+
+
+async def speculative_retriever_node(state: RetrievalAgentState) -> RetrievalAgentState:
+    """
+    Retriever node that searches for the question as asked, while it is being translated.
     
-    return {"retrieval_context": retrieval_context}
\ No newline at end of file
+    Args:
+        state (RetrievalAgentState): Current workflow state
+        
+    Returns:
+        RetrievalAgentState: Updated state with the speculatively retrieved context
+    """
+    return {"speculative_context": await _retrieve(state, current_turn(state["messages"])[0].content)}
+
+
+def join_node(state: RetrievalAgentState) -> RetrievalAgentState:
+    """
+    Join node that decides whether the speculative retrieval is enough to answer.
+    
+    It is when the question needed no translation, or when its chunks contain at
+    least SPECULATIVE_RETRIEVAL_THRESHOLD of the topic terms of the translated
+    question. Otherwise RETRIEVAL searches again with the translated question.
+    
+    Args:
+        state (RetrievalAgentState): Workflow state after translation and speculative retrieval
+        
+    Returns:
+        RetrievalAgentState: Updated state with the next worker, and the retrieved context if it is enough
+    """
+    speculative_context = state.get("speculative_context", [])
+    question = current_turn(state["messages"])[0].content
+    translated = state.get("translated_context") or question
+    enough = normalize_text(translated) == normalize_text(question) or (
+        bool(speculative_context)
+        and context_coverage(translated, speculative_context) >= settings.get_float("SPECULATIVE_RETRIEVAL_THRESHOLD", 0.6)
+    )
+    CACHE_REQUESTS.labels(cache="speculative_retrieval", result="hit" if enough else "miss").inc()
+    if not enough:
+        return {"next": "RETRIEVAL"}
+    return {"retrieval_context": speculative_context, "next": "ANSWER"}
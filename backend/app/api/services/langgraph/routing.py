@@ -0,0 +1,138 @@
+from collections import Counter
+from threading import Lock
+from langgraph.graph import END
+from app.api.core.metrics import ROUTING_DECISIONS
+from app.api.core.language import SPANISH, canonical_language, detect_language
+from app.api.services.langgraph.state import RetrievalAgentState, current_turn, latest_answer
+
+
+class RoutingMetrics:
+    """Counters describing how the supervisor reached its routing decisions."""
+
+    def __init__(self) -> None:
+        """Initialize empty counters"""
+        self.__decisions: Counter = Counter()
+        self.__routes: Counter = Counter()
+        self.__lock = Lock()
+
+    def record(self, source: str, route: str) -> None:
+        """Record a routing decision.
+
+        Args:
+            source (str): "rules", "llm_fallback" or "llm"
+            route (str): Worker the supervisor routed to
+        """
+        with self.__lock:
+            self.__decisions[source] += 1
+            self.__routes[route] += 1
+        ROUTING_DECISIONS.labels(source=source, route=route).inc()
+
+    def stats(self) -> dict:
+        """Get routing counters and the share of decisions that needed the LLM.
+
+        Returns:
+            dict: Routing statistics
+        """
+        with self.__lock:
+            decisions = dict(self.__decisions)
+            routes = dict(self.__routes)
+        total = sum(decisions.values())
+        fallback_rate = decisions.get("llm_fallback", 0) / total if total else 0.0
+        return {"decisions": decisions, "routes": routes, "total": total, "fallback_rate": fallback_rate}
+
+
+routing_metrics = RoutingMetrics()
+
+
+def workflow_nodes(state: RetrievalAgentState) -> list[str]:
+    """List the worker nodes that already ran for the current turn, in order.
+
+    Args:
+        state (RetrievalAgentState): Current workflow state
+
+    Returns:
+        list[str]: Node names taken from the messages of the workflow history
+    """
+    return [message.additional_kwargs.get("node", "") for message in current_turn(state["messages"])[1:]]
+
+
+def route_answer(state: RetrievalAgentState) -> str | None:
+    """Decide whether the answer of the current turn must be translated.
+
+    The answer is translated at most once, so a translation that is still detected
+    in the wrong language never loops.
+
+    Args:
+        state (RetrievalAgentState): Workflow state holding an answer for the current turn
+
+    Returns:
+        str | None: "FINISH" or "TRANSLATE_OUTPUT", or None when the language of the
+        request or of the answer cannot be told apart
+    """
+    if "TRANSLATE_OUTPUT" in workflow_nodes(state):
+        return "FINISH"
+    answer = latest_answer(current_turn(state["messages"]))
+    expected = canonical_language(state.get("original_language")) if state.get("original_language") else SPANISH
+    detected = detect_language(answer or "")
+    if expected is None or detected is None:
+        return None
+    return "FINISH" if detected == expected else "TRANSLATE_OUTPUT"
+
+
+def after_answer(state: RetrievalAgentState) -> str:
+    """Conditional edge leaving the ANSWER node.
+
+    Args:
+        state (RetrievalAgentState): Workflow state holding an answer for the current turn
+
+    Returns:
+        str: "TRANSLATE_OUTPUT" when the answer is detected in the wrong language, END
+        otherwise, including when its language is unclear
+    """
+    return "TRANSLATE_OUTPUT" if route_answer(state) == "TRANSLATE_OUTPUT" else END
+
+
+def after_join(state: RetrievalAgentState) -> str:
+    """Conditional edge leaving the JOIN node of the parallel workflow.
+
+    Args:
+        state (RetrievalAgentState): Workflow state after translation and speculative retrieval
+
+    Returns:
+        str: "ANSWER" when the speculative retrieval was enough, "RETRIEVAL" otherwise
+    """
+    return "ANSWER" if state.get("next") == "ANSWER" else "RETRIEVAL"
+
+
+def route_by_rules(state: RetrievalAgentState) -> str | None:
+    """Decide the next worker with the fixed workflow rules and local language detection.
+
+    Mirrors the supervisor prompt: translate non-Spanish requests, then retrieve,
+    then answer, and translate the answer if it is in the wrong language. In a
+    session, a follow-up too short to detect is assumed to be in the language of
+    the previous turn.
+
+    Args:
+        state (RetrievalAgentState): Current workflow state
+
+    Returns:
+        str | None: "TRANSLATE", "RETRIEVAL", "ANSWER", "TRANSLATE_OUTPUT" or "FINISH", or None when the
+        case is ambiguous and the LLM supervisor must decide
+    """
+    nodes = workflow_nodes(state)
+
+    if "ANSWER" in nodes:
+        return route_answer(state)
+
+    if state.get("retrieval_context"):
+        return "ANSWER"
+
+    if "TRANSLATE" in nodes or state.get("translated_context"):
+        return "RETRIEVAL"
+
+    detected = detect_language(current_turn(state["messages"])[0].content)
+    if detected is None:
+        detected = canonical_language(state.get("previous_language"))
+    if detected is None:
+        return None
+    return "RETRIEVAL" if detected == SPANISH else "TRANSLATE"
@@ -1,9 +1,12 @@
 from typing import Annotated, Sequence
 from typing_extensions import TypedDict
 from langchain_core.documents import Document
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import BaseMessage, HumanMessage
 from langgraph.graph.message import add_messages
 
+# Nodes whose message is the answer of a turn, the translated one replacing the original
+ANSWER_NODES = ("ANSWER", "TRANSLATE_OUTPUT")
+
 
 class AgentState(TypedDict):
     """Base state class for LangGraph agents."""
@@ -16,7 +19,72 @@ class SupervisorState(AgentState):
 
 
 class RetrievalAgentState(SupervisorState):
-    """State class for retrieval-augmented generation workflow."""
+    """State class for retrieval-augmented generation workflow.
+
+    In a conversation session `previous_context` and `previous_language` carry the
+    chunks and language of the previous turn, so follow-ups can reuse them, and
+    `corpus_version` tells whether those chunks are still current. In the parallel
+    workflow `speculative_context` holds the chunks retrieved for the untranslated
+    question.
+    """
     retrieval_context: list[Document]
     translated_context: str
-    original_language: str
\ No newline at end of file
+    original_language: str
+    source: str | None
+    previous_context: list[Document]
+    previous_language: str
+    corpus_version: int
+    speculative_context: list[Document]
+
+
+def current_turn(messages: Sequence[BaseMessage]) -> list[BaseMessage]:
+    """Get the messages of the turn being answered.
+
+    Args:
+        messages (Sequence[BaseMessage]): Workflow messages, holding earlier turns in a session
+
+    Returns:
+        list[BaseMessage]: The latest user message followed by the messages of the workflow answering it
+    """
+    for index in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[index], HumanMessage):
+            return list(messages[index:])
+    return list(messages)
+
+
+def latest_answer(messages: Sequence[BaseMessage]) -> str | None:
+    """Get the latest answer among some workflow messages.
+
+    Args:
+        messages (Sequence[BaseMessage]): Workflow messages
+
+    Returns:
+        str | None: Content of the last message of an answer node, None if there is none
+    """
+    for message in reversed(messages):
+        if message.additional_kwargs.get("node") in ANSWER_NODES:
+            return message.content
+    return None
+
+
+def previous_turns(messages: Sequence[BaseMessage], limit: int) -> list[tuple[str, str]]:
+    """Get the questions and answers of the turns before the current one.
+
+    Args:
+        messages (Sequence[BaseMessage]): Workflow messages, holding earlier turns in a session
+        limit (int): Maximum number of turns, the latest ones are kept
+
+    Returns:
+        list[tuple[str, str]]: Question and final answer of each answered turn, oldest first
+    """
+    turns: list[tuple[str, str]] = []
+    question = None
+    for message in messages[:len(messages) - len(current_turn(messages))]:
+        if isinstance(message, HumanMessage):
+            question = message.content
+        elif question is not None and message.additional_kwargs.get("node") in ANSWER_NODES:
+            if turns and turns[-1][0] is question:
+                turns[-1] = (question, message.content)
+            else:
+                turns.append((question, message.content))
+    return turns[-limit:] if limit > 0 else []
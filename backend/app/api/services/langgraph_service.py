@@ -1,49 +1,526 @@
-from langgraph.graph import END
+from contextlib import AsyncExitStack
+from functools import lru_cache
+from typing import AsyncIterator
+import asyncio
+import logging
+from langgraph.errors import GraphRecursionError
+from langgraph.graph import END, START
+from langgraph.graph.state import CompiledStateGraph
+from langchain_core.documents import Document
+from langchain_core.messages import HumanMessage, RemoveMessage
+from app.api.core.batch import BatchResult, gather_bounded
+from app.api.core.budget import BudgetExceeded, RequestBudget, request_budget
+from app.api.core.cache import hash_key, normalize_text
+from app.api.core.config import settings
+from app.api.core.corpus import corpus_version
+from app.api.core.language import SPANISH, detect_language
+from app.api.core.metrics import BUDGET_EXHAUSTED
+from app.api.core.singleflight import SingleFlight
+from app.api.services.answer_cache import AnswerCache, get_answer_cache
 from app.api.services.langgraph.graph_factory import GraphFactory
-from app.api.services.langgraph.state import RetrievalAgentState
-from app.api.services.langgraph.nodes.llm_node import llm_node, supervisor_node, translate_node
-from app.api.services.langgraph.nodes.retriever_node import retriever_node
+from app.api.services.langgraph.graph_registry import graph_registry
+from app.api.services.langgraph.routing import after_answer, after_join
+from app.api.services.langgraph.state import RetrievalAgentState, current_turn, latest_answer
+from app.api.services.langgraph.nodes.llm_node import llm_node, supervisor_node, translate_node, translate_output_node
+from app.api.services.langgraph.nodes.retriever_node import join_node, retriever_node, speculative_retriever_node
+from app.api.services.rag_service import get_rag_service
+from app.api.services.session_store import SessionStore, get_session_store
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_GRAPH = "retrieval"
+PARALLEL_RETRIEVAL_GRAPH = "retrieval_parallel"
+
+
+def build_retrieval_graph() -> GraphFactory:
+    """
+    Configure the retrieval-augmented answer workflow.
+
+    Returns:
+        GraphFactory: Factory configured with the supervisor, worker nodes and edges
+    """
+    # Initialize graph with RetrievalAgentState
+    graph = GraphFactory(RetrievalAgentState)
+
+    # Configure supervisor node
+    graph.set_supervisor_node({
+        "name": "SUPERVISOR",
+        "business_logic": supervisor_node,
+        "members": []
+    })
+
+    # Configure worker nodes
+    graph.set_nodes([
+        {"name": "RETRIEVAL", "business_logic": retriever_node},
+        {"name": "ANSWER", "business_logic": llm_node},
+        {"name": "TRANSLATE", "business_logic": translate_node},
+        {"name": "TRANSLATE_OUTPUT", "business_logic": translate_output_node}
+    ])
+
+    # Configure edges between nodes
+    graph.set_edges([
+        {"source": "RETRIEVAL", "target": "ANSWER", "condition": None},
+        {"source": "TRANSLATE", "target": "RETRIEVAL", "condition": None},
+        # An answer in the wrong language is translated once, never retrieved or answered again
+        {"source": "ANSWER", "target": ["TRANSLATE_OUTPUT", END], "condition": after_answer},
+        {"source": "TRANSLATE_OUTPUT", "target": END, "condition": None}
+    ])
+
+    return graph
+
+
+def build_parallel_retrieval_graph() -> GraphFactory:
+    """
+    Configure the retrieval-augmented answer workflow with translation and retrieval overlapped.
+
+    The question is translated while the raw question is searched speculatively.
+    JOIN waits for both branches. The search is repeated with the translated question
+    only when the speculative chunks do not cover it, and both results are then fused.
+
+    Returns:
+        GraphFactory: Factory configured with the worker nodes and edges
+    """
+    graph = GraphFactory(RetrievalAgentState)
+
+    graph.set_nodes([
+        {"name": "TRANSLATE", "business_logic": translate_node},
+        {"name": "SPECULATIVE_RETRIEVAL", "business_logic": speculative_retriever_node},
+        {"name": "JOIN", "business_logic": join_node},
+        {"name": "RETRIEVAL", "business_logic": retriever_node},
+        {"name": "ANSWER", "business_logic": llm_node},
+        {"name": "TRANSLATE_OUTPUT", "business_logic": translate_output_node}
+    ])
+
+    graph.set_edges([
+        {"source": START, "target": "TRANSLATE", "condition": None},
+        {"source": START, "target": "SPECULATIVE_RETRIEVAL", "condition": None},
+        {"source": ["TRANSLATE", "SPECULATIVE_RETRIEVAL"], "target": "JOIN", "condition": None},
+        {"source": "JOIN", "target": ["RETRIEVAL", "ANSWER"], "condition": after_join},
+        {"source": "RETRIEVAL", "target": "ANSWER", "condition": None},
+        {"source": "ANSWER", "target": ["TRANSLATE_OUTPUT", END], "condition": after_answer},
+        {"source": "TRANSLATE_OUTPUT", "target": END, "condition": None}
+    ])
+
+    return graph
+
+
+graph_registry.register(RETRIEVAL_GRAPH, build_retrieval_graph)
+graph_registry.register(PARALLEL_RETRIEVAL_GRAPH, build_parallel_retrieval_graph)
+
+
+def workflow_graph() -> str:
+    """
+    Get the name of the graph answering questions.
+
+    Returns:
+        str: The parallel workflow with GRAPH_EXECUTION_MODE=parallel, the serial one with serial (default)
+
+    Raises:
+        ValueError: If GRAPH_EXECUTION_MODE is neither serial nor parallel
+    """
+    mode = settings.get("GRAPH_EXECUTION_MODE", "serial").lower()
+    if mode == "parallel":
+        return PARALLEL_RETRIEVAL_GRAPH
+    if mode == "serial":
+        return RETRIEVAL_GRAPH
+    raise ValueError(f"Unsupported graph execution mode {mode}, expected serial or parallel")
+
+
+@lru_cache(maxsize=1)
+def get_answer_flights() -> SingleFlight[str]:
+    """
+    Get the application-scoped group coalescing identical in-flight questions.
+
+    Returns:
+        SingleFlight[str]: Shared group, disabled with REQUEST_COALESCING=false
+    """
+    return SingleFlight("answers", enabled=settings.get_bool("REQUEST_COALESCING", True))
+
+
+def document_id(document: Document) -> str:
+    """
+    Get a stable identifier for a retrieved document.
+
+    Args:
+        document (Document): Retrieved document
+
+    Returns:
+        str: The vector store ID, or a hash of the content when the store returned none
+    """
+    return document.id or hash_key(document.page_content)
+
+
+def best_answer(state: dict) -> str | None:
+    """
+    Get the latest answer produced for the current turn of a workflow, finished or not.
+
+    Args:
+        state (dict): Workflow state
+
+    Returns:
+        str | None: Content of the last ANSWER or TRANSLATE_OUTPUT message, None if no answer was produced yet
+    """
+    return latest_answer(current_turn(state.get("messages", [])))
+
+
+async def run_within_budget(
+    app: CompiledStateGraph,
+    inputs: dict,
+    budget: RequestBudget,
+    config: dict | None = None
+) -> tuple[dict, bool]:
+    """
+    Run a workflow until it finishes or its budget runs out.
+
+    The budget is visible to every node through `request_budget`. Running out of
+    time cancels the node in flight, along with its upstream calls, and running out
+    of steps stops the graph. In both cases the best answer produced so far is kept.
+
+    Args:
+        app (CompiledStateGraph): Compiled workflow
+        inputs (dict): Initial workflow state
+        budget (RequestBudget): Time and step limits of the run
+        config (dict | None): Graph config, e.g. the thread of a session
+
+    Returns:
+        tuple[dict, bool]: Final workflow state, and whether the run was cut short
+
+    Raises:
+        BudgetExceeded: The budget ran out before any answer was produced
+    """
+    state: dict = {}
+    token = request_budget.set(budget)
+    try:
+        async with asyncio.timeout(budget.remaining()):
+            async for state in app.astream(
+                inputs, {**(config or {}), "recursion_limit": budget.max_steps}, stream_mode="values"
+            ):
+                pass
+        return state, False
+    except (TimeoutError, GraphRecursionError) as e:
+        reason = "deadline" if isinstance(e, TimeoutError) else "steps"
+        if best_answer(state) is None:
+            BUDGET_EXHAUSTED.labels(reason=reason, outcome="failed").inc()
+            logger.warning("Workflow budget exceeded before answering", extra={"reason": reason})
+            raise BudgetExceeded(reason) from e
+        BUDGET_EXHAUSTED.labels(reason=reason, outcome="degraded").inc()
+        logger.warning("Workflow budget exceeded, returning the best answer so far", extra={"reason": reason})
+        return state, True
+    finally:
+        request_budget.reset(token)
 
 
 class LangGraphService:
     """Service class for managing LangGraph operations and message generation."""
 
-    async def generate_message(self, user_query: str) -> dict:
+    def __init__(self, answer_cache: AnswerCache | None = None, session_store: SessionStore | None = None):
+        """
+        Initialize the service.
+
+        Args:
+            answer_cache (AnswerCache | None): Cache consulted before running the workflow
+            session_store (SessionStore | None): Store of conversation sessions, required to answer within a session
+        """
+        self.__answer_cache = answer_cache
+        self.__session_store = session_store
+
+    def _answer_cache_for(self, source: str | None) -> AnswerCache | None:
+        """Answer cache to use, none when retrieval is restricted to a source since
+        cached answers are keyed by question only"""
+        return None if source else self.__answer_cache
+
+    async def generate_message(
+        self,
+        user_query: str,
+        source: str | None = None,
+        budget: RequestBudget | None = None,
+        user_name: str | None = None,
+        session_id: str | None = None
+    ) -> dict:
         """
         Generate a response message using a LangGraph workflow.
-        
+
+        With a session ID the question continues the user's conversation session:
+        the workflow resumes from the session's stored state, and the answer cache and
+        request coalescing are bypassed since the answer depends on that state.
+
         Args:
             user_query (str): The input query from the user
-            
+            source (str | None): Only retrieve context from documents of this source
+            budget (RequestBudget | None): Time and step limits, the configured ones by default
+            user_name (str | None): Name of the user owning the session
+            session_id (str | None): Conversation session to continue, None for a standalone question
+
         Returns:
-            dict: Response containing the generated answer
-        """
-        # Initialize graph with RetrievalAgentState
-        graph = GraphFactory(RetrievalAgentState)
-
-        # Configure supervisor node
-        graph.set_supervisor_node({
-            "name": "SUPERVISOR",
-            "business_logic": supervisor_node,
-            "members": []
-        })
-
-        # Configure worker nodes 
-        graph.set_nodes([
-            {"name": "RETRIEVAL", "business_logic": retriever_node},
-            {"name": "ANSWER", "business_logic": llm_node},
-            {"name": "TRANSLATE", "business_logic": translate_node}
-        ])
-
-        # Configure edges between nodes
-        graph.set_edges([
-            {"source": "RETRIEVAL", "target": "ANSWER", "condition": None},
-            {"source": "TRANSLATE", "target": "RETRIEVAL", "condition": None},
-            {"source": "ANSWER", "target": END, "condition": None}
-        ])
-
-        # Build and execute graph
-        app = graph.build_graph()
-        result = await app.ainvoke({"messages": [{"role": "user", "content": user_query}]})
-
-        return {"answer": result["messages"][-1].content}
\ No newline at end of file
+            dict: Response containing the generated answer, and whether it is the best
+            answer reached before the budget ran out
+
+        Raises:
+            BudgetExceeded: The budget ran out before any answer was produced
+        """
+        budget = budget or RequestBudget.from_settings()
+        if session_id is not None:
+            return await self._run_session_turn(user_query, source, user_name, session_id, budget)
+
+        version = corpus_version.version
+        answer_cache = self._answer_cache_for(source)
+        if answer_cache is not None:
+            cached = await answer_cache.lookup(user_query)
+            if cached:
+                return {"answer": cached.answer, "degraded": False}
+
+        # Identical questions asked while this one is answered wait for the same run
+        key = hash_key(normalize_text(user_query), source, version)
+        response = await get_answer_flights().do(
+            key, lambda: self._run_workflow(user_query, source, answer_cache, version, budget)
+        )
+        return dict(response)
+
+    async def _run_workflow(
+        self,
+        user_query: str,
+        source: str | None,
+        answer_cache: AnswerCache | None,
+        version: int,
+        budget: RequestBudget
+    ) -> dict:
+        """Run the retrieval workflow for a question within its budget and cache a complete answer"""
+        # Reuse the graph compiled at startup
+        app = graph_registry.get(workflow_graph())
+        result, degraded = await run_within_budget(
+            app, {"messages": [{"role": "user", "content": user_query}], "source": source}, budget
+        )
+        answer = best_answer(result) if degraded else result["messages"][-1].content
+
+        if answer_cache is not None and not degraded:
+            document_ids = [document_id(doc) for doc in result.get("retrieval_context", [])]
+            await answer_cache.store(user_query, answer, document_ids, version)
+
+        return {"answer": answer, "degraded": degraded}
+
+    async def _run_session_turn(
+        self,
+        user_query: str,
+        source: str | None,
+        user_name: str,
+        session_id: str,
+        budget: RequestBudget
+    ) -> dict:
+        """Answer a question of a conversation session within its budget"""
+        app = self.__session_store.bind(graph_registry.get(workflow_graph()))
+        async with self.__session_store.turn(user_name, session_id) as config:
+            inputs = await self._session_inputs(app, config, user_query, source)
+            result, degraded = await run_within_budget(app, inputs, budget, config)
+        answer = best_answer(result) if degraded else result["messages"][-1].content
+        return {"answer": answer, "degraded": degraded}
+
+    async def _session_inputs(self, app: CompiledStateGraph, config: dict, user_query: str, source: str | None) -> dict:
+        """
+        Build the input of a session turn from the state the previous turn left.
+
+        The fields of a single turn are reset, the chunks and language of the previous
+        turn are handed over for reuse, and the oldest turns are removed once the
+        session holds more than SESSION_MAX_MESSAGES messages.
+
+        Args:
+            app (CompiledStateGraph): Workflow bound to the session store
+            config (dict): Graph config selecting the session's thread
+            user_query (str): The new question
+            source (str | None): Only retrieve context from documents of this source
+
+        Returns:
+            dict: Workflow input
+        """
+        previous = (await app.aget_state(config)).values
+        messages = list(previous.get("messages", []))
+        version = corpus_version.version
+
+        # Keep whole turns, leaving room for the new question
+        keep = max(settings.get_int("SESSION_MAX_MESSAGES", 20) - 1, 0)
+        kept = messages[len(messages) - keep:] if len(messages) > keep else messages
+        while kept and not isinstance(kept[0], HumanMessage):
+            kept = kept[1:]
+        removed = messages[:len(messages) - len(kept)]
+
+        # Chunks are only reusable if retrieved with the same filter from the current corpus
+        reusable = previous.get("source") == source and previous.get("corpus_version") == version
+        return {
+            "messages": [*(RemoveMessage(id=message.id) for message in removed), {"role": "user", "content": user_query}],
+            "source": source,
+            "corpus_version": version,
+            "next": "",
+            "retrieval_context": [],
+            "speculative_context": [],
+            "translated_context": "",
+            "original_language": "",
+            "previous_context": previous.get("retrieval_context", []) if reusable else [],
+            # Turns without a translation were asked in Spanish
+            "previous_language": previous.get("original_language") or (SPANISH if messages else "")
+        }
+
+    async def delete_session(self, user_name: str, session_id: str) -> bool:
+        """
+        Delete a conversation session and its stored state.
+
+        Args:
+            user_name (str): Name of the user owning the session
+            session_id (str): Session to delete
+
+        Returns:
+            bool: Whether the session existed
+        """
+        return await self.__session_store.delete(user_name, session_id)
+
+    async def generate_messages(self, user_queries: list[str], source: str | None = None) -> list[BatchResult[dict]]:
+        """
+        Generate answers for many questions at once.
+
+        The questions are embedded in a single batched request, which primes the
+        embedding cache used by the answer cache and the retriever, then the workflows
+        run concurrently up to BATCH_CONCURRENCY at a time. Questions in other languages
+        are retrieved with their Spanish translation, so they are only primed when a
+        semantic answer cache embeds them as asked.
+
+        Args:
+            user_queries (list[str]): The input queries
+            source (str | None): Only retrieve context from documents of this source
+
+        Returns:
+            list[BatchResult[dict]]: Response or error of each query, in order
+        """
+        answer_cache = self._answer_cache_for(source)
+        if answer_cache is not None and answer_cache.semantic:
+            primed = user_queries
+        else:
+            primed = [query for query in user_queries if detect_language(query) == SPANISH]
+        await get_rag_service().prime_queries(primed)
+        return await gather_bounded(
+            (lambda query=query: self.generate_message(query, source=source) for query in user_queries),
+            settings.get_int("BATCH_CONCURRENCY", 8)
+        )
+
+    async def stream_message(
+        self,
+        user_query: str,
+        source: str | None = None,
+        budget: RequestBudget | None = None,
+        user_name: str | None = None,
+        session_id: str | None = None
+    ) -> AsyncIterator[dict]:
+        """
+        Generate a response message while streaming workflow progress and answer tokens.
+
+        Yields "node_start" and "node_end" events for every worker, "token" events for
+        each chunk produced by the ANSWER and TRANSLATE_OUTPUT nodes, a final "answer"
+        event and "done". Token events name their node: when TRANSLATE_OUTPUT starts, the
+        answer came out in the wrong language and its translation, streamed next,
+        replaces the ANSWER tokens. Closing the iterator cancels the running workflow.
+        When the budget runs out the answer event carries the ANSWER tokens streamed so
+        far with "degraded" set, untranslated if the translation had not finished, or an
+        "error" event is sent instead if no answer was started. With a session ID the
+        question continues the user's conversation session, as in `generate_message`.
+
+        Args:
+            user_query (str): The input query from the user
+            source (str | None): Only retrieve context from documents of this source
+            budget (RequestBudget | None): Time and step limits, the configured ones by default
+            user_name (str | None): Name of the user owning the session
+            session_id (str | None): Conversation session to continue, None for a standalone question
+
+        Yields:
+            dict: Workflow events
+        """
+        budget = budget or RequestBudget.from_settings()
+        version = corpus_version.version
+        answer_cache = self._answer_cache_for(source) if session_id is None else None
+        if answer_cache is not None:
+            cached = await answer_cache.lookup(user_query)
+            if cached:
+                yield {"event": "answer", "answer": cached.answer, "cached": True, "degraded": False}
+                yield {"event": "done"}
+                return
+
+        async with AsyncExitStack() as stack:
+            app = graph_registry.get(workflow_graph())
+            config = {}
+            inputs = {"messages": [{"role": "user", "content": user_query}], "source": source}
+            if session_id is not None:
+                app = self.__session_store.bind(app)
+                config = await stack.enter_async_context(self.__session_store.turn(user_name, session_id))
+                inputs = await self._session_inputs(app, config, user_query, source)
+
+            nodes = set(app.nodes) - {"__start__"}
+            result = {}
+            tokens: list[str] = []
+            exceeded = None
+
+            token = request_budget.set(budget)
+            events = app.astream_events(inputs, {**config, "recursion_limit": budget.max_steps}, version="v2")
+            try:
+                while True:
+                    # Bound each wait rather than the generator, which is suspended while events are sent
+                    try:
+                        event = await asyncio.wait_for(anext(events), budget.remaining())
+                    except StopAsyncIteration:
+                        break
+                    except TimeoutError:
+                        exceeded = "deadline"
+                        break
+                    except GraphRecursionError:
+                        exceeded = "steps"
+                        break
+
+                    kind = event["event"]
+                    node = event.get("metadata", {}).get("langgraph_node")
+
+                    if kind == "on_chain_start" and event["name"] in nodes and node == event["name"]:
+                        if node == "ANSWER":
+                            # Only the tokens of the latest answer make up the best answer so far
+                            tokens.clear()
+                        yield {"event": "node_start", "node": node}
+                    elif kind == "on_chain_end" and event["name"] in nodes and node == event["name"]:
+                        yield {"event": "node_end", "node": node}
+                    elif kind == "on_chain_end" and not event["parent_ids"]:
+                        # End of the root run carries the final workflow state
+                        result = event["data"]["output"]
+                    elif kind == "on_chat_model_stream" and node in ("ANSWER", "TRANSLATE_OUTPUT"):
+                        content = event["data"]["chunk"].content
+                        if content:
+                            if node == "ANSWER":
+                                tokens.append(content)
+                            yield {"event": "token", "node": node, "content": content}
+            finally:
+                await events.aclose()
+                request_budget.reset(token)
+
+        if exceeded:
+            if not tokens:
+                BUDGET_EXHAUSTED.labels(reason=exceeded, outcome="failed").inc()
+                logger.warning("Workflow budget exceeded before answering", extra={"reason": exceeded})
+                yield {"event": "error", "error": str(BudgetExceeded(exceeded))}
+                yield {"event": "done"}
+                return
+            BUDGET_EXHAUSTED.labels(reason=exceeded, outcome="degraded").inc()
+            logger.warning("Workflow budget exceeded, returning the best answer so far", extra={"reason": exceeded})
+            yield {"event": "answer", "answer": "".join(tokens), "cached": False, "degraded": True}
+            yield {"event": "done"}
+            return
+
+        answer = result["messages"][-1].content
+
+        if answer_cache is not None:
+            document_ids = [document_id(doc) for doc in result.get("retrieval_context", [])]
+            await answer_cache.store(user_query, answer, document_ids, version)
+
+        yield {"event": "answer", "answer": answer, "cached": False, "degraded": False}
+        yield {"event": "done"}
+
+
+def get_langgraph_service() -> LangGraphService:
+    """
+    Get a LangGraph service backed by the application-scoped answer cache and session store.
+
+    Returns:
+        LangGraphService: Service instance
+    """
+    return LangGraphService(get_answer_cache(), get_session_store())
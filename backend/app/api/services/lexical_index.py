@@ -0,0 +1,315 @@
+from array import array
+from threading import RLock
+from typing import Sequence
+import json
+import math
+import os
+import re
+import unicodedata
+import numpy as np
+from langchain_core.documents import Document
+
+_TOKENS = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase, accent-free terms so "Ficción" matches "ficcion".
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        list[str]: Terms in order of appearance
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _TOKENS.findall(stripped)
+
+
+def _matches(value, condition) -> bool:
+    """Check a metadata value against a filter condition in the vector store syntax"""
+    if isinstance(condition, dict):
+        if "$in" in condition:
+            return value in condition["$in"]
+        return value == condition.get("$eq")
+    return value == condition
+
+
+class BM25Index:
+    """Incremental BM25 inverted index over document chunks.
+
+    Each term maps to compact postings: parallel unsigned arrays of document rows and
+    term frequencies, appended to as documents arrive. Deletes are tombstones, dropped
+    when the index is next saved. The index is saved to a single `.npz` file, with
+    postings flattened into offsets plus two arrays, and other processes reload it when
+    the file changes, both before searching and before writing.
+
+    Attributes:
+        path (str | None): File the index is persisted to, None to keep it in memory
+    """
+
+    def __init__(self, path: str | None = None, k1: float = 1.5, b: float = 0.75) -> None:
+        """Open (and load if present) the index.
+
+        Args:
+            path (str | None): `.npz` file the index is persisted to, None to keep it in memory
+            k1 (float): BM25 term frequency saturation
+            b (float): BM25 document length normalization
+        """
+        self.path = path
+        self._k1 = k1
+        self._b = b
+        self._lock = RLock()
+        self._mtime = 0
+        self._dirty = False
+        self._reset()
+        if path and os.path.exists(path):
+            self._load()
+
+    def _reset(self) -> None:
+        """Drop every document and posting"""
+        self._terms: dict[str, int] = {}
+        self._postings_rows: list[array] = []
+        self._postings_tf: list[array] = []
+        self._ids: list[str] = []
+        self._texts: list[str] = []
+        self._metadatas: list[dict] = []
+        self._lengths = array("I")
+        self._alive = bytearray()
+        self._positions: dict[str, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        """Number of live documents"""
+        return len(self._positions)
+
+    def _load(self) -> None:
+        """Load the persisted index, expanding the flattened postings"""
+        with np.load(self.path, allow_pickle=False) as data:
+            header = json.loads(str(data["header"]))
+            offsets = data["offsets"]
+            rows = data["rows"]
+            tfs = data["tfs"]
+            lengths = data["lengths"]
+            alive = data["alive"]
+
+        self._reset()
+        self._terms = {term: term_id for term_id, term in enumerate(header["terms"])}
+        for term_id in range(len(header["terms"])):
+            start, stop = offsets[term_id], offsets[term_id + 1]
+            self._postings_rows.append(array("I", rows[start:stop].tobytes()))
+            self._postings_tf.append(array("H", tfs[start:stop].tobytes()))
+        self._ids = header["ids"]
+        self._texts = header["texts"]
+        self._metadatas = header["metadatas"]
+        self._lengths = array("I", lengths.tobytes())
+        self._alive = bytearray(alive.tobytes())
+        self._positions = {id_: row for row, id_ in enumerate(self._ids) if self._alive[row]}
+        self._total_length = sum(self._lengths[row] for row in self._positions.values())
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def save(self) -> None:
+        """Persist the index if it has unsaved changes"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def _compact(self) -> None:
+        """Drop tombstoned rows, renumbering the live ones and their postings"""
+        alive = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+        rows = np.flatnonzero(alive)
+        renumbered = np.cumsum(alive) - 1
+
+        terms: dict[str, int] = {}
+        postings_rows: list[array] = []
+        postings_tf: list[array] = []
+        for term, term_id in self._terms.items():
+            term_rows = np.frombuffer(self._postings_rows[term_id], dtype=np.uint32)
+            live = alive[term_rows]
+            if not live.any():
+                continue
+            terms[term] = len(postings_rows)
+            postings_rows.append(array("I", renumbered[term_rows[live]].astype(np.uint32).tobytes()))
+            postings_tf.append(array("H", np.frombuffer(self._postings_tf[term_id], dtype=np.uint16)[live].tobytes()))
+
+        self._terms = terms
+        self._postings_rows = postings_rows
+        self._postings_tf = postings_tf
+        self._ids = [self._ids[row] for row in rows]
+        self._texts = [self._texts[row] for row in rows]
+        self._metadatas = [self._metadatas[row] for row in rows]
+        self._lengths = array("I", np.frombuffer(self._lengths, dtype=np.uint32)[rows].tobytes())
+        self._alive = bytearray(b"\x01" * len(rows))
+        self._positions = {id_: row for row, id_ in enumerate(self._ids)}
+
+    def _save(self) -> None:
+        """Atomically persist the index with postings flattened into contiguous arrays"""
+        if len(self._positions) < len(self._ids):
+            self._compact()
+        self._dirty = False
+        if not self.path:
+            return
+        offsets = np.zeros(len(self._postings_rows) + 1, dtype=np.uint64)
+        np.cumsum([len(rows) for rows in self._postings_rows], out=offsets[1:])
+        header = {
+            "terms": list(self._terms),
+            "ids": self._ids,
+            "texts": self._texts,
+            "metadatas": self._metadatas
+        }
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            header=np.array(json.dumps(header, ensure_ascii=False)),
+            offsets=offsets,
+            rows=np.frombuffer(b"".join(rows.tobytes() for rows in self._postings_rows), dtype=np.uint32),
+            tfs=np.frombuffer(b"".join(tfs.tobytes() for tfs in self._postings_tf), dtype=np.uint16),
+            lengths=np.frombuffer(self._lengths.tobytes(), dtype=np.uint32),
+            alive=np.frombuffer(bytes(self._alive), dtype=np.uint8)
+        )
+        os.replace(tmp_path, self.path)
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def _refresh(self) -> None:
+        """Reload the index if another process saved a newer version.
+
+        An index with unsaved changes is kept as is, since reloading would lose them.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                return
+            if mtime != self._mtime and not self._dirty:
+                self._load()
+
+    def _delete_rows(self, ids: Sequence[str]) -> int:
+        """Tombstone the rows of the given IDs, returning how many were live"""
+        deleted = 0
+        for id_ in ids:
+            row = self._positions.pop(id_, None)
+            if row is not None:
+                self._alive[row] = 0
+                self._total_length -= self._lengths[row]
+                deleted += 1
+        return deleted
+
+    def add_documents(self, documents: Sequence[Document], ids: Sequence[str], save: bool = True) -> None:
+        """Index documents, replacing any previous document with the same ID.
+
+        Args:
+            documents (Sequence[Document]): Documents to index
+            ids (Sequence[str]): ID of each document, shared with the vector store
+            save (bool): Persist the index right away, False to batch writes and call `save` later
+        """
+        with self._lock:
+            self._refresh()
+            self._delete_rows(ids)
+            for document, id_ in zip(documents, ids):
+                row = len(self._ids)
+                terms = tokenize(document.page_content)
+                frequencies: dict[str, int] = {}
+                for term in terms:
+                    frequencies[term] = frequencies.get(term, 0) + 1
+
+                for term, frequency in frequencies.items():
+                    term_id = self._terms.get(term)
+                    if term_id is None:
+                        term_id = self._terms[term] = len(self._postings_rows)
+                        self._postings_rows.append(array("I"))
+                        self._postings_tf.append(array("H"))
+                    self._postings_rows[term_id].append(row)
+                    self._postings_tf[term_id].append(min(frequency, 65535))
+
+                self._ids.append(id_)
+                self._texts.append(document.page_content)
+                self._metadatas.append(document.metadata)
+                self._lengths.append(len(terms))
+                self._alive.append(1)
+                self._positions[id_] = row
+                self._total_length += len(terms)
+            self._dirty = True
+            if save:
+                self._save()
+
+    def delete(self, ids: Sequence[str]) -> int:
+        """Remove documents from the index.
+
+        Args:
+            ids (Sequence[str]): IDs of the documents to remove
+
+        Returns:
+            int: Number of documents removed
+        """
+        with self._lock:
+            self._refresh()
+            deleted = self._delete_rows(ids)
+            if deleted:
+                self._save()
+            return deleted
+
+    def search(self, query: str, k: int = 4, filter: dict | None = None) -> list[tuple[Document, float]]:
+        """Find the k documents with the highest BM25 score for a query.
+
+        Args:
+            query (str): Query text
+            k (int): Number of results
+            filter (dict | None): Optional match on metadata values, a value, {"$eq": value} or
+                {"$in": [values]} per key, e.g. {"source": {"$in": ["QnA"]}}
+
+        Returns:
+            list[tuple[Document, float]]: Documents with their BM25 score, best first
+        """
+        self._refresh()
+        with self._lock:
+            count = len(self._ids)
+            live = len(self._positions)
+            if not live:
+                return []
+
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32, count=count).astype(np.float32)
+            average_length = self._total_length / live or 1.0
+            norms = self._k1 * (1 - self._b + self._b * lengths / average_length)
+
+            scores = np.zeros(count, dtype=np.float32)
+            for term in set(tokenize(query)):
+                term_id = self._terms.get(term)
+                if term_id is None:
+                    continue
+                rows = np.frombuffer(self._postings_rows[term_id], dtype=np.uint32)
+                tfs = np.frombuffer(self._postings_tf[term_id], dtype=np.uint16).astype(np.float32)
+                alive = np.frombuffer(self._alive, dtype=np.uint8, count=count)[rows].astype(bool)
+                rows, tfs = rows[alive], tfs[alive]
+                if not len(rows):
+                    continue
+                idf = math.log(1 + (live - len(rows) + 0.5) / (len(rows) + 0.5))
+                scores[rows] += idf * tfs * (self._k1 + 1) / (tfs + norms[rows])
+
+            candidates = np.flatnonzero(scores)
+            if filter:
+                candidates = np.array([
+                    row for row in candidates
+                    if all(_matches(self._metadatas[row].get(key), condition) for key, condition in filter.items())
+                ], dtype=np.int64)
+            if not len(candidates):
+                return []
+
+            k = min(k, len(candidates))
+            top = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (Document(id=self._ids[row], page_content=self._texts[row], metadata=self._metadatas[row]), float(scores[row]))
+                for row in top
+            ]
+
+    def clear(self) -> None:
+        """Remove every document from the index"""
+        with self._lock:
+            self._reset()
+            self._save()
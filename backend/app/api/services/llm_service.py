@@ -1,49 +1,127 @@
+from typing import Callable
+import httpx
+from langchain_core.language_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from app.api.core.config import settings
+from app.api.core.metrics import llm_metrics_handler
+from app.api.services.chat_models import StubChatModel
+
+ChatModelFactory = Callable[[str, httpx.Client | None, httpx.AsyncClient | None], BaseChatModel]
+
+# Workflow roles that can each run on their own model
+ROLES = ("supervisor", "translator", "answer")
+
+
+def _openai_chat_model(
+    model: str, http_client: httpx.Client | None, http_async_client: httpx.AsyncClient | None
+) -> ChatOpenAI:
+    """OpenAI chat model reusing the pooled HTTP clients"""
+    return ChatOpenAI(
+        api_key=settings.get("OPENAI_API_KEY"),
+        model=model,
+        base_url=settings.get("OPENAI_BASE_URL") or None,
+        temperature=0,
+        callbacks=[llm_metrics_handler],
+        http_client=http_client,
+        http_async_client=http_async_client
+    )
+
+
+def _stub_chat_model(
+    model: str, http_client: httpx.Client | None, http_async_client: httpx.AsyncClient | None
+) -> StubChatModel:
+    """Local deterministic chat model, which needs no HTTP client"""
+    return StubChatModel(model=model, callbacks=[llm_metrics_handler])
+
+
+_PROVIDERS: dict[str, ChatModelFactory] = {
+    "openai": _openai_chat_model,
+    "stub": _stub_chat_model
+}
+
+
+def register_provider(name: str, factory: ChatModelFactory) -> None:
+    """Register a chat model provider, usable in model profiles as "<name>:<model>".
+
+    Args:
+        name (str): Provider name, case-insensitive
+        factory (ChatModelFactory): Builds a chat model from a model name and the pooled HTTP clients
+    """
+    _PROVIDERS[name.lower()] = factory
+
+
+def model_profile(role: str) -> tuple[str, str]:
+    """Get the provider and model configured for a workflow role.
+
+    Profiles are read from LLM_<ROLE>_MODEL as "provider:model" or a bare OpenAI
+    model name, and default to OPENAI_CHAT_MODEL.
+
+    Args:
+        role (str): One of ROLES
+
+    Returns:
+        tuple[str, str]: Provider and model names
+
+    Raises:
+        ValueError: If the role is unknown
+    """
+    if role not in ROLES:
+        raise ValueError(f"Unknown LLM role {role}, expected one of {', '.join(ROLES)}")
+    profile = settings.get(f"LLM_{role.upper()}_MODEL") or settings.get("OPENAI_CHAT_MODEL", "gpt-4o")
+    provider, separator, model = profile.partition(":")
+    # Fine-tuned OpenAI model names contain colons too
+    if not separator or provider.lower() not in _PROVIDERS:
+        return "openai", profile
+    return provider.lower(), model
 
 
 class LLMService:
     """Service class for managing LLM interactions and message generation.
-    
+
     Attributes:
-        __llm (ChatOpenAI): Instance of ChatOpenAI model
+        __llm (BaseChatModel): Chat model of the configured provider
     """
-    __llm: ChatOpenAI
+    __llm: BaseChatModel
 
-    def __init__(self, provider: str, model: str) -> None:
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        http_client: httpx.Client | None = None,
+        http_async_client: httpx.AsyncClient | None = None
+    ) -> None:
         """Initialize LLM service with specified provider and model.
-        
+
         Args:
-            provider (str): LLM provider name (currently only OpenAI supported)
+            provider (str): LLM provider name, "openai", "stub" or one added with `register_provider`
             model (str): Name of the model to use
-            
+            http_client (httpx.Client | None): Optional pooled sync HTTP client to reuse
+            http_async_client (httpx.AsyncClient | None): Optional pooled async HTTP client to reuse
+
         Raises:
             ValueError: If unsupported provider is specified
         """
-        if provider.lower() != "openai":
-            raise ValueError(f"Provider {provider} not supported. Currently only OpenAI is supported.")
-            
-        self.__llm = ChatOpenAI(
-            api_key=settings.get("OPENAI_API_KEY"),
-            model=model,
-            temperature=0
-        )
+        factory = _PROVIDERS.get(provider.lower())
+        if factory is None:
+            raise ValueError(f"Provider {provider} not supported, expected one of {', '.join(_PROVIDERS)}.")
+
+        self.__llm = factory(model, http_client, http_async_client)
 
     async def generate_message(self, content: str) -> str:
         """Generate a response using the configured LLM.
-        
+
         Args:
             content (str): Input content to send to LLM
-            
+
         Returns:
             str: Generated response from LLM
         """
-        return self.__llm.invoke(content)
-    
-    def get_llm(self) -> ChatOpenAI:
+        return await self.__llm.ainvoke(content)
+
+    def get_llm(self) -> BaseChatModel:
         """Get the configured LLM instance.
-        
+
         Returns:
-            ChatOpenAI: The configured LLM instance
+            BaseChatModel: The configured LLM instance
         """
         return self.__llm
@@ -1,38 +1,129 @@
-from fastapi import UploadFile
-from langchain_pinecone import PineconeVectorStore
-from langchain_openai import OpenAIEmbeddings
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator
+import asyncio
+import logging
+import time
+from fastapi.concurrency import run_in_threadpool
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
 from langchain_community.document_loaders import Docx2txtLoader
+from langchain_pinecone import PineconeVectorStore
 from langchain_core.documents import Document
-from app.schemas.document import DocumentResponse, DocumentRetrievalResponse, Qna
-import os
-import tempfile
+from app.schemas.document import Qna
+from app.api.core.batch import BatchResult, gather_bounded
+from app.api.core.cache import hash_key, normalize_text
+from app.api.core.chunking import TokenChunker
 from app.api.core.config import settings
+from app.api.core.corpus import corpus_version
+from app.api.core.metrics import VECTOR_STORE_CALL_DURATION, timed
+from app.api.core.singleflight import SingleFlight
+from app.api.core.taxonomy import get_source_classifier
+from app.api.services.clients import client_pool
+from app.api.services.embedding_cache import CachedEmbeddings
+from app.api.services.ingestion_pipeline import EmbeddingPipeline, PipelineStats
+from app.api.services.ingestion_manifest import IngestionManifest, chunk_id
+from app.api.services.lexical_index import BM25Index
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_MODES = ("hybrid", "vector", "lexical")
+QNA_DOCUMENT = "QnA"
+
+
+def reciprocal_rank_fusion(rankings: list[list[Document]], k: int = 60) -> list[Document]:
+    """Merge ranked result lists with reciprocal rank fusion.
+
+    Each document scores the sum of 1 / (k + rank) over the lists it appears in, so
+    documents ranked well by both retrievers rise to the top. Documents are matched
+    by content, since stores do not always return IDs.
+
+    Args:
+        rankings (list[list[Document]]): Result lists, best first
+        k (int): Rank offset damping the weight of the top positions
+
+    Returns:
+        list[Document]: Fused results, best first
+    """
+    scores: dict[str, float] = {}
+    documents: dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key = hash_key(document.page_content)
+            scores[key] = scores.get(key, 0.0) + 1 / (k + rank)
+            documents.setdefault(key, document)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
 
 
 class RAGService:
     """Service class for managing RAG (Retrieval Augmented Generation) operations.
     
-    Handles document uploading, querying, and QnA management using Pinecone vector store.
+    Handles document uploading, querying, and QnA management using a vector store and
+    a BM25 lexical index kept in sync with it.
     
     Attributes:
-        _vector_store (PineconeVectorStore): Vector store for document embeddings
-        _embeddings (OpenAIEmbeddings): OpenAI embeddings model
+        _vector_store (VectorStore): Vector store for document embeddings
+        _embeddings (Embeddings): Embeddings model
+        _lexical_index (BM25Index): Inverted index for exact-term matches
+        _manifest (IngestionManifest): Chunk IDs indexed for every document
     """
-    def __init__(self):
-        """Initialize RAG service with OpenAI embeddings and Pinecone vector store."""
-        self._embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-large", 
-            api_key=settings.get("OPENAI_API_KEY")
-        )
+    def __init__(
+        self,
+        embeddings: Embeddings | None = None,
+        vector_store: VectorStore | None = None,
+        lexical_index: BM25Index | None = None,
+        manifest: IngestionManifest | None = None
+    ):
+        """Initialize RAG service with embeddings and vector store clients.
         
-        self._vector_store = PineconeVectorStore(
-            pinecone_api_key=settings.get("PINECONE_API_KEY"),
-            index_name="piconsulting",
-            embedding=self._embeddings
+        Args:
+            embeddings (Embeddings | None): Embeddings client, defaults to the shared pooled client
+            vector_store (VectorStore | None): Vector store, defaults to the shared pooled store
+            lexical_index (BM25Index | None): Lexical index, defaults to the one at LEXICAL_INDEX_PATH
+            manifest (IngestionManifest | None): Ingestion manifest, defaults to the one at INGESTION_MANIFEST_PATH
+        """
+        self._embeddings = embeddings or client_pool.embeddings
+        self._vector_store = vector_store or client_pool.vector_store
+        self._lexical_index = lexical_index or BM25Index(settings.get("LEXICAL_INDEX_PATH", "data/lexical_index.npz"))
+        # QnAs arriving within this many seconds share one save of the lexical index
+        self._lexical_save_delay = settings.get_float("LEXICAL_SAVE_DELAY", 1.0)
+        self._lexical_saver: asyncio.Task | None = None
+        self._manifest = manifest or IngestionManifest(settings.get("INGESTION_MANIFEST_PATH", "data/ingestion_manifest.sqlite"))
+        # Serializes manifest diffs so concurrent uploads never delete a chunk another one just claimed
+        self._manifest_lock = asyncio.Lock()
+        # Chunks of the uploads in progress, and the outcome of the ones they are embedding
+        self._reserved_chunks: Counter[str] = Counter()
+        self._embedding_chunks: dict[str, asyncio.Future[bool]] = {}
+        self._classifier = get_source_classifier()
+        self._predict_source = settings.get_bool("SOURCE_PREDICTION", False)
+        self._retrieval_mode = settings.get("RETRIEVAL_MODE", "hybrid")
+        if self._retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unsupported retrieval mode {self._retrieval_mode}, expected one of {', '.join(RETRIEVAL_MODES)}")
+        self._candidates = settings.get_int("HYBRID_CANDIDATES", 10)
+        self._rrf_k = settings.get_int("HYBRID_RRF_K", 60)
+        self._batch_concurrency = settings.get_int("BATCH_CONCURRENCY", 8)
+        self._retrieval_flights: SingleFlight[list[Document]] = SingleFlight(
+            "retrieval", enabled=settings.get_bool("REQUEST_COALESCING", True)
+        )
+        self._chunker = TokenChunker(
+            max_tokens=settings.get_int("CHUNK_MAX_TOKENS", 400),
+            overlap_tokens=settings.get_int("CHUNK_OVERLAP_TOKENS", 50),
+            model=settings.get("EMBEDDING_MODEL", "text-embedding-3-large")
+        )
+        self._pipeline = EmbeddingPipeline(
+            self._embeddings,
+            self._vector_store,
+            model=settings.get("EMBEDDING_MODEL", "text-embedding-3-large"),
+            max_batch_tokens=settings.get_int("EMBED_BATCH_TOKENS", 20000),
+            max_batch_size=settings.get_int("EMBED_BATCH_SIZE", 128),
+            embed_concurrency=settings.get_int("EMBED_CONCURRENCY", 4),
+            upsert_concurrency=settings.get_int("UPSERT_CONCURRENCY", 4),
+            queue_size=settings.get_int("PIPELINE_QUEUE_SIZE", 8),
+            max_retries=settings.get_int("PIPELINE_MAX_RETRIES", 6)
         )
 
     def _identify_source_type(self, text: str) -> str:
-        """Identify the type of content based on keywords.
+        """Identify the type of content with the configured source taxonomy.
         
         Args:
             text (str): Text to identify source type for
@@ -40,62 +131,338 @@ class RAGService:
         Returns:
             str: Identified source type
         """
-        if "Ficción Espacial" in text:
-            return "Ficcion Espacial"
-        elif "Ficción Tecnológica" in text:
-            return "Ficcion Tecnologica" 
-        elif "Naturaleza" in text:
-            return "Naturaleza"
-        elif "Cuento Corto" in text:
-            return "Cuento Corto"
-        elif "Héroe" in text:
-            return "Características del Héroe Olvidado"
-        return "Unknown"
-
-    async def upload_document(self, file: UploadFile) -> DocumentResponse:
-        """Upload and process a document file.
+        return self._classifier.classify(text)
+
+    def source_filter(self, query: str, source: str | list[str] | None = None) -> list[str] | None:
+        """Resolve the sources a query is restricted to.
+
+        Args:
+            query (str): Query string
+            source (str | list[str] | None): Requested source or sources
+
+        Returns:
+            list[str] | None: Sources to search, or None to search the whole corpus. When
+            none is requested and SOURCE_PREDICTION is on, the source named in the query.
+        """
+        if source:
+            return [source] if isinstance(source, str) else list(source)
+        if self._predict_source:
+            predicted = self._classifier.predict(query)
+            if predicted:
+                return [predicted]
+        return None
+
+    async def _delete_chunks(self, ids: list[str]) -> None:
+        """Remove chunks from the vector store and the lexical index"""
+        if ids:
+            with self._store_call(self._vector_store, "delete"):
+                await self._vector_store.adelete(ids=ids)
+            with self._store_call(self._lexical_index, "delete"):
+                await run_in_threadpool(self._lexical_index.delete, ids)
+
+    def _schedule_lexical_save(self) -> None:
+        """Save the lexical index after LEXICAL_SAVE_DELAY, unless a save is already scheduled"""
+        if self._lexical_saver is None:
+            self._lexical_saver = asyncio.create_task(self._save_lexical_later())
+
+    async def _save_lexical_later(self) -> None:
+        """Wait for more writes to batch, then save the lexical index"""
+        await asyncio.sleep(self._lexical_save_delay)
+        # Writes from now on schedule their own save
+        self._lexical_saver = None
+        await run_in_threadpool(self._lexical_index.save)
+
+    async def close(self) -> None:
+        """Save any lexical index write still waiting for its batch"""
+        if self._lexical_saver is not None:
+            self._lexical_saver.cancel()
+            await asyncio.gather(self._lexical_saver, return_exceptions=True)
+            self._lexical_saver = None
+        await run_in_threadpool(self._lexical_index.save)
+
+    async def _unreferenced(self, ids: Iterable[str]) -> list[str]:
+        """Chunks no document references and no upload in progress contains, inside the manifest lock"""
+        ids = [id_ for id_ in ids if id_ not in self._reserved_chunks]
+        return list(set(ids) - await run_in_threadpool(self._manifest.referenced, ids))
+
+    def _release(self, ids: list[str], claimed: dict[str, asyncio.Future[bool]]) -> None:
+        """Drop the reservations and embedding claims of an upload, inside the manifest lock"""
+        self._reserved_chunks -= Counter(ids)
+        for id_, future in claimed.items():
+            if not future.done():
+                future.set_result(False)
+            if self._embedding_chunks.get(id_) is future:
+                del self._embedding_chunks[id_]
+
+    async def _index_chunks(
+        self,
+        document_key: str,
+        documents: Callable[[], Iterable[Document]],
+        on_progress: Callable[[int, int], None] | None = None
+    ) -> PipelineStats:
+        """Index the chunks of a document, embedding only the ones not indexed yet.
+
+        Chunk IDs are content hashes. Chunks already recorded in the manifest for any
+        document are skipped, and chunks another upload is embedding are awaited and
+        only embedded here if that upload fails. The manifest is updated, and the chunks
+        the document no longer contains are deleted, only once every chunk is indexed.
+        Until then the document's chunks are reserved, so no concurrent upload deletes
+        them. If indexing fails, the chunks it upserted are deleted again unless another
+        document references them. The chunks are iterated once for their IDs and then
+        to stream the new ones to the pipeline, so they are never held in memory all at once.
+
+        Args:
+            document_key (str): Manifest key of the document
+            documents (Callable[[], Iterable[Document]]): Returns a fresh iterator over all chunks of the document
+            on_progress (Callable[[int, int], None] | None): Called with (indexed, total) new chunks after each batch
+
+        Returns:
+            PipelineStats: Counts and throughput of the indexing
+        """
+        def collect_ids() -> list[str]:
+            return list(dict.fromkeys(
+                chunk_id(document.page_content) for document in documents() if document.page_content.strip()
+            ))
+
+        def new_documents(selected: list[str]) -> Iterator[Document]:
+            pending = set(selected)
+            for document in documents():
+                id_ = chunk_id(document.page_content)
+                if id_ in pending:
+                    pending.discard(id_)
+                    document.id = id_
+                    yield document
+
+        upserted: list[str] = []
+
+        async def index_lexical(batch_documents: list[Document], batch_ids: list[str]) -> None:
+            upserted.extend(batch_ids)
+            await run_in_threadpool(self._lexical_index.add_documents, batch_documents, batch_ids, False)
+
+        ids = await run_in_threadpool(collect_ids)
+
+        async with self._manifest_lock:
+            indexed = await run_in_threadpool(self._manifest.referenced, ids)
+            self._reserved_chunks += Counter(ids)
+
+        stats = PipelineStats()
+        claimed: dict[str, asyncio.Future[bool]] = {}
+        try:
+            pending = [id_ for id_ in ids if id_ not in indexed]
+            while pending:
+                awaited = {id_: self._embedding_chunks[id_] for id_ in pending if id_ in self._embedding_chunks}
+                own = [id_ for id_ in pending if id_ not in awaited]
+                if own:
+                    for id_ in own:
+                        claimed[id_] = self._embedding_chunks[id_] = asyncio.get_running_loop().create_future()
+                    run = await self._pipeline.run(
+                        new_documents(own), total=len(own), on_progress=on_progress, on_batch=index_lexical
+                    )
+                    for id_ in own:
+                        claimed[id_].set_result(True)
+                    stats.chunks += run.chunks
+                    stats.tokens += run.tokens
+                    stats.batches += run.batches
+                    stats.retries += run.retries
+                    stats.elapsed += run.elapsed
+                # Chunks whose upload failed are embedded by this one instead
+                embedded = await asyncio.gather(*awaited.values())
+                pending = [id_ for id_, ok in zip(awaited, embedded) if not ok]
+        except BaseException:
+            async with self._manifest_lock:
+                self._release(ids, claimed)
+                await self._delete_chunks(await self._unreferenced(upserted))
+            raise
+        finally:
+            await run_in_threadpool(self._lexical_index.save)
+
+        async with self._manifest_lock:
+            previous = await run_in_threadpool(self._manifest.chunk_ids, document_key)
+            await run_in_threadpool(self._manifest.replace, document_key, ids)
+            self._release(ids, claimed)
+            current = set(ids)
+            orphans = await self._unreferenced(id_ for id_ in previous if id_ not in current)
+            await self._delete_chunks(orphans)
+
+        stats.skipped = len(ids) - len(claimed)
+        stats.deleted = len(orphans)
+        if claimed or orphans:
+            corpus_version.bump()
+        return stats
+
+    async def upload_document(
+        self,
+        file_path: str,
+        filename: str,
+        document: str | None = None,
+        on_progress: Callable[[int, int], None] | None = None
+    ) -> PipelineStats:
+        """Parse, chunk and index a document already spooled to disk.
+
+        Re-uploading the same document only embeds its new or changed chunks and deletes
+        the ones it no longer contains.
         
         Args:
-            file (UploadFile): Document file to upload
+            file_path (str): Path of the spooled document file
+            filename (str): Original name of the uploaded file
+            document (str | None): Key identifying the document across uploads, defaults to the filename
+            on_progress (Callable[[int, int], None] | None): Called with (indexed, total) chunks after each batch
             
         Returns:
-            DocumentResponse: Response containing filename and size
+            PipelineStats: Chunk counts and throughput of the indexing
         """
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file.filename) as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
+        # Docx parsing has no async API, keep it off the event loop
+        loader = Docx2txtLoader(file_path)
+        data = await run_in_threadpool(loader.load)
+        text = data[0].page_content
+
+        def documents() -> Iterator[Document]:
+            for chunk in self._chunker.split(text):
+                metadata = {"source": self._identify_source_type(chunk.text)}
+                if chunk.section:
+                    metadata["section"] = chunk.section
+                yield Document(page_content=chunk.text, metadata=metadata)
 
+        document = document or filename
+        stats = await self._index_chunks(document, documents, on_progress=on_progress)
+        logger.info("Document indexed", extra={"document": document, **stats.to_dict()})
+        return stats
+
+    @staticmethod
+    def _store_call(store, operation: str):
+        """Time a call to the vector store or the lexical index"""
+        return timed(VECTOR_STORE_CALL_DURATION, "vector_store", store=type(store).__name__, operation=operation)
+
+    async def _vector_search(self, query: str, k: int, sources: list[str] | None) -> list[Document]:
+        """Embed the query and search the vector store"""
+        embedding = await self._embeddings.aembed_query(query)
+        filter = {"source": {"$in": sources}} if sources else None
+        with self._store_call(self._vector_store, "search"):
+            if isinstance(self._vector_store, PineconeVectorStore):
+                # PineconeVectorStore only implements the scored search by vector, and only synchronously
+                results = await run_in_threadpool(
+                    self._vector_store.similarity_search_by_vector_with_score, embedding, k=k, filter=filter
+                )
+                return [document for document, _ in results]
+            return await self._vector_store.asimilarity_search_by_vector(embedding, k=k, filter=filter)
+
+    async def _lexical_search(self, query: str, k: int, sources: list[str] | None) -> list[Document]:
+        """Search the BM25 index off the event loop"""
+        filter = {"source": {"$in": sources}} if sources else None
+        with self._store_call(self._lexical_index, "search"):
+            results = await run_in_threadpool(self._lexical_index.search, query, k, filter)
+        return [document for document, _ in results]
+
+    async def _timed(self, timings: dict[str, float], stage: str, coroutine) -> list[Document]:
+        """Await a retrieval stage and record its duration in milliseconds"""
+        started = time.perf_counter()
         try:
-            loader = Docx2txtLoader(tmp_path)
-            data = loader.load()
-            chunks = data[0].page_content.split('\n\n')
-
-            documents = [
-                Document(
-                    page_content=chunk,
-                    metadata={"source": self._identify_source_type(chunk)}
-                ) for chunk in chunks
-            ]
-            
-            self._vector_store.add_documents(documents)
-            return {"filename": file.filename, "size": len(content)}
-            
+            return await coroutine
         finally:
-            os.unlink(tmp_path)
+            timings[stage] = round((time.perf_counter() - started) * 1000, 2)
+
+    async def query_document(
+        self,
+        query: str,
+        k: int = 3,
+        source: str | list[str] | None = None
+    ) -> list[Document]:
+        """Query the corpus for relevant documents.
 
-    async def query_document(self, query: str, k: int = 3) -> DocumentRetrievalResponse:
-        """Query the vector store for relevant documents.
+        In hybrid mode the vector search and the BM25 search run concurrently and
+        their results are merged with reciprocal rank fusion. Both searches are
+        restricted to the requested (or predicted) sources. Concurrent identical
+        queries (same normalized text, k, sources and corpus version) share one search.
         
         Args:
             query (str): Query string to search for
             k (int): Number of results to return
+            source (str | list[str] | None): Only return documents of these sources, e.g. "QnA"
             
         Returns:
-            DocumentRetrievalResponse: Response containing matched documents
+            list[Document]: Matched documents, best first
+        """
+        sources = self.source_filter(query, source)
+        key = hash_key(normalize_text(query), k, sorted(sources) if sources else None, corpus_version.version)
+        documents = await self._retrieval_flights.do(key, lambda: self._search(query, k, sources))
+        # Every coalesced caller gets its own list over the shared documents
+        return list(documents)
+
+    def coalescing_stats(self) -> dict:
+        """Get how many searches ran and how many identical queries joined them.
+
+        Returns:
+            dict: Coalescing statistics
         """
-        return self._vector_store.similarity_search(query, k)
+        return self._retrieval_flights.stats()
+
+    async def _search(self, query: str, k: int, sources: list[str] | None) -> list[Document]:
+        """Run the configured retrieval mode and log its stage timings"""
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+
+        if self._retrieval_mode == "vector":
+            documents = await self._timed(timings, "vector", self._vector_search(query, k, sources))
+        elif self._retrieval_mode == "lexical":
+            documents = await self._timed(timings, "lexical", self._lexical_search(query, k, sources))
+        else:
+            candidates = max(k, self._candidates)
+            vector_results, lexical_results = await asyncio.gather(
+                self._timed(timings, "vector", self._vector_search(query, candidates, sources)),
+                self._timed(timings, "lexical", self._lexical_search(query, candidates, sources))
+            )
+            fusion_started = time.perf_counter()
+            documents = reciprocal_rank_fusion([vector_results, lexical_results], self._rrf_k)[:k]
+            timings["fusion"] = round((time.perf_counter() - fusion_started) * 1000, 2)
+
+        timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+        logger.info("Retrieval finished", extra={
+            "mode": self._retrieval_mode, "sources": sources, "k": k, "results": len(documents), "timings_ms": timings
+        })
+        return documents
     
+    async def prime_queries(self, queries: list[str]) -> None:
+        """Embed many queries in one batched request so their searches hit the embedding cache.
+
+        Only queries searched exactly as given benefit, so callers pass the text that will
+        be searched, e.g. the Spanish translation of a question rather than the question.
+
+        Args:
+            queries (list[str]): Queries about to be searched
+        """
+        if not queries or not isinstance(self._embeddings, CachedEmbeddings) or self._retrieval_mode == "lexical":
+            return
+        try:
+            await self._embeddings.aembed_queries(queries)
+        except Exception as e:
+            # Only an optimization: each query still embeds itself when searched
+            logger.warning("Batched query embedding failed, embedding queries one by one", extra={"error": repr(e)})
+
+    async def query_documents(
+        self,
+        queries: list[str],
+        k: int = 3,
+        source: str | list[str] | None = None
+    ) -> list[BatchResult[list[Document]]]:
+        """Query the corpus for many queries at once.
+
+        All queries are embedded in a single batched request, then searched
+        concurrently up to BATCH_CONCURRENCY at a time.
+
+        Args:
+            queries (list[str]): Query strings to search for
+            k (int): Number of results per query
+            source (str | list[str] | None): Only return documents of these sources
+
+        Returns:
+            list[BatchResult[list[Document]]]: Documents or error of each query, in order
+        """
+        await self.prime_queries(queries)
+        return await gather_bounded(
+            (lambda query=query: self.query_document(query, k=k, source=source) for query in queries),
+            self._batch_concurrency
+        )
+
     async def upload_qna(self, qna: Qna) -> dict:
         """Upload a QnA pair to the vector store.
         
@@ -107,6 +474,46 @@ class RAGService:
         """
         content = f"Questions: {qna.question}\n\nAnswer: {qna.answer}"
         document = Document(page_content=content, metadata={"source": "QnA"})
-        self._vector_store.add_documents([document])
+        id_ = chunk_id(content)
+
+        # Reserve the chunk so the manifest lock is not held while it is upserted
+        while True:
+            async with self._manifest_lock:
+                if await run_in_threadpool(self._manifest.referenced, [id_]):
+                    return {"message": "QnA already uploaded"}
+                awaited = self._embedding_chunks.get(id_)
+                if awaited is None:
+                    claimed = {id_: asyncio.get_running_loop().create_future()}
+                    self._embedding_chunks.update(claimed)
+                    self._reserved_chunks[id_] += 1
+                    break
+            # The same pair is being uploaded, only upload it here if that upload fails
+            if await awaited:
+                return {"message": "QnA already uploaded"}
+
+        try:
+            with self._store_call(self._vector_store, "upsert"):
+                await self._vector_store.aadd_documents([document], ids=[id_])
+            await run_in_threadpool(self._lexical_index.add_documents, [document], [id_], False)
+            async with self._manifest_lock:
+                await run_in_threadpool(self._manifest.add, QNA_DOCUMENT, [id_])
+                claimed[id_].set_result(True)
+                self._release([id_], claimed)
+        except BaseException:
+            async with self._manifest_lock:
+                self._release([id_], claimed)
+            raise
+        self._schedule_lexical_save()
+        corpus_version.bump()
         
         return {"message": "QnA uploaded successfully"}
+
+
+@lru_cache(maxsize=1)
+def get_rag_service() -> RAGService:
+    """Get the application-scoped RAG service backed by the shared client pool.
+    
+    Returns:
+        RAGService: Shared RAG service instance
+    """
+    return RAGService()
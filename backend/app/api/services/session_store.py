@@ -0,0 +1,229 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import AsyncIterator
+import asyncio
+import logging
+import os
+import time
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from langgraph.graph.state import CompiledStateGraph
+from app.api.core.cache import hash_key
+from app.api.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Session:
+    """Lock serializing the turns of a session and the number of turns holding or awaiting it"""
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    users: int = 0
+
+
+class SessionStore:
+    """Conversation sessions persisted in SQLite through a LangGraph checkpointer.
+
+    Each session is a checkpointer thread keyed by user and session ID. After every
+    turn only its latest checkpoint is kept, since it holds the whole workflow state,
+    and sessions idle for longer than the TTL are deleted by a background sweep.
+    Turns of the same session run one at a time.
+    """
+
+    def __init__(self, path: str, ttl: float | None = 86400, sweep_interval: float = 600) -> None:
+        """Initialize the store. The database is opened with `open`.
+
+        Args:
+            path (str): Path of the SQLite database
+            ttl (float | None): Seconds a session is kept after its last turn, None to keep sessions forever
+            sweep_interval (float): Seconds between sweeps of expired sessions
+        """
+        self._path = path
+        self._ttl = ttl
+        self._sweep_interval = sweep_interval
+        self._conn: aiosqlite.Connection | None = None
+        self._checkpointer: AsyncSqliteSaver | None = None
+        self._graphs: dict[int, CompiledStateGraph] = {}
+        self._sessions: dict[str, _Session] = {}
+        self._sweeper: asyncio.Task | None = None
+
+    async def open(self) -> None:
+        """Open the database, create its tables and start the sweeper"""
+        if os.path.dirname(self._path):
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        self._conn = await aiosqlite.connect(self._path)
+        self._checkpointer = AsyncSqliteSaver(self._conn)
+        await self._checkpointer.setup()
+        async with self._checkpointer.lock:
+            await self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "thread_id TEXT PRIMARY KEY, user_name TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            await self._conn.commit()
+        if self._ttl is not None:
+            self._sweeper = asyncio.create_task(self._sweep_periodically())
+
+    async def close(self) -> None:
+        """Stop the sweeper and close the database"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+        self._checkpointer = None
+        self._graphs.clear()
+
+    @staticmethod
+    def thread_id(user_name: str, session_id: str) -> str:
+        """Checkpointer thread of a session, so session IDs of different users never collide.
+
+        Args:
+            user_name (str): Name of the user
+            session_id (str): Session ID chosen by the client
+
+        Returns:
+            str: Thread ID
+        """
+        return hash_key(user_name, session_id)
+
+    def bind(self, graph: CompiledStateGraph) -> CompiledStateGraph:
+        """Get a copy of a compiled graph that checkpoints its state in this store.
+
+        Args:
+            graph (CompiledStateGraph): Compiled graph without a checkpointer
+
+        Returns:
+            CompiledStateGraph: The same graph with the store's checkpointer, made once per graph
+        """
+        if self._checkpointer is None:
+            raise RuntimeError("The session store is not open")
+        bound = self._graphs.get(id(graph))
+        if bound is None:
+            bound = self._graphs[id(graph)] = graph.copy(update={"checkpointer": self._checkpointer})
+        return bound
+
+    @asynccontextmanager
+    async def turn(self, user_name: str, session_id: str) -> AsyncIterator[dict]:
+        """Run one turn of a session, after any turn of it still running.
+
+        When the turn ends, older checkpoints of the session are deleted and its
+        expiry is pushed back.
+
+        Args:
+            user_name (str): Name of the user
+            session_id (str): Session ID chosen by the client
+
+        Yields:
+            dict: Graph config selecting the session's thread
+        """
+        thread_id = self.thread_id(user_name, session_id)
+        session = self._sessions.setdefault(thread_id, _Session())
+        session.users += 1
+        try:
+            async with session.lock:
+                try:
+                    yield {"configurable": {"thread_id": thread_id}}
+                finally:
+                    await self._end_turn(thread_id, user_name)
+        finally:
+            session.users -= 1
+            if not session.users:
+                self._sessions.pop(thread_id, None)
+
+    async def _end_turn(self, thread_id: str, user_name: str) -> None:
+        """Keep only the latest checkpoint of a thread and record its activity"""
+        async with self._checkpointer.lock:
+            latest = "SELECT MAX(checkpoint_id) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ''"
+            await self._conn.execute(
+                f"DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_id < ({latest})", (thread_id, thread_id)
+            )
+            await self._conn.execute(
+                f"DELETE FROM writes WHERE thread_id = ? AND checkpoint_id < ({latest})", (thread_id, thread_id)
+            )
+            await self._conn.execute(
+                "INSERT INTO sessions (thread_id, user_name, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET updated_at = excluded.updated_at",
+                (thread_id, user_name, time.time())
+            )
+            await self._conn.commit()
+
+    async def delete(self, user_name: str, session_id: str) -> bool:
+        """Delete a session and its state.
+
+        Args:
+            user_name (str): Name of the user
+            session_id (str): Session ID chosen by the client
+
+        Returns:
+            bool: Whether the session existed
+        """
+        thread_id = self.thread_id(user_name, session_id)
+        async with self._checkpointer.lock:
+            deleted = await self._delete_threads([thread_id])
+            await self._conn.commit()
+        return bool(deleted)
+
+    async def _delete_threads(self, thread_ids: list[str]) -> int:
+        """Delete the checkpoints and records of threads, inside the checkpointer lock"""
+        placeholders = ",".join("?" * len(thread_ids))
+        await self._conn.execute(f"DELETE FROM checkpoints WHERE thread_id IN ({placeholders})", thread_ids)
+        await self._conn.execute(f"DELETE FROM writes WHERE thread_id IN ({placeholders})", thread_ids)
+        cursor = await self._conn.execute(f"DELETE FROM sessions WHERE thread_id IN ({placeholders})", thread_ids)
+        return cursor.rowcount
+
+    async def sweep(self) -> int:
+        """Delete the sessions idle for longer than the TTL.
+
+        Returns:
+            int: Number of deleted sessions
+        """
+        async with self._checkpointer.lock:
+            cursor = await self._conn.execute(
+                "SELECT thread_id FROM sessions WHERE updated_at < ?", (time.time() - self._ttl,)
+            )
+            # Sessions in the middle of a turn are not idle
+            expired = [row[0] for row in await cursor.fetchall() if row[0] not in self._sessions]
+            if not expired:
+                return 0
+            deleted = await self._delete_threads(expired)
+            await self._conn.commit()
+        logger.info("Expired sessions deleted", extra={"sessions": deleted})
+        return deleted
+
+    async def _sweep_periodically(self) -> None:
+        """Sweep expired sessions until cancelled"""
+        while True:
+            await asyncio.sleep(self._sweep_interval)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Session sweep failed")
+
+    async def stats(self) -> dict:
+        """Get the number of stored sessions and checkpoints.
+
+        Returns:
+            dict: Session statistics
+        """
+        async with self._checkpointer.lock:
+            sessions = await (await self._conn.execute("SELECT COUNT(*) FROM sessions")).fetchone()
+            checkpoints = await (await self._conn.execute("SELECT COUNT(*) FROM checkpoints")).fetchone()
+        return {"sessions": sessions[0], "checkpoints": checkpoints[0], "active": len(self._sessions)}
+
+
+@lru_cache(maxsize=1)
+def get_session_store() -> SessionStore:
+    """Get the application-scoped session store, opened at startup.
+
+    Returns:
+        SessionStore: Shared session store
+    """
+    ttl = settings.get_float("SESSION_TTL", 86400)
+    return SessionStore(
+        settings.get("SESSION_DB_PATH", "data/sessions.sqlite"),
+        ttl=ttl if ttl > 0 else None,
+        sweep_interval=settings.get_float("SESSION_SWEEP_INTERVAL", 600)
+    )
@@ -0,0 +1,125 @@
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+import json
+import os
+from fastapi.concurrency import run_in_threadpool
+from app.api.core.cache import SQLiteStore, TTLLRUCache, hash_key, normalize_text
+from app.api.core.config import settings
+from app.api.core.metrics import CACHE_REQUESTS
+
+
+@dataclass
+class Translation:
+    """Translation of a question.
+
+    Attributes:
+        text (str): Translated text
+        language (str): Language the question was written in
+    """
+    text: str
+    language: str
+
+
+class TranslationCache:
+    """Translations of questions cached in memory and optionally on disk.
+
+    Entries are keyed by the hash of the normalized question and the target
+    language, so a question asked again is answered without calling the LLM.
+    Both tiers are bounded: the in-process LRU by `maxsize` and the store by its own
+    maximum size.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float | None = None, store: SQLiteStore | None = None) -> None:
+        """Initialize the cache.
+
+        Args:
+            maxsize (int): Maximum entries of the in-process LRU
+            ttl (float | None): Seconds an in-process entry stays valid
+            store (SQLiteStore | None): Optional persistent second tier
+        """
+        self._memory = TTLLRUCache(maxsize=maxsize, ttl=ttl)
+        self._store = store
+
+    @staticmethod
+    def _key(text: str, target_language: str) -> str:
+        """Cache key of a text translated to a language"""
+        return hash_key(normalize_text(text), target_language)
+
+    def _load(self, key: str) -> Translation | None:
+        """Load a translation from the persistent store, promoting hits to memory"""
+        raw = self._store.get(key)
+        if raw is None:
+            return None
+        translation = Translation(**json.loads(raw))
+        self._memory.set(key, translation)
+        return translation
+
+    def _save(self, key: str, translation: Translation) -> None:
+        """Store a translation in both tiers"""
+        self._memory.set(key, translation)
+        if self._store is not None:
+            self._store.set(key, json.dumps(asdict(translation), ensure_ascii=False).encode("utf-8"))
+
+    async def get(self, text: str, target_language: str) -> Translation | None:
+        """Get the cached translation of a text.
+
+        Args:
+            text (str): Text that was translated
+            target_language (str): Language it was translated to
+
+        Returns:
+            Translation | None: The translation, or None on a miss
+        """
+        key = self._key(text, target_language)
+        translation = self._memory.get(key)
+        if translation is not None:
+            CACHE_REQUESTS.labels(cache="translations", result="memory_hit").inc()
+            return translation
+        if self._store is not None:
+            translation = await run_in_threadpool(self._load, key)
+            if translation is not None:
+                CACHE_REQUESTS.labels(cache="translations", result="disk_hit").inc()
+                return translation
+        CACHE_REQUESTS.labels(cache="translations", result="miss").inc()
+        return None
+
+    async def set(self, text: str, target_language: str, translation: Translation) -> None:
+        """Cache the translation of a text.
+
+        Args:
+            text (str): Text that was translated
+            target_language (str): Language it was translated to
+            translation (Translation): The translation
+        """
+        key = self._key(text, target_language)
+        if self._store is None:
+            self._memory.set(key, translation)
+        else:
+            await run_in_threadpool(self._save, key, translation)
+
+    def close(self) -> None:
+        """Close the persistent store"""
+        if self._store is not None:
+            self._store.close()
+
+
+@lru_cache(maxsize=1)
+def get_translation_cache() -> TranslationCache:
+    """Get the application-scoped translation cache.
+
+    Returns:
+        TranslationCache: Shared cache, persisted to TRANSLATION_CACHE_PATH unless it is empty
+    """
+    path = settings.get("TRANSLATION_CACHE_PATH", "data/translation_cache.sqlite")
+    ttl = settings.get_float("TRANSLATION_CACHE_TTL", 30 * 86400) or None
+    store = None
+    if path:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        store = SQLiteStore(
+            path,
+            "translations",
+            ttl=ttl,
+            maxsize=settings.get_int("TRANSLATION_CACHE_DISK_SIZE", 100000)
+        )
+    return TranslationCache(maxsize=settings.get_int("TRANSLATION_CACHE_SIZE", 10000), ttl=ttl, store=store)
@@ -0,0 +1,4 @@
+from app.api.services.vectorstores.local_mmap import LocalMmapVectorStore
+from app.api.services.vectorstores.pinecone_index import PooledPineconeVectorStore
+
+__all__ = ["LocalMmapVectorStore", "PooledPineconeVectorStore"]
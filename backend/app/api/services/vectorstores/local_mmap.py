@@ -0,0 +1,512 @@
+from threading import RLock
+from typing import Any, Iterable, Optional, Sequence
+import asyncio
+import json
+import os
+import sqlite3
+import uuid
+from pathlib import Path
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+_HEADER = "index.json"
+_METADATA = "metadata.sqlite"
+# Rows upcast at a time when scoring a half-precision matrix
+_SCORE_BLOCK = 1024
+# Share of dead rows beyond which the index is compacted
+_COMPACT_RATIO = 0.5
+
+
+class LocalMmapVectorStore(VectorStore):
+    """Local vector store keeping embeddings in a memory-mapped NumPy matrix.
+
+    Vectors are L2-normalized on write and stored contiguously in `vectors.<dtype>`,
+    so cosine search is a single matrix-vector product. Texts and metadata live in a
+    sidecar SQLite file. Deletes are tombstones and upserts of an existing ID replace
+    the previous row. Once more than half of the rows are dead, the live ones are
+    copied to a new generation of the vectors file and metadata table. The previous
+    generation is kept until the next compaction, for readers still using it. A store
+    opened with `read_only=True` maps the file and opens the metadata read-only, and
+    picks up appends made by the writer process, so many workers can share one index.
+
+    Attributes:
+        path (str): Directory holding the index files
+    """
+
+    def __init__(
+        self,
+        path: str,
+        embedding: Embeddings,
+        dtype: str = "float32",
+        read_only: bool = False,
+        initial_capacity: int = 1024
+    ) -> None:
+        """Open (and create if needed) the index.
+
+        Args:
+            path (str): Directory holding the index files
+            embedding (Embeddings): Embeddings used for text queries and add_texts
+            dtype (str): "float32" or "float16" storage precision
+            read_only (bool): Open the index for reading only
+            initial_capacity (int): Rows allocated when the index is created
+        """
+        self.path = path
+        self._embedding = embedding
+        self._read_only = read_only
+        self._initial_capacity = initial_capacity
+        self._lock = RLock()
+
+        header_path = os.path.join(path, _HEADER)
+        if read_only:
+            if not os.path.exists(header_path):
+                raise FileNotFoundError(f"No local vector index at {path}")
+            uri = f"{Path(path, _METADATA).resolve().as_uri()}?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            os.makedirs(path, exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(path, _METADATA), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._create_table("rows")
+            self._conn.commit()
+
+        if os.path.exists(header_path):
+            self._load()
+        else:
+            self._header = {"dtype": dtype, "dim": 0, "capacity": initial_capacity, "count": 0, "generation": 0}
+            self._matrix = None
+            self._ids: list[str] = []
+            self._sources = np.empty(0, dtype=object)
+            self._alive = np.empty(0, dtype=bool)
+            self._positions: dict[str, int] = {}
+            self._header_mtime = 0
+
+    @property
+    def embeddings(self) -> Embeddings:
+        """Embeddings used for text queries"""
+        return self._embedding
+
+    def _vectors_file(self, generation: int) -> str:
+        """Path of the vectors file of a generation, the first one keeps the original name"""
+        name = f"vectors.{generation}.{self._header['dtype']}" if generation else f"vectors.{self._header['dtype']}"
+        return os.path.join(self.path, name)
+
+    @staticmethod
+    def _table_name(generation: int) -> str:
+        """Metadata table of a generation, the first one keeps the original name"""
+        return f"rows_{generation}" if generation else "rows"
+
+    @property
+    def _vectors_path(self) -> str:
+        return self._vectors_file(self._header.get("generation", 0))
+
+    @property
+    def _table(self) -> str:
+        return self._table_name(self._header.get("generation", 0))
+
+    def _create_table(self, table: str) -> None:
+        """Create a metadata table if it does not exist"""
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "row INTEGER PRIMARY KEY, id TEXT NOT NULL, text TEXT NOT NULL, "
+            "metadata TEXT NOT NULL, deleted INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_id ON {table} (id)")
+
+    def _open_matrix(self) -> np.memmap | None:
+        """Map the vectors file with the capacity recorded in the header"""
+        if not self._header["dim"]:
+            return None
+        return np.memmap(
+            self._vectors_path,
+            dtype=self._header["dtype"],
+            mode="r" if self._read_only else "r+",
+            shape=(self._header["capacity"], self._header["dim"])
+        )
+
+    def _load(self) -> None:
+        """Load the header, map the vectors and rebuild the row-level arrays"""
+        header_path = os.path.join(self.path, _HEADER)
+        with open(header_path) as header_file:
+            self._header = json.load(header_file)
+        self._header_mtime = os.stat(header_path).st_mtime_ns
+        self._matrix = self._open_matrix()
+
+        count = self._header["count"]
+        rows = self._conn.execute(
+            f"SELECT id, metadata, deleted FROM {self._table} WHERE row < ? ORDER BY row", (count,)
+        ).fetchall()
+        self._ids = [row[0] for row in rows]
+        self._sources = np.array([json.loads(row[1]).get("source") for row in rows], dtype=object)
+        self._alive = np.array([not row[2] for row in rows], dtype=bool)
+        self._positions = {id_: row for row, id_ in enumerate(self._ids) if self._alive[row]}
+
+    def _refresh(self) -> None:
+        """Reload the index if another process appended to it"""
+        try:
+            mtime = os.stat(os.path.join(self.path, _HEADER)).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._header_mtime:
+            with self._lock:
+                self._load()
+
+    def _write_header(self) -> None:
+        """Atomically persist the header so readers only see complete appends"""
+        header_path = os.path.join(self.path, _HEADER)
+        tmp_path = f"{header_path}.tmp"
+        with open(tmp_path, "w") as header_file:
+            json.dump(self._header, header_file)
+        os.replace(tmp_path, header_path)
+        self._header_mtime = os.stat(header_path).st_mtime_ns
+
+    def _ensure_capacity(self, dim: int, rows: int) -> None:
+        """Create or grow the vectors file so `rows` more vectors fit"""
+        if not self._header["dim"]:
+            self._header["dim"] = dim
+        elif dim != self._header["dim"]:
+            raise ValueError(f"Vector dimension {dim} does not match index dimension {self._header['dim']}")
+
+        needed = self._header["count"] + rows
+        capacity = self._header["capacity"]
+        if self._matrix is not None and needed <= capacity:
+            return
+
+        while capacity < needed:
+            capacity *= 2
+
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        # Growing the file keeps existing rows in place
+        with open(self._vectors_path, "ab") as vectors_file:
+            vectors_file.truncate(capacity * dim * np.dtype(self._header["dtype"]).itemsize)
+        self._header["capacity"] = capacity
+        self._matrix = self._open_matrix()
+
+    def add_embeddings(
+        self,
+        documents: Sequence[Document],
+        vectors: Sequence[Sequence[float]],
+        ids: Optional[Sequence[str]] = None
+    ) -> list[str]:
+        """Append documents with precomputed embeddings, replacing existing IDs.
+
+        Args:
+            documents (Sequence[Document]): Documents to store
+            vectors (Sequence[Sequence[float]]): Embedding of each document
+            ids (Optional[Sequence[str]]): ID of each document, random UUIDs when omitted
+
+        Returns:
+            list[str]: IDs of the stored documents
+        """
+        if self._read_only:
+            raise PermissionError("Local vector index is opened read-only")
+        if not documents:
+            return []
+
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in documents]
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            self.delete(ids)
+            self._ensure_capacity(matrix.shape[1], len(documents))
+
+            start = self._header["count"]
+            self._matrix[start:start + len(documents)] = matrix.astype(self._header["dtype"])
+            self._matrix.flush()
+
+            self._conn.executemany(
+                f"INSERT INTO {self._table} (row, id, text, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (start + i, id_, document.page_content, json.dumps(document.metadata, ensure_ascii=False))
+                    for i, (id_, document) in enumerate(zip(ids, documents))
+                ]
+            )
+            self._conn.commit()
+
+            self._ids.extend(ids)
+            self._sources = np.concatenate([
+                self._sources, np.array([document.metadata.get("source") for document in documents], dtype=object)
+            ])
+            self._alive = np.concatenate([self._alive, np.ones(len(documents), dtype=bool)])
+            self._positions.update({id_: start + i for i, id_ in enumerate(ids)})
+            self._header["count"] = start + len(documents)
+            self._write_header()
+
+        return ids
+
+    async def aadd_embeddings(
+        self,
+        documents: Sequence[Document],
+        vectors: Sequence[Sequence[float]],
+        ids: Optional[Sequence[str]] = None
+    ) -> list[str]:
+        """Async variant of add_embeddings, run in a worker thread since it commits to disk"""
+        return await asyncio.to_thread(self.add_embeddings, documents, vectors, ids)
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[list[dict]] = None,
+        *,
+        ids: Optional[list[str]] = None,
+        **kwargs: Any
+    ) -> list[str]:
+        """Embed and store texts"""
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        documents = [Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas)]
+        return self.add_embeddings(documents, self._embedding.embed_documents(texts), ids)
+
+    async def aadd_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[list[dict]] = None,
+        *,
+        ids: Optional[list[str]] = None,
+        **kwargs: Any
+    ) -> list[str]:
+        """Embed texts asynchronously and store them"""
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        documents = [Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas)]
+        vectors = await self._embedding.aembed_documents(texts)
+        return await self.aadd_embeddings(documents, vectors, ids)
+
+    def delete(self, ids: Optional[list[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Tombstone documents by ID.
+
+        Args:
+            ids (Optional[list[str]]): IDs to delete
+
+        Returns:
+            Optional[bool]: True once the IDs are deleted
+        """
+        if self._read_only:
+            raise PermissionError("Local vector index is opened read-only")
+        if not ids:
+            return True
+
+        with self._lock:
+            rows = [self._positions.pop(id_) for id_ in ids if id_ in self._positions]
+            if rows:
+                self._alive[rows] = False
+                self._conn.executemany(
+                    f"UPDATE {self._table} SET deleted = 1 WHERE row = ?", [(row,) for row in rows]
+                )
+                self._conn.commit()
+                count = self._header["count"]
+                if count - len(self._positions) > count * _COMPACT_RATIO:
+                    self._compact()
+                else:
+                    self._write_header()
+        return True
+
+    def _compact(self) -> None:
+        """Copy the live rows to a new generation of the vectors file and metadata table, inside the lock.
+
+        The header is written last, so readers switch to the new generation all at
+        once. The generation before the previous one is removed afterwards.
+        """
+        rows = np.flatnonzero(self._alive)
+        generation = self._header.get("generation", 0) + 1
+        capacity = self._initial_capacity
+        while capacity < 2 * len(rows):
+            capacity *= 2
+
+        path = self._vectors_file(generation)
+        with open(path, "wb") as vectors_file:
+            vectors_file.truncate(capacity * self._header["dim"] * np.dtype(self._header["dtype"]).itemsize)
+        matrix = np.memmap(path, dtype=self._header["dtype"], mode="r+", shape=(capacity, self._header["dim"]))
+        for start in range(0, len(rows), _SCORE_BLOCK):
+            block = rows[start:start + _SCORE_BLOCK]
+            matrix[start:start + len(block)] = self._matrix[block]
+        matrix.flush()
+
+        table = self._table_name(generation)
+        # Left over by a compaction that did not finish
+        self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+        self._create_table(table)
+        self._conn.execute(
+            f"INSERT INTO {table} (row, id, text, metadata) "
+            f"SELECT ROW_NUMBER() OVER (ORDER BY row) - 1, id, text, metadata FROM {self._table} "
+            "WHERE deleted = 0 AND row < ?",
+            (self._header["count"],)
+        )
+        self._conn.commit()
+
+        del self._matrix
+        self._matrix = matrix
+        self._ids = [self._ids[row] for row in rows]
+        self._sources = self._sources[rows]
+        self._alive = np.ones(len(rows), dtype=bool)
+        self._positions = {id_: row for row, id_ in enumerate(self._ids)}
+        self._header.update(count=len(rows), capacity=capacity, generation=generation)
+        self._write_header()
+
+        if generation >= 2:
+            self._conn.execute(f"DROP TABLE IF EXISTS {self._table_name(generation - 2)}")
+            self._conn.commit()
+            try:
+                os.remove(self._vectors_file(generation - 2))
+            except FileNotFoundError:
+                pass
+
+    def get_by_ids(self, ids: Sequence[str], /) -> list[Document]:
+        """Get live documents by ID"""
+        if not ids:
+            return []
+        placeholders = ",".join("?" for _ in ids)
+        rows = self._conn.execute(
+            f"SELECT id, text, metadata FROM {self._table} WHERE deleted = 0 AND id IN ({placeholders})", list(ids)
+        ).fetchall()
+        return [Document(id=row[0], page_content=row[1], metadata=json.loads(row[2])) for row in rows]
+
+    def _candidate_mask(self, count: int, filter: Optional[dict]) -> np.ndarray:
+        """Mask of live rows matching a Pinecone-style filter on `source` ($eq or $in)"""
+        mask = self._alive[:count].copy()
+        if not filter:
+            return mask
+
+        for key, condition in filter.items():
+            if key != "source":
+                raise ValueError(f"Local vector index can only filter on source, got {key}")
+            if isinstance(condition, dict):
+                values = condition.get("$in") or [condition.get("$eq")]
+            else:
+                values = [condition]
+            mask &= np.isin(self._sources[:count], values)
+        return mask
+
+    @staticmethod
+    def _scores(matrix: np.ndarray, count: int, query: np.ndarray) -> np.ndarray:
+        """Dot products of the first `count` rows with a float32 query.
+
+        NumPy has no BLAS kernel for float16, so half-precision rows are upcast
+        in blocks that stay in cache instead of being multiplied directly.
+        """
+        if matrix.dtype == np.float32:
+            return matrix[:count] @ query
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, _SCORE_BLOCK):
+            stop = min(start + _SCORE_BLOCK, count)
+            scores[start:stop] = matrix[start:stop].astype(np.float32) @ query
+        return scores
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        filter: Optional[dict] = None,
+        **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        """Find the k documents with the highest cosine similarity to a vector.
+
+        Args:
+            embedding (list[float]): Query vector
+            k (int): Number of results
+            filter (Optional[dict]): Optional filter on `source`, e.g. {"source": "QnA"}
+
+        Returns:
+            list[tuple[Document, float]]: Documents with their cosine similarity
+        """
+        if self._read_only:
+            self._refresh()
+
+        with self._lock:
+            matrix, count = self._matrix, self._header["count"]
+            mask = self._candidate_mask(count, filter)
+            ids = self._ids
+        if matrix is None or not mask.any():
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        query = query / norm if norm else query
+
+        scores = self._scores(matrix, count, query)
+        scores = np.where(mask, scores, -np.inf)
+
+        k = min(k, int(mask.sum()))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        documents = {document.id: document for document in self.get_by_ids([ids[row] for row in top])}
+        return [(documents[ids[row]], float(scores[row])) for row in top if ids[row] in documents]
+
+    def similarity_search_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        filter: Optional[dict] = None,
+        **kwargs: Any
+    ) -> list[Document]:
+        """Find the k documents most similar to a vector"""
+        return [document for document, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    async def asimilarity_search_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        filter: Optional[dict] = None,
+        **kwargs: Any
+    ) -> list[Document]:
+        """Async variant of similarity_search_by_vector, run in a worker thread to keep scoring off the event loop"""
+        return await asyncio.to_thread(self.similarity_search_by_vector, embedding, k, filter)
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[dict] = None,
+        **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        """Find the k documents most similar to a text query, with scores"""
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k, filter)
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[dict] = None,
+        **kwargs: Any
+    ) -> list[Document]:
+        """Find the k documents most similar to a text query"""
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k, filter)
+
+    async def asimilarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[dict] = None,
+        **kwargs: Any
+    ) -> list[Document]:
+        """Find the k documents most similar to a text query, embedding it asynchronously"""
+        return await self.asimilarity_search_by_vector(await self._embedding.aembed_query(query), k, filter)
+
+    def close(self) -> None:
+        """Flush the vectors and close the metadata store"""
+        with self._lock:
+            if self._matrix is not None and not self._read_only:
+                self._matrix.flush()
+            self._conn.close()
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: Optional[list[dict]] = None,
+        *,
+        ids: Optional[list[str]] = None,
+        path: str = "data/vector_index",
+        **kwargs: Any
+    ) -> "LocalMmapVectorStore":
+        """Create an index at `path` and add texts to it"""
+        store = cls(path, embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
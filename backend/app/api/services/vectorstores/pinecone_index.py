@@ -0,0 +1,76 @@
+from typing import Any, Optional, Sequence
+import asyncio
+import uuid
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_pinecone import PineconeVectorStore
+
+
+class PooledPineconeVectorStore(PineconeVectorStore):
+    """Pinecone vector store bound to a pooled index connection.
+
+    PineconeVectorStore only exposes writes that embed the texts themselves. This
+    store keeps the index, namespace and text key it was built with, so documents
+    whose embeddings were already computed are upserted with the same record layout.
+
+    Attributes:
+        index (Any): Pinecone index connection
+        namespace (str | None): Namespace the records are written to
+        text_key (str): Metadata key holding the document text
+    """
+
+    def __init__(
+        self,
+        index: Any,
+        embedding: Embeddings,
+        text_key: str = "text",
+        namespace: Optional[str] = None
+    ) -> None:
+        """Initialize the store.
+
+        Args:
+            index (Any): Pinecone index connection
+            embedding (Embeddings): Embeddings used for queries and add_texts
+            text_key (str): Metadata key holding the document text
+            namespace (Optional[str]): Namespace the records are written to
+        """
+        super().__init__(index=index, embedding=embedding, text_key=text_key, namespace=namespace)
+        self.index = index
+        self.namespace = namespace
+        self.text_key = text_key
+
+    def add_embeddings(
+        self,
+        documents: Sequence[Document],
+        vectors: Sequence[Sequence[float]],
+        ids: Optional[Sequence[str]] = None
+    ) -> list[str]:
+        """Upsert documents with precomputed embeddings.
+
+        Args:
+            documents (Sequence[Document]): Documents to store
+            vectors (Sequence[Sequence[float]]): Embedding of each document
+            ids (Optional[Sequence[str]]): ID of each document, random UUIDs when omitted
+
+        Returns:
+            list[str]: IDs of the stored documents
+        """
+        if not documents:
+            return []
+
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in documents]
+        records = [
+            (id_, list(vector), {**document.metadata, self.text_key: document.page_content})
+            for id_, vector, document in zip(ids, vectors, documents)
+        ]
+        self.index.upsert(vectors=records, namespace=self.namespace)
+        return ids
+
+    async def aadd_embeddings(
+        self,
+        documents: Sequence[Document],
+        vectors: Sequence[Sequence[float]],
+        ids: Optional[Sequence[str]] = None
+    ) -> list[str]:
+        """Async variant of add_embeddings, run in a worker thread since the index client is synchronous"""
+        return await asyncio.to_thread(self.add_embeddings, documents, vectors, ids)
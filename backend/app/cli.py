@@ -0,0 +1,27 @@
+import argparse
+from app.api.services.langgraph.graph_factory import draw_graph
+from app.api.services.langgraph.graph_registry import graph_registry
+from app.api.services.langgraph_service import RETRIEVAL_GRAPH
+
+
+def main() -> None:
+    """Command line entry point for offline maintenance tasks.
+
+    Example: python -m app.cli draw-graph --output graph.png
+    """
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    draw_parser = subparsers.add_parser("draw-graph", help="Render a registered graph as a PNG")
+    draw_parser.add_argument("--name", default=RETRIEVAL_GRAPH, choices=graph_registry.names())
+    draw_parser.add_argument("--output", default="graph.png")
+
+    args = parser.parse_args()
+
+    if args.command == "draw-graph":
+        path = draw_graph(graph_registry.get(args.name), args.output)
+        print(f"Graph {args.name} written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,50 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import llm_routes, rag_routes
+from fastapi.responses import Response
+from app.api.core.logs import configure_logging, shutdown_logging
+from app.api.core.metrics import render_metrics
+from app.api.core.middleware import RequestContextMiddleware
+from app.api.routes import admin_routes, llm_routes, rag_routes
+from app.api.services.answer_cache import get_answer_cache
+from app.api.services.clients import client_pool
+from app.api.services.ingestion_service import get_ingestion_service
+from app.api.services.langgraph.graph_registry import graph_registry
+from app.api.services.langgraph_service import get_answer_flights
+from app.api.services.rag_service import get_rag_service
+from app.api.services.session_store import get_session_store
+from app.api.services.translation_cache import get_translation_cache
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Configure logging, create the pooled clients, compile the registered graphs, open the session store and start background workers."""
+    configure_logging()
+    client_pool.startup()
+    get_rag_service()
+    graph_registry.compile_all()
+    await get_session_store().open()
+    get_ingestion_service().start()
+    yield
+    await get_ingestion_service().stop()
+    get_ingestion_service.cache_clear()
+    await get_session_store().close()
+    get_session_store.cache_clear()
+    graph_registry.clear()
+    get_answer_cache.cache_clear()
+    get_translation_cache().close()
+    get_translation_cache.cache_clear()
+    get_answer_flights.cache_clear()
+    await get_rag_service().close()
+    get_rag_service.cache_clear()
+    await client_pool.shutdown()
+    shutdown_logging()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,11 +52,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
+app.add_middleware(RequestContextMiddleware)
 
 app.include_router(llm_routes.router, prefix="/llm", tags=["LLM"])
 app.include_router(rag_routes.router, prefix="/rag", tags=["RAG"])
+app.include_router(admin_routes.router, prefix="/admin", tags=["Admin"])
 
 @app.get("/")
 async def root():
     return {"message": "Hello World"}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics of nodes, LLM, embedding and vector store calls, caches and errors"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -1,16 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from langchain_core.documents import Document
 
-class DocumentResponse(BaseModel):
-    """Response model for document upload operations.
-    
-    Attributes:
-        filename (str): Name of the uploaded file
-        size (int): Size of the uploaded file in bytes
-    """
-    filename: str
-    size: int
-
 class DocumentRetrievalResponse(BaseModel):
     """Response model for document retrieval operations.
     
@@ -19,6 +9,36 @@ class DocumentRetrievalResponse(BaseModel):
     """
     documents: list[Document]
 
+class DocumentBatchRequest(BaseModel):
+    """Request model for querying many queries at once.
+    
+    Attributes:
+        queries (list[str]): Query strings, at most 100
+        k (int): Number of documents per query
+        source (list[str] | None): Only search documents of these sources
+    """
+    queries: list[str] = Field(..., min_length=1, max_length=100)
+    k: int = Field(3, ge=1, le=50)
+    source: list[str] | None = None
+
+class DocumentBatchItem(BaseModel):
+    """Outcome of one query of a batch.
+    
+    Attributes:
+        documents (list[Document]): Retrieved document chunks, empty if the query failed
+        error (str | None): Error message if the query failed
+    """
+    documents: list[Document] = []
+    error: str | None = None
+
+class DocumentBatchResponse(BaseModel):
+    """Response model for batched document retrieval.
+    
+    Attributes:
+        results (list[DocumentBatchItem]): Outcome of every query, in request order
+    """
+    results: list[DocumentBatchItem]
+
 class Qna(BaseModel):
     """Model for question-answer pairs.
     
@@ -0,0 +1,67 @@
+from datetime import datetime
+from typing import Literal
+from pydantic import BaseModel
+
+JobStatus = Literal["queued", "processing", "completed", "completed_with_errors", "failed"]
+FileStatus = Literal["queued", "processing", "completed", "failed"]
+
+
+class IngestionFileStatus(BaseModel):
+    """Progress of a single file inside an ingestion job.
+    
+    Attributes:
+        filename (str): Name of the uploaded file, or its path inside an uploaded archive
+        document (str): Key identifying the document across uploads, its path within its collection
+        size (int): Size of the uploaded file in bytes
+        status (FileStatus): Processing status of the file
+        chunks_total (int): Number of chunks extracted from the file
+        chunks_processed (int): Number of new chunks already indexed
+        chunks_skipped (int): Number of chunks skipped because they were already indexed
+        chunks_deleted (int): Number of chunks removed since the previous upload of the file
+        tokens (int): Number of tokens embedded
+        chunks_per_second (float): Indexing throughput in chunks per second
+        tokens_per_second (float): Embedding throughput in tokens per second
+        error (str | None): Error message if the file failed
+    """
+    filename: str
+    document: str
+    size: int
+    status: FileStatus = "queued"
+    chunks_total: int = 0
+    chunks_processed: int = 0
+    chunks_skipped: int = 0
+    chunks_deleted: int = 0
+    tokens: int = 0
+    chunks_per_second: float = 0.0
+    tokens_per_second: float = 0.0
+    error: str | None = None
+
+
+class IngestionJobStatus(BaseModel):
+    """Status of a background ingestion job.
+    
+    Attributes:
+        job_id (str): Identifier of the job
+        status (JobStatus): Overall status of the job
+        files (list[IngestionFileStatus]): Progress of every file in the job
+        created_at (datetime): When the job was enqueued
+        finished_at (datetime | None): When the last file finished processing
+    """
+    job_id: str
+    status: JobStatus = "queued"
+    files: list[IngestionFileStatus]
+    created_at: datetime
+    finished_at: datetime | None = None
+
+
+class IngestionJobResponse(BaseModel):
+    """Response model for accepted ingestion jobs.
+    
+    Attributes:
+        job_id (str): Identifier to poll at /rag/jobs/{job_id}
+        status (JobStatus): Status of the job when it was accepted
+        files (list[str]): Names of the files enqueued in the job
+    """
+    job_id: str
+    status: JobStatus
+    files: list[str]
@@ -28,10 +28,10 @@ class Edge:
     """Class representing a directed edge between nodes in the workflow graph.
     
     Attributes:
-        source (str): Name of the source node
-        target (str): Name of the target node 
+        source (str | list[str]): Name of the source node, or of several nodes that must all finish first
+        target (str | list[str] | None): Name of the target node, or the possible targets of a conditional edge
         condition (Callable | None): Optional condition function that determines if edge should be traversed
     """
-    source: str
-    target: str | None = None
+    source: str | list[str]
+    target: str | list[str] | None = None
     condition: Callable | None = None
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class MessageRequest(BaseModel):
     """Request model for message generation.
@@ -6,14 +6,53 @@ class MessageRequest(BaseModel):
     Attributes:
         user_name (str): Name of the user making the request
         question (str): Question or query text from the user
+        source (str | None): Only retrieve context from documents of this source, e.g. "QnA"
+        session_id (str | None): Conversation session the question follows up on, None for a standalone question
     """
     user_name: str
     question: str
+    source: str | None = None
+    session_id: str | None = Field(None, min_length=1, max_length=128)
 
 class MessageResponse(BaseModel):
     """Response model for generated messages.
     
     Attributes:
         answer (str): Generated answer text from the LLM
+        degraded (bool): The workflow ran out of time or steps and this is the best answer it reached
     """
     answer: str
+    degraded: bool = False
+
+
+class MessageBatchRequest(BaseModel):
+    """Request model for answering many questions at once.
+    
+    Attributes:
+        user_name (str): Name of the user making the request
+        questions (list[str]): Questions to answer, at most 100
+        source (str | None): Only retrieve context from documents of this source, e.g. "QnA"
+    """
+    user_name: str
+    questions: list[str] = Field(..., min_length=1, max_length=100)
+    source: str | None = None
+
+class MessageBatchItem(BaseModel):
+    """Outcome of one question of a batch.
+    
+    Attributes:
+        answer (str | None): Generated answer, None if the question failed
+        degraded (bool): The workflow ran out of time or steps and this is the best answer it reached
+        error (str | None): Error message if the question failed
+    """
+    answer: str | None = None
+    degraded: bool = False
+    error: str | None = None
+
+class MessageBatchResponse(BaseModel):
+    """Response model for batched message generation.
+    
+    Attributes:
+        results (list[MessageBatchItem]): Outcome of every question, in request order
+    """
+    results: list[MessageBatchItem]
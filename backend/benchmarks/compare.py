@@ -0,0 +1,72 @@
+"""Compare two benchmark result files.
+
+    python -m benchmarks.compare benchmarks/results/baseline.json benchmarks/results/candidate.json
+"""
+import argparse
+import json
+from pathlib import Path
+
+
+def _rows(summary: dict) -> dict[str, dict]:
+    """Latency distributions of a summary keyed by row name"""
+    rows = {"latency": summary["latency"], "ttft": summary["ttft"]}
+    rows.update({f"node {node}": stats for node, stats in summary["nodes"].items()})
+    return rows
+
+
+def _change(before: float, after: float) -> str:
+    """Relative change as a signed percentage"""
+    return f"{(after - before) / before:+.1%}" if before else "n/a"
+
+
+def compare(baseline: dict, candidate: dict) -> list[str]:
+    """Render the differences between two runs.
+
+    Args:
+        baseline (dict): Result of the reference run
+        candidate (dict): Result of the run to evaluate
+
+    Returns:
+        list[str]: Report lines
+    """
+    lines = [
+        f"baseline:  {baseline['label']} {baseline['git']['commit'][:8]} {baseline['git']['subject']}",
+        f"candidate: {candidate['label']} {candidate['git']['commit'][:8]} {candidate['git']['subject']}",
+        ""
+    ]
+    before, after = baseline["summary"], candidate["summary"]
+    lines.append(
+        f"throughput {before['throughput_rps']:.2f} -> {after['throughput_rps']:.2f} req/s "
+        f"({_change(before['throughput_rps'], after['throughput_rps'])}), "
+        f"error rate {before['error_rate']:.2%} -> {after['error_rate']:.2%}"
+    )
+    lines.append(f"{'':<20}{'metric':>8}{'baseline':>12}{'candidate':>12}{'change':>10}")
+
+    before_rows, after_rows = _rows(before), _rows(after)
+    for name in dict.fromkeys([*before_rows, *after_rows]):
+        old, new = before_rows.get(name, {"count": 0}), after_rows.get(name, {"count": 0})
+        if not old["count"] or not new["count"]:
+            lines.append(f"{name:<20}{'only in ' + ('candidate' if new['count'] else 'baseline'):>42}")
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            label = name if metric == "p50_ms" else ""
+            lines.append(
+                f"{label:<20}{metric[:3]:>8}{old[metric]:>12.1f}{new[metric]:>12.1f}{_change(old[metric], new[metric]):>10}"
+            )
+    return lines
+
+
+def main() -> None:
+    """Compare two result files from the command line"""
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    candidate = json.loads(Path(args.candidate).read_text(encoding="utf-8"))
+    print("\n".join(compare(baseline, candidate)))
+
+
+if __name__ == "__main__":
+    main()
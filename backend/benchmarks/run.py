@@ -0,0 +1,407 @@
+"""Offline load test of the question answering endpoints.
+
+Boots the stub OpenAI/Pinecone server and the FastAPI app pointed at it, seeds a
+small corpus, replays questions from Postman collections or JSON lines files at a
+fixed concurrency and reports latency percentiles, throughput, error rate and,
+in stream mode, the time spent in every workflow node. Results are saved to
+benchmarks/results/ tagged with the git commit, for comparison with compare.py:
+
+    python -m benchmarks.run --concurrency 8 --requests 200 --label baseline
+"""
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+import argparse
+import asyncio
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+import httpx
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_REQUEST_FILES = [BACKEND_DIR.parent / "POST_Questions_Postman_Collection.json"]
+_SEED_PARAGRAPHS = [
+    "Ficción Espacial",
+    "Zara exploraba la galaxia de Zenthoria cuando descubrió un cristal capaz de almacenar recuerdos.",
+    "Ficción Tecnológica",
+    "Alex trabajaba en una ciudad gobernada por algoritmos y debía decidir si revelar sus fallos.",
+    "Naturaleza",
+    "En el bosque de Eldoria los árboles se comunicaban a través de raíces luminosas.",
+    "Cuento Corto",
+    "Un héroe olvidado regresó a su aldea para proteger a quienes ya no lo recordaban.",
+]
+
+
+@dataclass
+class Sample:
+    """Outcome of one replayed request.
+
+    Attributes:
+        question (str): Question sent
+        status (int): HTTP status, 0 if the request failed before a response
+        latency (float): Seconds until the full answer was received
+        ttft (float | None): Seconds until the first answer token (stream mode)
+        error (str | None): Error message if the request failed
+        nodes (dict[str, float]): Seconds spent in each workflow node (stream mode)
+    """
+    question: str
+    status: int
+    latency: float
+    ttft: float | None = None
+    error: str | None = None
+    nodes: dict[str, float] = field(default_factory=dict)
+
+
+def load_questions(path: Path) -> list[str]:
+    """Load the questions of a Postman collection or a JSON lines file.
+
+    Postman requests must have a raw JSON body with a "question". JSON lines records
+    use their "question" field, falling back to "title" and "body".
+
+    Args:
+        path (Path): Collection (.json) or JSON lines (.jsonl) file
+
+    Returns:
+        list[str]: Questions in file order
+    """
+    if path.suffix == ".jsonl":
+        questions = []
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                record = json.loads(line)
+                question = record.get("question") or record.get("title") or record.get("body")
+                if question:
+                    questions.append(question)
+        return questions
+
+    def walk(items: list[dict]) -> list[str]:
+        found = []
+        for item in items:
+            if "item" in item:
+                found.extend(walk(item["item"]))
+                continue
+            raw = item.get("request", {}).get("body", {}).get("raw")
+            if raw:
+                question = json.loads(raw).get("question")
+                if question:
+                    found.append(question)
+        return found
+
+    return walk(json.loads(path.read_text(encoding="utf-8"))["item"])
+
+
+def make_docx(paragraphs: list[str]) -> bytes:
+    """Build a minimal .docx document with one paragraph per entry"""
+    body = "".join(f"<w:p><w:r><w:t>{escape(paragraph)}</w:t></w:r></w:p>" for paragraph in paragraphs)
+    document = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{body}</w:body></w:document>"
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def free_port() -> int:
+    """Pick an unused local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_revision() -> dict:
+    """Commit and dirty state of the working tree, for comparing runs across commits"""
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+    return {"commit": git("rev-parse", "HEAD"), "subject": git("log", "-1", "--format=%s"), "dirty": bool(git("status", "--porcelain"))}
+
+
+async def wait_ready(client: httpx.AsyncClient, url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    """Wait until a server answers on url, failing fast if its process exits"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Process {process.args} exited with code {process.returncode}")
+        try:
+            await client.get(url)
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+async def seed(client: httpx.AsyncClient, app_url: str, questions: list[str], documents: int) -> None:
+    """Index QnA pairs for the replayed questions and synthetic documents"""
+    for i, question in enumerate(dict.fromkeys(questions)):
+        response = await client.post(f"{app_url}/rag/upload_qna", json={
+            "question": question,
+            "answer": f"Respuesta de referencia {i} sobre {question}"
+        })
+        response.raise_for_status()
+
+    if documents:
+        files = [
+            ("files", (f"seed_{i}.docx", make_docx([f"Historia {i}", *_SEED_PARAGRAPHS]), "application/octet-stream"))
+            for i in range(documents)
+        ]
+        response = await client.post(f"{app_url}/rag/upload_documents", files=files)
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+        while True:
+            status = (await client.get(f"{app_url}/rag/jobs/{job_id}")).json()["status"]
+            if status not in ("queued", "processing"):
+                break
+            await asyncio.sleep(0.2)
+        if status != "completed":
+            raise RuntimeError(f"Seeding documents ended with status {status}")
+
+
+async def send(client: httpx.AsyncClient, app_url: str, question: str, mode: str) -> Sample:
+    """Send one question and time it"""
+    body = {"user_name": "benchmark", "question": question}
+    start = time.perf_counter()
+    try:
+        if mode == "generate":
+            response = await client.post(f"{app_url}/llm/generate_message", json=body)
+            latency = time.perf_counter() - start
+            error = None if response.is_success else response.text[:200]
+            return Sample(question, response.status_code, latency, error=error)
+
+        ttft = None
+        nodes: dict[str, float] = {}
+        started: dict[str, float] = {}
+        event = None
+        async with client.stream("POST", f"{app_url}/llm/generate_message_stream", json=body) as response:
+            if not response.is_success:
+                await response.aread()
+                return Sample(question, response.status_code, time.perf_counter() - start, error=response.text[:200])
+            async for line in response.aiter_lines():
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    now = time.perf_counter()
+                    data = json.loads(line[len("data: "):])
+                    if event == "node_start":
+                        started[data["node"]] = now
+                    elif event == "node_end" and data["node"] in started:
+                        nodes[data["node"]] = nodes.get(data["node"], 0.0) + now - started.pop(data["node"])
+                    elif event in ("token", "answer") and ttft is None:
+                        ttft = now - start
+        return Sample(question, response.status_code, time.perf_counter() - start, ttft=ttft, nodes=nodes)
+    except httpx.HTTPError as e:
+        return Sample(question, 0, time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+
+
+async def replay(
+    client: httpx.AsyncClient,
+    app_url: str,
+    questions: list[str],
+    mode: str,
+    total: int,
+    concurrency: int
+) -> tuple[list[Sample], float]:
+    """Send `total` requests cycling through the questions, `concurrency` at a time.
+
+    Returns:
+        tuple[list[Sample], float]: Samples in completion order and the wall time in seconds
+    """
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(questions[i % len(questions)])
+    samples: list[Sample] = []
+
+    async def worker() -> None:
+        while not queue.empty():
+            samples.append(await send(client, app_url, queue.get_nowait(), mode))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+def distribution(values: list[float]) -> dict:
+    """Percentiles and mean of a list of seconds, in milliseconds"""
+    if not values:
+        return {"count": 0}
+    array = np.asarray(values) * 1000
+    return {
+        "count": len(values),
+        "mean_ms": float(array.mean()),
+        "p50_ms": float(np.percentile(array, 50)),
+        "p95_ms": float(np.percentile(array, 95)),
+        "p99_ms": float(np.percentile(array, 99)),
+        "max_ms": float(array.max())
+    }
+
+
+def summarize(samples: list[Sample], elapsed: float) -> dict:
+    """Aggregate samples into latency, throughput, error and per-node statistics"""
+    succeeded = [sample for sample in samples if sample.error is None]
+    node_names = sorted({node for sample in succeeded for node in sample.nodes})
+    return {
+        "requests": len(samples),
+        "errors": len(samples) - len(succeeded),
+        "error_rate": (len(samples) - len(succeeded)) / len(samples) if samples else 0.0,
+        "elapsed_s": elapsed,
+        "throughput_rps": len(succeeded) / elapsed if elapsed else 0.0,
+        "latency": distribution([sample.latency for sample in succeeded]),
+        "ttft": distribution([sample.ttft for sample in succeeded if sample.ttft is not None]),
+        "nodes": {
+            node: distribution([sample.nodes[node] for sample in succeeded if node in sample.nodes])
+            for node in node_names
+        }
+    }
+
+
+def print_summary(summary: dict) -> None:
+    """Print a summary as a table"""
+    print(
+        f"{summary['requests']} requests in {summary['elapsed_s']:.2f}s, "
+        f"{summary['throughput_rps']:.2f} req/s, error rate {summary['error_rate']:.2%}"
+    )
+    rows = [("latency", summary["latency"]), ("ttft", summary["ttft"])]
+    rows += [(f"node {node}", stats) for node, stats in summary["nodes"].items()]
+    print(f"{'':<20}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, stats in rows:
+        if stats["count"]:
+            print(
+                f"{name:<20}{stats['count']:>8}{stats['mean_ms']:>10.1f}{stats['p50_ms']:>10.1f}"
+                f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+            )
+
+
+def start_process(args: list[str], env: dict, log_path: Path) -> subprocess.Popen:
+    """Start a Python module as a subprocess of the backend directory, logging to a file"""
+    # The child inherits its own copy of the descriptor, so ours is closed right away
+    with open(log_path, "w") as log:
+        return subprocess.Popen([sys.executable, *args], cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    """Boot the servers, seed, replay and collect the results"""
+    questions = [question for path in args.request_files for question in load_questions(Path(path))]
+    if not questions:
+        raise ValueError("No questions found in the request files")
+
+    stub_port, app_port = free_port(), free_port()
+    stub_url, app_url = f"http://127.0.0.1:{stub_port}", f"http://127.0.0.1:{app_port}"
+    workdir = Path(tempfile.mkdtemp(prefix="benchmark-"))
+
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": f"{stub_url}/v1",
+        "PINECONE_API_KEY": "benchmark",
+        "PINECONE_INDEX_HOST": stub_url,
+        "LANGCHAIN_TRACING_V2": "false",
+        "EMBEDDING_CHECK_CTX_LENGTH": "false",
+        "ANSWER_CACHE_ENABLED": str(args.answer_cache).lower(),
+        "LEXICAL_INDEX_PATH": str(workdir / "lexical_index.npz"),
+        "INGESTION_MANIFEST_PATH": str(workdir / "ingestion_manifest.sqlite"),
+        "SESSION_DB_PATH": str(workdir / "sessions.sqlite"),
+        "TRANSLATION_CACHE_PATH": str(workdir / "translation_cache.sqlite"),
+        "LOCAL_VECTOR_STORE_PATH": str(workdir / "vector_index"),
+        "EMBEDDING_CACHE_PATH": "",
+        **dict(item.split("=", 1) for item in args.app_env)
+    }
+
+    stub_args = [
+        "-m", "benchmarks.stub_server", "--port", str(stub_port),
+        "--chat-latency-ms", str(args.chat_latency_ms),
+        "--token-latency-ms", str(args.token_latency_ms),
+        "--embedding-latency-ms", str(args.embedding_latency_ms),
+        "--vector-latency-ms", str(args.vector_latency_ms),
+        "--jitter", str(args.jitter),
+        "--seed", str(args.seed)
+    ]
+    app_args = ["-m", "uvicorn", "app.main:app", "--port", str(app_port), "--workers", str(args.workers), "--log-level", "warning"]
+
+    stub = start_process(stub_args, env, workdir / "stub.log")
+    app = None
+    try:
+        async with httpx.AsyncClient(timeout=args.timeout, limits=httpx.Limits(max_connections=args.concurrency + 10)) as client:
+            await wait_ready(client, f"{stub_url}/stats", stub)
+            app = start_process(app_args, env, workdir / "app.log")
+            await wait_ready(client, f"{app_url}/", app)
+
+            print(f"Seeding {len(set(questions))} QnAs and {args.seed_documents} documents")
+            await seed(client, app_url, questions, args.seed_documents)
+            if args.warmup:
+                await replay(client, app_url, questions, args.mode, args.warmup, args.concurrency)
+
+            if args.error_rate:
+                await client.post(f"{stub_url}/config", json={"error_rate": args.error_rate})
+
+            print(f"Replaying {args.requests} {args.mode} requests at concurrency {args.concurrency}")
+            samples, elapsed = await replay(client, app_url, questions, args.mode, args.requests, args.concurrency)
+            stub_stats = (await client.get(f"{stub_url}/stats")).json()
+    finally:
+        for process in (app, stub):
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=10)
+    print(f"Server logs in {workdir}")
+
+    return {
+        "label": args.label,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git": git_revision(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "summary": summarize(samples, elapsed),
+        "stub": stub_stats,
+        "samples": [asdict(sample) for sample in samples]
+    }
+
+
+def main() -> None:
+    """Run the benchmark from the command line"""
+    parser = argparse.ArgumentParser(description="Offline latency benchmark of the question answering endpoints")
+    parser.add_argument("--request-files", nargs="+", default=[str(path) for path in DEFAULT_REQUEST_FILES],
+                        help="Postman collections (.json) or JSON lines files (.jsonl) with questions")
+    parser.add_argument("--mode", choices=["stream", "generate"], default="stream",
+                        help="stream reports per-node timings and time to first token")
+    parser.add_argument("--requests", type=int, default=100, help="Requests to send, cycling through the questions")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests sent first")
+    parser.add_argument("--workers", type=int, default=1, help="Uvicorn worker processes of the app")
+    parser.add_argument("--seed-documents", type=int, default=2)
+    parser.add_argument("--answer-cache", action="store_true", help="Keep the answer cache enabled")
+    parser.add_argument("--app-env", nargs="*", default=[], metavar="KEY=VALUE", help="Extra settings for the app")
+    parser.add_argument("--chat-latency-ms", type=float, default=400.0)
+    parser.add_argument("--token-latency-ms", type=float, default=15.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=60.0)
+    parser.add_argument("--vector-latency-ms", type=float, default=25.0)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of upstream calls failing while measuring")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the injected jitter and errors")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output", default=None, help="Result file, defaults to benchmarks/results/<time>-<commit>-<label>.json")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print_summary(result["summary"])
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{result['git']['commit'][:8] or 'nogit'}-{args.label}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
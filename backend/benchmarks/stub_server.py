@@ -0,0 +1,381 @@
+"""Local stand-in for the OpenAI and Pinecone APIs used by the benchmarks.
+
+Serves the chat completions (plain, streamed and tool calls), embeddings and
+Pinecone index data-plane endpoints the application calls, with configurable
+injected latency and error rates, so the app can be load tested offline:
+
+    python -m benchmarks.stub_server --port 8900 --chat-latency-ms 400 --error-rate 0.01
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8900/v1 and
+PINECONE_INDEX_HOST=http://127.0.0.1:8900.
+"""
+from dataclasses import asdict, dataclass
+from threading import Lock
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import re
+import time
+import uuid
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_WORDS = re.compile(r"[^\W_]+", re.UNICODE)
+_TRANSLATE_TEXT = re.compile(r"#TEXT\n(.*)", re.DOTALL)
+_ANSWER_WORDS = (
+    "Según el contexto recuperado la historia describe a sus protagonistas y los desafíos que enfrentan "
+    "en un mundo lejano donde la tecnología y la naturaleza conviven en un equilibrio frágil"
+).split()
+
+
+@dataclass
+class StubConfig:
+    """Injected behaviour of the stub server.
+
+    Attributes:
+        chat_latency_ms (float): Time to the first token of a chat completion
+        token_latency_ms (float): Time between streamed tokens, also added per token to non-streamed answers
+        embedding_latency_ms (float): Latency of an embeddings request
+        vector_latency_ms (float): Latency of a Pinecone request
+        jitter (float): Relative random variation of every latency, e.g. 0.2 for ±20%
+        error_rate (float): Share of requests answered with a 429 or 500 error
+        answer_tokens (int): Tokens of a generated answer
+        dimensions (int): Default embedding dimensions
+    """
+    chat_latency_ms: float = 400.0
+    token_latency_ms: float = 15.0
+    embedding_latency_ms: float = 60.0
+    vector_latency_ms: float = 25.0
+    jitter: float = 0.2
+    error_rate: float = 0.0
+    answer_tokens: int = 60
+    dimensions: int = 3072
+
+
+def embed(text: str, dimensions: int) -> np.ndarray:
+    """Deterministic unit vector of a text.
+
+    Words are hashed into signed buckets, so texts sharing words get similar vectors
+    and retrieval over the stub behaves roughly like a real embedding model.
+
+    Args:
+        text (str): Text to embed
+        dimensions (int): Vector size
+
+    Returns:
+        np.ndarray: float32 unit vector
+    """
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for word in _WORDS.findall(text.casefold()) or [text]:
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        vector[value % dimensions] += 1.0 if value >> 63 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class StubIndex:
+    """In-memory Pinecone index split into namespaces"""
+
+    def __init__(self) -> None:
+        """Initialize an empty index"""
+        self._namespaces: dict[str, dict[str, tuple[np.ndarray, dict]]] = {}
+        self._lock = Lock()
+
+    def upsert(self, namespace: str, vectors: list[dict]) -> int:
+        """Insert or replace vectors, returning how many were written"""
+        with self._lock:
+            records = self._namespaces.setdefault(namespace, {})
+            for vector in vectors:
+                records[vector["id"]] = (np.asarray(vector["values"], dtype=np.float32), vector.get("metadata") or {})
+        return len(vectors)
+
+    def delete(self, namespace: str, ids: list[str] | None, delete_all: bool, filter: dict | None) -> None:
+        """Delete vectors by ID, by metadata filter or all of a namespace"""
+        with self._lock:
+            records = self._namespaces.get(namespace, {})
+            if delete_all:
+                records.clear()
+            for id_ in ids or []:
+                records.pop(id_, None)
+            if filter:
+                for id_ in [id_ for id_, (_, metadata) in records.items() if _matches(metadata, filter)]:
+                    del records[id_]
+
+    def query(self, namespace: str, vector: list[float], top_k: int, filter: dict | None) -> list[tuple[str, float, dict]]:
+        """Find the top_k vectors most similar to a query vector"""
+        with self._lock:
+            records = [
+                (id_, values, metadata) for id_, (values, metadata) in self._namespaces.get(namespace, {}).items()
+                if not filter or _matches(metadata, filter)
+            ]
+        if not records:
+            return []
+        matrix = np.stack([values for _, values, _ in records])
+        scores = matrix @ np.asarray(vector, dtype=np.float32)
+        top = np.argsort(-scores)[:top_k]
+        return [(records[row][0], float(scores[row]), records[row][2]) for row in top]
+
+    def stats(self) -> dict:
+        """Vector counts per namespace"""
+        with self._lock:
+            return {namespace: len(records) for namespace, records in self._namespaces.items()}
+
+
+def _matches(metadata: dict, filter: dict) -> bool:
+    """Check metadata against a Pinecone filter with $eq, $in and $and"""
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+            continue
+        value = metadata.get(key)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _count_tokens(text: str) -> int:
+    """Rough token count, four characters per token"""
+    return max(1, len(text) // 4)
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    """Create the stub application.
+
+    Args:
+        config (StubConfig): Injected latency and errors
+
+    Returns:
+        FastAPI: Application serving the OpenAI and Pinecone endpoints
+    """
+    app = FastAPI()
+    index = StubIndex()
+    counters = {"requests": 0, "errors": 0}
+
+    async def delay(milliseconds: float) -> None:
+        jitter = 1 + random.uniform(-config.jitter, config.jitter)
+        await asyncio.sleep(max(0.0, milliseconds * jitter) / 1000)
+
+    def injected_error() -> JSONResponse | None:
+        counters["requests"] += 1
+        if random.random() >= config.error_rate:
+            return None
+        counters["errors"] += 1
+        status = random.choice([429, 500])
+        message = "Rate limit reached" if status == 429 else "Injected server error"
+        return JSONResponse({"error": {"message": message, "type": "stub_error", "code": status}}, status_code=status)
+
+    @app.get("/stats")
+    async def stats():
+        return {**counters, "namespaces": index.stats()}
+
+    @app.post("/config")
+    async def update_config(request: Request):
+        # Lets the benchmark seed without errors and inject them only while measuring
+        for key, value in (await request.json()).items():
+            if hasattr(config, key):
+                setattr(config, key, type(getattr(config, key))(value))
+        return asdict(config)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await delay(config.chat_latency_ms)
+        if (error := injected_error()) is not None:
+            return error
+
+        prompt = "\n".join(str(message.get("content") or "") for message in body["messages"])
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        tool_call = None
+        content = None
+        if body.get("tools"):
+            function = body["tools"][0]["function"]
+            properties = function["parameters"].get("properties", {})
+            if "translation" in properties:
+                match = _TRANSLATE_TEXT.search(prompt)
+                arguments = {"translation": match.group(1).strip() if match else prompt, "language": "English"}
+            else:
+                options = properties.get("next", {}).get("enum", [])
+                # Mirror the supervisor prompt: finish once the workflow has an answer
+                route = "FINISH" if "ANSWER:" in prompt and "FINISH" in options else "RETRIEVAL"
+                if options and route not in options:
+                    route = options[0]
+                arguments = {"next": route}
+            tool_call = {
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "type": "function",
+                "function": {"name": function["name"], "arguments": json.dumps(arguments)}
+            }
+        elif match := _TRANSLATE_TEXT.search(prompt):
+            # Plain-text translation of an answer
+            content = match.group(1).strip()
+        else:
+            content = " ".join(_ANSWER_WORDS[i % len(_ANSWER_WORDS)] for i in range(config.answer_tokens)) + "."
+
+        usage = {
+            "prompt_tokens": _count_tokens(prompt),
+            "completion_tokens": _count_tokens(content or ""),
+            "total_tokens": _count_tokens(prompt) + _count_tokens(content or "")
+        }
+        base = {"id": completion_id, "created": int(time.time()), "model": body.get("model", "stub")}
+
+        if not body.get("stream"):
+            if content:
+                await delay(config.token_latency_ms * len(content.split()))
+            message = {"role": "assistant", "content": content}
+            if tool_call:
+                message["tool_calls"] = [tool_call]
+            return {
+                **base,
+                "object": "chat.completion",
+                "choices": [{
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if tool_call else "stop"
+                }],
+                "usage": usage
+            }
+
+        async def events():
+            def chunk(delta: dict, finish_reason: str | None = None) -> str:
+                choice = {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                return f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': [choice]})}\n\n"
+
+            if tool_call:
+                yield chunk({"role": "assistant", "tool_calls": [{**tool_call, "index": 0}]})
+                yield chunk({}, "tool_calls")
+            else:
+                words = content.split(" ")
+                for i, word in enumerate(words):
+                    delta = {"content": word if i == 0 else f" {word}"}
+                    yield chunk({"role": "assistant", **delta} if i == 0 else delta)
+                    await delay(config.token_latency_ms)
+                yield chunk({}, "stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        await delay(config.embedding_latency_ms)
+        if (error := injected_error()) is not None:
+            return error
+
+        inputs = body["input"]
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        dimensions = body.get("dimensions") or config.dimensions
+        data = []
+        tokens = 0
+        for i, item in enumerate(inputs):
+            # Clients that split long texts send token IDs instead of strings
+            text = item if isinstance(item, str) else " ".join(map(str, item))
+            tokens += len(item) if isinstance(item, list) else _count_tokens(item)
+            vector = embed(text, dimensions)
+            if body.get("encoding_format") == "base64":
+                embedding = base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii")
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "stub"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        }
+
+    @app.post("/vectors/upsert")
+    async def upsert(request: Request):
+        body = await request.json()
+        await delay(config.vector_latency_ms)
+        if (error := injected_error()) is not None:
+            return error
+        return {"upsertedCount": index.upsert(body.get("namespace", ""), body["vectors"])}
+
+    @app.post("/query")
+    async def query(request: Request):
+        body = await request.json()
+        await delay(config.vector_latency_ms)
+        if (error := injected_error()) is not None:
+            return error
+
+        namespace = body.get("namespace", "")
+        matches = index.query(namespace, body["vector"], body.get("topK", 10), body.get("filter"))
+        return {
+            "matches": [
+                {"id": id_, "score": score, "values": [], **({"metadata": metadata} if body.get("includeMetadata") else {})}
+                for id_, score, metadata in matches
+            ],
+            "namespace": namespace,
+            "usage": {"readUnits": 1}
+        }
+
+    @app.post("/vectors/delete")
+    async def delete(request: Request):
+        body = await request.json()
+        await delay(config.vector_latency_ms)
+        if (error := injected_error()) is not None:
+            return error
+        index.delete(body.get("namespace", ""), body.get("ids"), body.get("deleteAll", False), body.get("filter"))
+        return {}
+
+    @app.post("/describe_index_stats")
+    async def describe_index_stats():
+        namespaces = index.stats()
+        return {
+            "namespaces": {namespace: {"vectorCount": count} for namespace, count in namespaces.items()},
+            "dimension": config.dimensions,
+            "indexFullness": 0.0,
+            "totalVectorCount": sum(namespaces.values())
+        }
+
+    return app
+
+
+def main() -> None:
+    """Run the stub server from the command line"""
+    defaults = StubConfig()
+    parser = argparse.ArgumentParser(description="Stand-in OpenAI and Pinecone server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--chat-latency-ms", type=float, default=defaults.chat_latency_ms)
+    parser.add_argument("--token-latency-ms", type=float, default=defaults.token_latency_ms)
+    parser.add_argument("--embedding-latency-ms", type=float, default=defaults.embedding_latency_ms)
+    parser.add_argument("--vector-latency-ms", type=float, default=defaults.vector_latency_ms)
+    parser.add_argument("--jitter", type=float, default=defaults.jitter)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--answer-tokens", type=int, default=defaults.answer_tokens)
+    parser.add_argument("--dimensions", type=int, default=defaults.dimensions)
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the injected jitter and errors")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    config = StubConfig(
+        chat_latency_ms=args.chat_latency_ms,
+        token_latency_ms=args.token_latency_ms,
+        embedding_latency_ms=args.embedding_latency_ms,
+        vector_latency_ms=args.vector_latency_ms,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        answer_tokens=args.answer_tokens,
+        dimensions=args.dimensions
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
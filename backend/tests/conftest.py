@@ -0,0 +1,150 @@
+from typing import Any, ClassVar, Iterator
+import asyncio
+import hashlib
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+from langchain_core.vectorstores import InMemoryVectorStore
+from app.api.core.config import settings
+from app.api.services.answer_cache import get_answer_cache
+from app.api.services.chat_models import StubChatModel
+from app.api.services.clients import client_pool
+from app.api.services.llm_service import register_provider
+from app.api.services.langgraph_service import get_answer_flights
+from app.api.services.rag_service import get_rag_service
+from app.api.services.session_store import get_session_store
+from app.api.services.translation_cache import get_translation_cache
+
+# Delay of every stubbed upstream call, in seconds
+UPSTREAM_DELAY = 0.1
+
+
+class SlowEmbeddings(Embeddings):
+    """Deterministic bag-of-hashes embeddings answering after a fixed delay.
+
+    `max_in_flight` is the largest number of requests that were waiting at once.
+    """
+
+    def __init__(self, delay: float = 0.0, size: int = 32) -> None:
+        self.delay = delay
+        self.size = size
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _wait(self) -> None:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.size
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.size] += 1.0
+        return vector
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        await self._wait()
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        await self._wait()
+        return self._embed(text)
+
+
+class SlowVectorStore(InMemoryVectorStore):
+    """In-memory vector store searching after a fixed delay"""
+
+    delay: float = 0.0
+
+    async def asimilarity_search_by_vector(self, embedding: list[float], k: int = 4, **kwargs: Any) -> list[Document]:
+        await asyncio.sleep(self.delay)
+        return self.similarity_search_by_vector(embedding, k=k, **kwargs)
+
+
+class SlowStubChatModel(StubChatModel):
+    """Stub chat model answering after a fixed delay.
+
+    `max_in_flight` is the largest number of calls, across every instance, that were waiting at once.
+    """
+
+    delay: float = UPSTREAM_DELAY
+    in_flight: ClassVar[int] = 0
+    max_in_flight: ClassVar[int] = 0
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: list[str] | None = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        cls = type(self)
+        cls.in_flight += 1
+        cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            cls.in_flight -= 1
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+
+register_provider("slow_stub", lambda model, http_client, http_async_client: SlowStubChatModel(model=model))
+
+
+def _clear_singletons() -> None:
+    for accessor in (get_answer_cache, get_answer_flights, get_rag_service, get_session_store):
+        accessor.cache_clear()
+    get_translation_cache().close()
+    get_translation_cache.cache_clear()
+    client_pool._embeddings = None
+    client_pool._vector_store = None
+    client_pool._chat_models.clear()
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def isolated_settings(tmp_path, monkeypatch) -> Iterator[None]:
+    """Keep every data file under a temporary directory and start from fresh singletons"""
+    for key, value in {
+        "ANSWER_CACHE_ENABLED": "false",
+        "EMBEDDING_CACHE_PATH": "",
+        "TRANSLATION_CACHE_PATH": "",
+        "SESSION_DB_PATH": str(tmp_path / "sessions.sqlite"),
+        "LEXICAL_INDEX_PATH": str(tmp_path / "lexical_index.npz"),
+        "INGESTION_MANIFEST_PATH": str(tmp_path / "ingestion_manifest.sqlite"),
+        "LOCAL_VECTOR_STORE_PATH": str(tmp_path / "vector_index"),
+        "LLM_SUPERVISOR_MODEL": "stub:stub",
+        "LLM_TRANSLATOR_MODEL": "stub:stub",
+        "LLM_ANSWER_MODEL": "stub:stub",
+    }.items():
+        monkeypatch.setitem(settings._config, key, value)
+    _clear_singletons()
+    yield
+    _clear_singletons()
+
+
+@pytest.fixture
+def stub_backends() -> tuple[SlowEmbeddings, SlowVectorStore]:
+    """Install delayed fake embeddings and vector store in the client pool"""
+    embeddings = SlowEmbeddings(UPSTREAM_DELAY)
+    vector_store = SlowVectorStore(embeddings)
+    vector_store.delay = UPSTREAM_DELAY
+    vector_store.add_texts(
+        ["Emma vive en el bosque y cuida a los animales.", "La nave espacial viaja a Marte con su tripulación."],
+        metadatas=[{"source": "Naturaleza"}, {"source": "Ficción Espacial"}]
+    )
+    client_pool._embeddings = embeddings
+    client_pool._vector_store = vector_store
+    return embeddings, vector_store
@@ -0,0 +1,30 @@
+import threading
+import pytest
+from fastapi import HTTPException
+from langchain_core.runnables.graph import Graph
+from app.api.routes.admin_routes import render_graph
+from app.api.services.langgraph_service import RETRIEVAL_GRAPH
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_rendering_runs_off_the_event_loop(monkeypatch):
+    threads = []
+    monkeypatch.setattr(Graph, "draw_mermaid_png", lambda self: threads.append(threading.get_ident()) or b"png")
+
+    response = await render_graph(RETRIEVAL_GRAPH)
+
+    assert response.body == b"png"
+    assert threads and threads[0] != threading.get_ident()
+
+
+async def test_renderer_failures_are_bad_gateway(monkeypatch):
+    def fail(self) -> bytes:
+        raise ValueError("Failed to render the graph using the Mermaid.INK API. Status code: 503.")
+
+    monkeypatch.setattr(Graph, "draw_mermaid_png", fail)
+
+    with pytest.raises(HTTPException) as error:
+        await render_graph(RETRIEVAL_GRAPH)
+
+    assert error.value.status_code == 502
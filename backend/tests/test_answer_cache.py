@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from langchain_core.embeddings import Embeddings
+from app.api.core.corpus import corpus_version
+from app.api.services.answer_cache import AnswerCache
+
+pytestmark = pytest.mark.anyio
+
+
+class TableEmbeddings(Embeddings):
+    """Embeddings looked up in a fixed table of texts"""
+
+    def __init__(self, table: dict[str, list[float]]) -> None:
+        self.table = table
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.table[text] for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.table[text]
+
+
+EMBEDDINGS = TableEmbeddings({
+    "¿Quién es Emma?": [1.0, 0.0, 0.0],
+    "¿Quién es Emma realmente?": [0.99, 0.14, 0.0],
+    "¿Quién es Emma, la protagonista?": [0.98, 0.0, 0.2],
+    "¿Qué es la nave?": [0.0, 0.0, 1.0],
+})
+
+
+async def test_lookup_falls_back_to_the_next_match_when_the_best_expired():
+    cache = AnswerCache(EMBEDDINGS, threshold=0.9, ttl=0.2)
+    await cache.store("¿Quién es Emma realmente?", "primera", [], corpus_version.version)
+    await asyncio.sleep(0.25)
+    await cache.store("¿Quién es Emma, la protagonista?", "segunda", [], corpus_version.version)
+
+    cached = await cache.lookup("¿Quién es Emma?")
+
+    assert cached is not None and cached.answer == "segunda"
+    assert list(cache._slots) == [cache._key("¿Quién es Emma, la protagonista?")]
+
+
+async def test_rows_of_evicted_answers_are_reused():
+    cache = AnswerCache(EMBEDDINGS, threshold=0.9, maxsize=2)
+    await cache.store("¿Quién es Emma realmente?", "emma", [], corpus_version.version)
+    await cache.store("¿Quién es Emma, la protagonista?", "protagonista", [], corpus_version.version)
+    # Used again, so the least recently used answer is the second one
+    assert (await cache.lookup("¿Quién es Emma realmente?")).answer == "emma"
+    await cache.store("¿Qué es la nave?", "nave", [], corpus_version.version)
+
+    vectors = cache._vectors
+    assert cache._slots == {cache._key("¿Quién es Emma realmente?"): 0, cache._key("¿Qué es la nave?"): 1}
+    assert cache._vectors is vectors and vectors.shape == (2, 3)
+    # The reused row answers for its new question only
+    assert (await cache.lookup("¿Quién es Emma, la protagonista?")).answer == "emma"
+    assert (await cache.lookup("¿Qué es la nave?")).answer == "nave"
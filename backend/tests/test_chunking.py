@@ -0,0 +1,20 @@
+import pytest
+from app.api.core import chunking, tokens
+from app.api.core.chunking import TokenChunker
+
+
+@pytest.fixture
+def no_encoding(monkeypatch) -> None:
+    """Estimate tokens from characters, as when tiktoken cannot load its encoding"""
+    monkeypatch.setattr(chunking, "get_encoding", lambda model=None: None)
+    monkeypatch.setattr(tokens, "get_encoding", lambda model=None: None)
+
+
+def test_words_longer_than_the_budget_are_cut_by_characters(no_encoding):
+    chunker = TokenChunker(max_tokens=10, overlap_tokens=2)
+    blob = "x" * 100
+
+    chunks = list(chunker.split(f"Emma encontró este mensaje: {blob} y lo guardó."))
+
+    assert all(chunk.tokens <= 10 for chunk in chunks)
+    assert "".join(chunk.text for chunk in chunks).count("x") >= 100
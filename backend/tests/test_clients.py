@@ -0,0 +1,20 @@
+import pytest
+from app.api.core.config import settings
+from app.api.services.clients import client_pool
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_embedding_cache_file_is_created_with_the_memory_ttl(tmp_path, monkeypatch):
+    path = tmp_path / "cache" / "embeddings.sqlite"
+    monkeypatch.setitem(settings._config, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setitem(settings._config, "EMBEDDING_CACHE_PATH", str(path))
+    monkeypatch.setitem(settings._config, "EMBEDDING_CACHE_TTL", "60")
+    monkeypatch.setitem(settings._config, "EMBEDDING_CACHE_DISK_SIZE", "5")
+
+    try:
+        store = client_pool.embeddings._store
+        assert path.exists()
+        assert (store.ttl, store.maxsize) == (60, 5)
+    finally:
+        await client_pool.shutdown()
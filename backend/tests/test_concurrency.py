@@ -0,0 +1,45 @@
+import asyncio
+import time
+import pytest
+from app.api.core.config import settings
+from app.api.services.langgraph_service import LangGraphService
+from tests.conftest import UPSTREAM_DELAY, SlowStubChatModel
+
+pytestmark = pytest.mark.anyio
+
+CONCURRENT_REQUESTS = 10
+
+
+@pytest.fixture
+def slow_workflow(stub_backends, monkeypatch) -> LangGraphService:
+    """Workflow whose embedding, vector search and LLM calls each take UPSTREAM_DELAY"""
+    monkeypatch.setitem(settings._config, "RETRIEVAL_MODE", "vector")
+    monkeypatch.setitem(settings._config, "REQUEST_COALESCING", "false")
+    for role in ("SUPERVISOR", "TRANSLATOR", "ANSWER"):
+        monkeypatch.setitem(settings._config, f"LLM_{role}_MODEL", "slow_stub:slow")
+    return LangGraphService()
+
+
+async def test_concurrent_questions_overlap_their_upstream_calls(slow_workflow, stub_backends, monkeypatch):
+    embeddings, _ = stub_backends
+
+    started = time.perf_counter()
+    await slow_workflow.generate_message("¿Quién es Emma y dónde vive?")
+    single = time.perf_counter() - started
+    # Embedding, vector search and answer are awaited one after the other
+    assert single >= 3 * UPSTREAM_DELAY
+
+    calls = embeddings.calls
+    embeddings.max_in_flight = 0
+    monkeypatch.setattr(SlowStubChatModel, "max_in_flight", 0)
+    # Distinct questions, so nothing is coalesced or served from a cache
+    results = await asyncio.gather(*(
+        slow_workflow.generate_message(f"¿Quién es Emma y dónde vive en la historia {i}?")
+        for i in range(CONCURRENT_REQUESTS)
+    ))
+
+    assert embeddings.calls - calls == CONCURRENT_REQUESTS
+    assert all(result["answer"] and not result["degraded"] for result in results)
+    # Every request waits on its upstream calls at the same time instead of one after the other
+    assert embeddings.max_in_flight == CONCURRENT_REQUESTS
+    assert SlowStubChatModel.max_in_flight == CONCURRENT_REQUESTS
@@ -0,0 +1,69 @@
+from typing import Iterator
+import threading
+import pytest
+from langchain_core.documents import Document
+from langchain_core.vectorstores import InMemoryVectorStore
+from app.api.services.ingestion_pipeline import EmbeddingPipeline
+from app.api.services.vectorstores import PooledPineconeVectorStore
+from tests.conftest import SlowEmbeddings
+
+pytestmark = pytest.mark.anyio
+
+
+class FailingEmbeddings(SlowEmbeddings):
+    """Embeddings whose async requests always fail"""
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        raise ValueError("embedding request rejected")
+
+
+class RecordingIndex:
+    """Pinecone index stand-in recording its upserts"""
+
+    def __init__(self) -> None:
+        self.upserts = []
+
+    def upsert(self, vectors: list, namespace: str | None = None) -> None:
+        self.upserts.append((vectors, namespace))
+
+
+async def test_pinecone_upserts_reuse_the_pipeline_embeddings():
+    embeddings = SlowEmbeddings()
+    index = RecordingIndex()
+    store = PooledPineconeVectorStore(index, embeddings, namespace="cuentos")
+    pipeline = EmbeddingPipeline(embeddings, store)
+    documents = [Document(page_content=f"Fragmento {i}", metadata={"source": "Naturaleza"}, id=str(i)) for i in range(3)]
+
+    await pipeline.run(documents)
+
+    assert embeddings.calls == 1
+    [(records, namespace)] = index.upserts
+    assert namespace == "cuentos"
+    assert [(id_, metadata) for id_, _, metadata in records] == [
+        (str(i), {"source": "Naturaleza", "text": f"Fragmento {i}"}) for i in range(3)
+    ]
+
+
+async def test_stage_failure_is_raised_unwrapped():
+    embeddings = FailingEmbeddings()
+    pipeline = EmbeddingPipeline(embeddings, InMemoryVectorStore(embeddings), max_retries=0)
+    documents = [Document(page_content=f"Fragmento {i}", id=str(i)) for i in range(3)]
+
+    with pytest.raises(ValueError, match="embedding request rejected"):
+        await pipeline.run(documents)
+
+
+async def test_documents_are_consumed_off_the_event_loop():
+    embeddings = SlowEmbeddings()
+    pipeline = EmbeddingPipeline(embeddings, InMemoryVectorStore(embeddings), max_batch_size=2)
+    threads = set()
+
+    def documents() -> Iterator[Document]:
+        for i in range(5):
+            threads.add(threading.get_ident())
+            yield Document(page_content=f"Fragmento {i}", id=str(i))
+
+    stats = await pipeline.run(documents())
+
+    assert stats.chunks == 5
+    assert threading.get_ident() not in threads
@@ -0,0 +1,65 @@
+import io
+import os
+import zipfile
+import pytest
+from fastapi import UploadFile
+from app.api.core.config import settings
+from app.api.services.ingestion_service import IngestionService, archive_member_path, document_key
+
+
+def _archive(path, members: dict[str, bytes]) -> str:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return str(path)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch) -> IngestionService:
+    monkeypatch.setitem(settings._config, "INGESTION_ARCHIVE_MAX_FILES", "3")
+    monkeypatch.setitem(settings._config, "INGESTION_ARCHIVE_MAX_BYTES", "1000")
+    return IngestionService(rag_service=None, spool_dir=str(tmp_path / "spool"))
+
+
+def test_member_paths_stay_relative():
+    assert archive_member_path("a/cuentos.docx") == "a/cuentos.docx"
+    assert archive_member_path("/../a/./b/../cuentos.docx") == "a/cuentos.docx"
+    assert archive_member_path("a\\cuentos.docx") == "a/cuentos.docx"
+
+
+def test_same_named_documents_in_different_folders_stay_distinct(service, tmp_path):
+    archive = _archive(tmp_path / "cuentos.zip", {"a/cuentos.docx": b"uno", "b/cuentos.docx": b"dos", "notas.txt": b""})
+
+    extracted = service._extract_archive(archive)
+
+    assert [(name, size) for name, _, size in extracted] == [("a/cuentos.docx", 3), ("b/cuentos.docx", 3)]
+
+
+@pytest.mark.parametrize("members", [
+    {f"{i}.docx": b"x" for i in range(4)},
+    {"grande.docx": b"0" * 2000},
+])
+def test_archives_over_the_limits_are_rejected(service, tmp_path, members):
+    archive = _archive(tmp_path / "bomba.zip", members)
+
+    with pytest.raises(ValueError):
+        service._extract_archive(archive)
+
+    assert not os.listdir(tmp_path / "spool")
+
+
+def test_document_keys_include_the_collection():
+    assert document_key("cuentos.docx") == "cuentos.docx"
+    assert document_key("a/cuentos.docx", "ana") == "ana/a/cuentos.docx"
+    assert document_key("cuentos.docx", "../ana/") == "ana/cuentos.docx"
+
+
+@pytest.mark.anyio
+async def test_same_named_uploads_of_different_collections_are_different_documents(service):
+    jobs = [
+        await service.submit([UploadFile(io.BytesIO(b"docx"), filename="cuentos.docx")], collection=collection)
+        for collection in ("ana", "luis")
+    ]
+
+    assert [job.files[0].document for job in jobs] == ["ana/cuentos.docx", "luis/cuentos.docx"]
+    assert [job.files[0].filename for job in jobs] == ["cuentos.docx", "cuentos.docx"]
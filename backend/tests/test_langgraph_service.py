@@ -0,0 +1,21 @@
+import pytest
+from app.api.services.langgraph_service import LangGraphService
+from app.api.services.rag_service import get_rag_service
+
+pytestmark = pytest.mark.anyio
+
+QUESTIONS = ["¿Quién es Emma y dónde vive?", "Who is Emma and where does she live?"]
+
+
+async def test_only_questions_retrieved_as_asked_are_primed(stub_backends, monkeypatch):
+    primed = []
+
+    async def prime_queries(queries: list[str]) -> None:
+        primed.extend(queries)
+
+    monkeypatch.setattr(get_rag_service(), "prime_queries", prime_queries)
+
+    results = await LangGraphService().generate_messages(QUESTIONS)
+
+    assert all(result.error is None for result in results)
+    assert primed == QUESTIONS[:1]
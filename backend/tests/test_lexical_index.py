@@ -0,0 +1,29 @@
+from langchain_core.documents import Document
+from app.api.services.lexical_index import BM25Index
+
+
+def _documents(*texts: str) -> list[Document]:
+    return [Document(page_content=text, metadata={"source": "Naturaleza"}) for text in texts]
+
+
+def test_saving_drops_deleted_rows(tmp_path):
+    path = str(tmp_path / "index.npz")
+    index = BM25Index(path)
+    index.add_documents(_documents("Emma vive en el bosque", "La nave viaja a Marte", "Emma pilota la nave"), ["a", "b", "c"])
+    index.delete(["a"])
+
+    reopened = BM25Index(path)
+
+    assert reopened._ids == ["b", "c"]
+    assert "bosque" not in reopened._terms
+    assert [document.id for document, _ in reopened.search("Emma nave")] == ["c", "b"]
+
+
+def test_writes_start_from_the_version_saved_by_another_process(tmp_path):
+    path = str(tmp_path / "index.npz")
+    first = BM25Index(path)
+    second = BM25Index(path)
+    first.add_documents(_documents("Emma vive en el bosque"), ["a"])
+    second.add_documents(_documents("La nave viaja a Marte"), ["b"])
+
+    assert sorted(BM25Index(path)._ids) == ["a", "b"]
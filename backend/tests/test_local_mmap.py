@@ -0,0 +1,53 @@
+import os
+import sqlite3
+import pytest
+from app.api.services.vectorstores import LocalMmapVectorStore
+from tests.conftest import SlowEmbeddings
+
+TEXTS = [f"Capítulo {i} de la historia de Emma." for i in range(8)]
+
+
+@pytest.fixture
+def store(tmp_path) -> LocalMmapVectorStore:
+    store = LocalMmapVectorStore(str(tmp_path / "index"), SlowEmbeddings(), initial_capacity=4)
+    store.add_texts(TEXTS, [{"source": "Naturaleza"} for _ in TEXTS], ids=[str(i) for i in range(len(TEXTS))])
+    return store
+
+
+def test_read_only_store_does_not_write(store, tmp_path):
+    store.close()
+    files = {name: os.stat(tmp_path / "index" / name).st_mtime_ns for name in os.listdir(tmp_path / "index")}
+
+    reader = LocalMmapVectorStore(store.path, SlowEmbeddings(), read_only=True)
+
+    assert reader.similarity_search(TEXTS[3], k=1)[0].id == "3"
+    with pytest.raises(sqlite3.OperationalError):
+        reader._conn.execute("CREATE TABLE other (id TEXT)")
+    assert {name: os.stat(tmp_path / "index" / name).st_mtime_ns for name in files} == files
+    with pytest.raises(FileNotFoundError):
+        LocalMmapVectorStore(str(tmp_path / "missing"), SlowEmbeddings(), read_only=True)
+    assert not os.path.exists(tmp_path / "missing")
+
+
+def test_dead_rows_are_compacted(store):
+    reader = LocalMmapVectorStore(store.path, SlowEmbeddings(), read_only=True)
+    # Replaced and deleted rows are both dead
+    store.add_texts(TEXTS[:2], [{"source": "Naturaleza"}] * 2, ids=["0", "1"])
+    store.delete([str(i) for i in range(2, 6)])
+
+    assert store._header["generation"] == 1
+    assert store._ids == ["6", "7", "0", "1"] and store._header["count"] == 4
+    assert [document.id for document in store.similarity_search(TEXTS[0], k=4)][0] == "0"
+    assert {document.id for document in reader.similarity_search(TEXTS[7], k=8)} == {"0", "1", "6", "7"}
+
+    reopened = LocalMmapVectorStore(store.path, SlowEmbeddings())
+    assert reopened.similarity_search(TEXTS[6], k=1)[0].id == "6"
+    assert len(reopened.get_by_ids(["0", "1", "2", "6"])) == 3
+
+    # Only the previous generation is kept for readers
+    reopened.delete(["6", "7", "0"])
+    assert reopened._header["generation"] == 2
+    assert sorted(name for name in os.listdir(store.path) if name.startswith("vectors")) == [
+        "vectors.1.float32", "vectors.2.float32"
+    ]
+    assert reader.similarity_search(TEXTS[1], k=4)[0].id == "1"
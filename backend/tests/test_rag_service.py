@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from langchain_core.documents import Document
+from langchain_core.vectorstores import InMemoryVectorStore
+from app.api.core.config import settings
+from app.api.services.ingestion_manifest import chunk_id
+from app.api.services.rag_service import RAGService
+from app.schemas.document import Qna
+from tests.conftest import SlowEmbeddings
+
+pytestmark = pytest.mark.anyio
+
+
+class FlakyEmbeddings(SlowEmbeddings):
+    """Embeddings rejecting, after their delay, any batch with a text containing "rompe" """
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors = await super().aembed_documents(texts)
+        if any("rompe" in text for text in texts):
+            raise ValueError("embedding request rejected")
+        return vectors
+
+
+def _chunks(*texts: str):
+    return lambda: (Document(page_content=text, metadata={"source": "Naturaleza"}) for text in texts)
+
+
+@pytest.fixture
+def rag_service(monkeypatch) -> RAGService:
+    monkeypatch.setitem(settings._config, "LEXICAL_SAVE_DELAY", "0.05")
+    monkeypatch.setitem(settings._config, "PIPELINE_MAX_RETRIES", "0")
+    embeddings = FlakyEmbeddings()
+    return RAGService(embeddings=embeddings, vector_store=InMemoryVectorStore(embeddings))
+
+
+def _indexed(rag_service: RAGService, text: str) -> bool:
+    id_ = chunk_id(text)
+    return bool(rag_service._vector_store.get_by_ids([id_])) and id_ in rag_service._lexical_index._positions
+
+
+async def test_qna_uploads_share_one_lexical_index_save(rag_service, monkeypatch):
+    saves = []
+    save = rag_service._lexical_index._save
+    monkeypatch.setattr(rag_service._lexical_index, "_save", lambda: saves.append(1) or save())
+
+    for i in range(3):
+        await rag_service.upload_qna(Qna(question=f"¿Quién es Emma {i}?", answer="La protagonista."))
+    assert not saves
+    await asyncio.sleep(0.1)
+
+    assert len(saves) == 1
+    assert len(rag_service._lexical_index) == 3
+
+
+async def test_concurrent_qna_uploads_upsert_once_outside_the_manifest_lock(rag_service):
+    rag_service._embeddings.delay = 0.05
+    qna = Qna(question="¿Quién es Emma?", answer="La protagonista.")
+
+    uploads = asyncio.gather(rag_service.upload_qna(qna), rag_service.upload_qna(qna))
+    await asyncio.sleep(0.02)
+    assert not rag_service._manifest_lock.locked()
+    results = await uploads
+
+    assert sorted(result["message"] for result in results) == ["QnA already uploaded", "QnA uploaded successfully"]
+    assert rag_service._embeddings.calls == 1
+    assert len(rag_service._lexical_index) == 1
+    assert not rag_service._reserved_chunks and not rag_service._embedding_chunks
+
+
+async def test_failed_upload_keeps_the_previous_version(rag_service):
+    await rag_service._index_chunks("cuento.docx", _chunks("Emma vive en el bosque.", "La nave viaja a Marte."))
+    previous = rag_service._manifest.chunk_ids("cuento.docx")
+    # Batches of one chunk, so some are upserted before the failing one
+    rag_service._pipeline._max_batch_size = 1
+
+    with pytest.raises(ValueError, match="embedding request rejected"):
+        await rag_service._index_chunks(
+            "cuento.docx", _chunks("Emma vive en el bosque.", "Un capítulo nuevo.", "Otro capítulo.", "rompe")
+        )
+
+    assert rag_service._manifest.chunk_ids("cuento.docx") == previous
+    assert _indexed(rag_service, "Emma vive en el bosque.") and _indexed(rag_service, "La nave viaja a Marte.")
+    assert not rag_service._vector_store.get_by_ids([chunk_id("Un capítulo nuevo."), chunk_id("Otro capítulo.")])
+    assert len(rag_service._lexical_index) == 2
+    assert not rag_service._reserved_chunks and not rag_service._embedding_chunks
+
+
+async def test_chunks_of_a_failed_concurrent_upload_are_embedded_by_the_other(rag_service):
+    shared = "Texto compartido por los dos documentos."
+    rag_service._embeddings.delay = 0.05
+    first = asyncio.create_task(rag_service._index_chunks("primero.docx", _chunks(shared, "rompe")))
+    while chunk_id(shared) not in rag_service._embedding_chunks:
+        await asyncio.sleep(0.001)
+
+    stats = await rag_service._index_chunks("segundo.docx", _chunks(shared, "Otro texto."))
+
+    with pytest.raises(ValueError):
+        await first
+    assert stats.chunks == 2
+    assert rag_service._manifest.chunk_ids("primero.docx") == set()
+    assert rag_service._manifest.chunk_ids("segundo.docx") == {chunk_id(shared), chunk_id("Otro texto.")}
+    assert _indexed(rag_service, shared) and _indexed(rag_service, "Otro texto.")
@@ -0,0 +1,31 @@
+import random
+import string
+from app.api.core.taxonomy import DEFAULT_TAXONOMY, AUTOMATON_MIN_RULES, KeywordAutomaton, SourceClassifier
+
+
+def test_automaton_finds_the_highest_priority_keyword():
+    automaton = KeywordAutomaton(["nave espacial", "he", "she", "hers", "espacial"])
+
+    assert automaton.first("la nave espacial") == 0
+    assert automaton.first("ushers") == 1
+    assert automaton.first("una sonda espacial") == 4
+    assert automaton.first("nada") is None
+
+
+def test_large_taxonomies_classify_like_the_priority_order():
+    rng = random.Random(7)
+    filler = [("".join(rng.choices(string.ascii_lowercase, k=7)), f"Fuente {i}") for i in range(AUTOMATON_MIN_RULES)]
+    taxonomy = DEFAULT_TAXONOMY + filler
+    classifier = SourceClassifier(taxonomy)
+    texts = [
+        "Un relato de Ficción Espacial sobre la Naturaleza.",
+        "Un Cuento Corto con un Héroe.",
+        f"Sin categoría salvo {filler[100][0]} y {filler[50][0]}.",
+        "Nada que clasificar.",
+    ]
+
+    assert classifier._automaton is not None
+    for text in texts:
+        expected = next((source for keyword, source in taxonomy if keyword in text), classifier.default)
+        assert classifier.classify(text) == expected
+    assert classifier.predict("¿qué pasa en la ficcion espacial?") == "Ficcion Espacial"
@@ -0,0 +1,96 @@
+import pytest
+from langchain_core.messages import HumanMessage
+from app.api.core.budget import BudgetExceeded, RequestBudget
+from app.api.core.config import settings
+from app.api.services.langgraph.graph_registry import graph_registry
+from app.api.services.langgraph_service import LangGraphService, workflow_graph
+from app.api.services.session_store import get_session_store
+
+pytestmark = pytest.mark.anyio
+
+SPANISH_QUESTION = "¿Quién es Emma y dónde vive?"
+ENGLISH_QUESTION = "Who is Emma and where does she live?"
+
+
+@pytest.fixture(params=["serial", "parallel"])
+def execution_mode(request, stub_backends, monkeypatch) -> str:
+    """Run the test on the serial and the parallel workflow, both on stub: profiles"""
+    embeddings, vector_store = stub_backends
+    embeddings.delay = vector_store.delay = 0
+    monkeypatch.setitem(settings._config, "GRAPH_EXECUTION_MODE", request.param)
+    return request.param
+
+
+@pytest.fixture
+async def session_store():
+    store = get_session_store()
+    await store.open()
+    yield store
+    await store.close()
+
+
+async def _run(question: str) -> dict:
+    app = graph_registry.get(workflow_graph())
+    return await app.ainvoke({"messages": [{"role": "user", "content": question}], "source": None})
+
+
+async def test_spanish_questions_are_answered_from_the_retrieved_chunks(execution_mode):
+    state = await _run(SPANISH_QUESTION)
+
+    assert [document.metadata["source"] for document in state["retrieval_context"]]
+    assert len(state["messages"]) == 2 and state["messages"][-1].content.startswith("Según el contexto")
+
+
+async def test_other_languages_are_translated_and_answered_back(execution_mode):
+    state = await _run(ENGLISH_QUESTION)
+
+    assert state["original_language"] == "English"
+    assert state["translated_context"]
+    assert state["retrieval_context"]
+    # The translated question, the answer and its translation back
+    assert len(state["messages"]) == 4
+
+
+async def test_a_step_budget_ending_after_the_answer_returns_it_degraded(execution_mode):
+    # Enough steps to answer, none left for the translation back
+    budget = RequestBudget(timeout=30, max_steps=4)
+    result = await LangGraphService().generate_message(ENGLISH_QUESTION, budget=budget)
+
+    assert result["degraded"]
+    assert result["answer"].startswith("Según el contexto")
+
+
+async def test_a_budget_ending_before_any_answer_fails(execution_mode):
+    with pytest.raises(BudgetExceeded) as error:
+        await LangGraphService().generate_message(ENGLISH_QUESTION, budget=RequestBudget(timeout=30, max_steps=1))
+
+    assert error.value.reason == "steps"
+
+
+async def test_session_turns_continue_the_conversation(execution_mode, session_store):
+    service = LangGraphService(session_store=session_store)
+
+    first = await service.generate_message(SPANISH_QUESTION, user_name="ana", session_id="s1")
+    second = await service.generate_message("¿Y qué animales cuida Emma?", user_name="ana", session_id="s1")
+    other = await service.generate_message(SPANISH_QUESTION, user_name="luis", session_id="s1")
+
+    assert not first["degraded"] and not second["degraded"] and not other["degraded"]
+    app = session_store.bind(graph_registry.get(workflow_graph()))
+    state = (await app.aget_state({"configurable": {"thread_id": session_store.thread_id("ana", "s1")}})).values
+    questions = [message.content for message in state["messages"] if isinstance(message, HumanMessage)]
+    assert questions == [SPANISH_QUESTION, "¿Y qué animales cuida Emma?"]
+    assert state["previous_context"]
+    assert await service.delete_session("ana", "s1")
+    assert not await service.delete_session("ana", "s1")
+
+
+async def test_the_stream_sends_the_translation_that_replaces_the_answer(execution_mode):
+    events = [event async for event in LangGraphService().stream_message(ENGLISH_QUESTION)]
+
+    tokens = {"ANSWER": "", "TRANSLATE_OUTPUT": ""}
+    for event in events:
+        if event["event"] == "token":
+            tokens[event["node"]] += event["content"]
+    answer = next(event for event in events if event["event"] == "answer")
+    assert tokens["ANSWER"] and tokens["TRANSLATE_OUTPUT"]
+    assert answer["answer"] == tokens["TRANSLATE_OUTPUT"] and not answer["degraded"]